@@ -7,23 +7,27 @@ into low-level assembly instructions.
 For integer operations → LD, ADD, ST
 For double (float) operations → LDF, ADDF, STF
 
-Print answer after calculation as example below
+The statement's (optimized) three-address code is lowered onto a finite
+register file R1 .. Rn (DEFAULT_REGISTERS by default) with a linear-scan
+allocator; temporaries that do not fit are spilled to memory slots $1, $2 ...
+and reloaded when needed.
+
+Print answer after running the assembly on the VM (VM.py) as example below
 Answer: y=1;
 """
 
-from typing import Dict, Any, List
+import heapq
+import re
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple, Union
 
-# ----------------------------------------------------------------------
-# Register Management
-# ----------------------------------------------------------------------
-_register_counter = 1
-
-def _new_reg() -> str:
-    """Generate a new register name."""
-    global _register_counter
-    reg = f"R{_register_counter}"
-    _register_counter += 1
-    return reg
+from Diagnostics import Diagnostic, report
+from IntermediateCodeGenerator import test_intermediate
+from Peephole import PeepholeStats, peephole
+from QuadIR import ADD, COPY, DIV, MUL, NAME, NONE, SUB, TEMP, TYPE_NAMES, Quads
+from QuadIR import NEG as NEG_OP
+from SymbolTable import SymbolTable
+from SyntaxTree import NameAllocator, Statement, from_dict, iter_variables
+from VM import execute, truncate_div
 
 # ----------------------------------------------------------------------
 # Operation mapping by type
@@ -35,7 +39,8 @@ _OP_MAP = {
        "add": "ADD",
        "sub": "SUB",
        "mul": "MUL",
-       "div": "DIV"
+       "div": "DIV",
+       "neg": "NEG"
    },
    "double": {
        "load": "LDF",
@@ -43,7 +48,8 @@ _OP_MAP = {
        "add": "ADDF",
        "sub": "SUBF",
        "mul": "MULF",
-       "div": "DIVF"
+       "div": "DIVF",
+       "neg": "NEGF"
    }
 }
 # ----------------------------------------------------------------------
@@ -55,7 +61,8 @@ def op_to_mnemonic(op: str) -> str:
        "+": "add",
        "-": "sub",
        "*": "mul",
-       "/": "div"
+       "/": "div",
+       "neg": "neg"
    }[op]
 
 
@@ -79,12 +86,16 @@ def _compute(var_type: str, op: str, left, right):
    elif op == "*":
        res = a * b
    elif op == "/":
-       res = a / b
+       res = truncate_div(a, b) if var_type == "int" else a / b
    else:
        raise ValueError(f"Unknown operator {op!r}")
 
 
-   # Render according to variable type
+   return _render(var_type, res)
+
+
+def _render(var_type: str, res):
+   """Convert a value to the statement's type and return (numeric_value, rendered_string)."""
    if var_type == "int":
        # mimic C-like truncation for int
        res_int = int(res)
@@ -95,13 +106,141 @@ def _compute(var_type: str, op: str, left, right):
        return res_float, f"{res_float:.12g}"
 
 
+def format_answer(identifier: str, var_type: str, value: Any) -> str:
+   """Render a computed value as "identifier=answer;"."""
+   _, rendered = _render(var_type, value)
+   return f"{identifier}={rendered};"
+
+
 # ----------------------------------------------------------------------
-# Assembly code generation
+# Assembly code generation: linear-scan register allocation over TAC
 # ----------------------------------------------------------------------
-def test_assembler(ast: Dict[str, Any]) -> List[str]:
+DEFAULT_REGISTERS = 8
+
+_MNEMONIC_KEYS = {ADD: "add", SUB: "sub", MUL: "mul", DIV: "div"}
+_REGISTER_NAME = re.compile(r"R\d+$")
+
+
+class AllocationStats(NamedTuple):
+   registers: int        # size of the register file
+   registers_used: int   # distinct registers the statement touched
+   spills: int           # temporaries stored to a spill slot
+   reloads: int          # loads back from a spill slot
+
+
+def _lower_quads(quads: Quads, registers: int) -> Tuple[List[str], AllocationStats]:
+   """
+   Lower the quadruples of one statement to assembly over a register file of
+   `registers` registers (R1 .. Rn), allocating temporaries by linear scan.
+
+   A temporary's interval runs from its definition to its last use. The
+   result of "t = a op b" goes into a's register when a ends there, else into
+   the lowest free register; when none is free, the live temporary whose
+   interval ends furthest away is spilled (ST $k, Rn) and its register
+   reused. Spilled values are reloaded (LD Rn, $k) only when they are the
+   left operand; as a right operand the spill slot is used directly.
+   Variables named like a register are written as [R1] to keep them apart.
+   """
+   count = len(quads)
+   last_use: Dict[int, int] = {}
+   for i in range(count):
+       for source in (quads.src1[i], quads.src2[i]):
+           if source != NONE and source & 3 == TEMP:
+               last_use[source] = i
+
+   free = list(range(1, registers + 1))          # heap of free register numbers
+   holder: Dict[int, int] = {}                   # register -> temporary in it
+   location: Dict[int, str] = {}                 # temporary -> "Rn" or "$k"
+   free_slots: List[str] = []
+   slots = NameAllocator("$")
+   used = set()
+   spills = reloads = 0
+   code: List[str] = []
+
+   def text(operand: int) -> str:
+       kind = operand & 3
+       if kind == TEMP:
+           return location[operand]
+       name = quads.operand_text(operand)
+       return f"[{name}]" if kind == NAME and _REGISTER_NAME.match(name) else name
+
+   def allocate(left: int, right: int) -> int:
+       nonlocal spills
+       if free:
+           number = heapq.heappop(free)
+       else:
+           # Spill the temporary used furthest in the future, preferring one
+           # that is not an operand of the current instruction
+           candidates = [n for n in holder if holder[n] not in (left, right)] or list(holder)
+           number = max(candidates, key=lambda n: last_use[holder[n]])
+           victim = holder.pop(number)
+           slot = free_slots.pop() if free_slots else slots.new()
+           code.append(f"{ops['store']} {slot}, R{number}")
+           location[victim] = slot
+           spills += 1
+       used.add(number)
+       return number
+
+   def release(operand: int, i: int) -> None:
+       if operand & 3 != TEMP or last_use[operand] != i or operand not in location:
+           return
+       where = location.pop(operand)
+       if where[0] == "R":
+           del holder[int(where[1:])]
+           heapq.heappush(free, int(where[1:]))
+       else:
+           free_slots.append(where)
+
+   for i in range(count):
+       ops = _OP_MAP[TYPE_NAMES[quads.types[i]]]
+       opcode, dest, left, right = quads.opcodes[i], quads.dest[i], quads.src1[i], quads.src2[i]
+
+       binary = opcode != COPY and opcode != NEG_OP
+       where = location.get(left) if left & 3 == TEMP else None
+       if where is not None and where[0] == "R" and last_use[left] == i:
+           number = int(where[1:])                  # left ends here: compute in place
+           operand = text(right) if binary else None
+           del holder[number]
+           del location[left]
+       else:
+           number = allocate(left, right)
+           source = text(left)
+           if source[0] == "$":
+               reloads += 1
+           code.append(f"{ops['load']} R{number}, {source}")
+           operand = text(right) if binary else None
+
+       if opcode == NEG_OP:
+           code.append(f"{ops['neg']} R{number}")
+       elif binary:
+           code.append(f"{ops[_MNEMONIC_KEYS[opcode]]} R{number}, {operand}")
+       release(left, i)
+       release(right, i)
+
+       if dest & 3 == NAME:
+           code.append(f"{ops['store']} {text(dest)}, R{number}")
+           heapq.heappush(free, number)
+       elif dest in last_use:
+           holder[number] = dest
+           location[dest] = f"R{number}"
+       else:
+           heapq.heappush(free, number)             # result never used
+
+   return code, AllocationStats(registers, len(used), spills, reloads)
+
+
+def test_assembler(ast: Union[Statement, Dict[str, Any]], verbose: bool = True,
+                   diagnostics: Optional[List[Diagnostic]] = None,
+                   symbols: Optional[SymbolTable] = None,
+                   code: Optional[List[str]] = None,
+                   registers: int = DEFAULT_REGISTERS,
+                   stats: Optional[List[AllocationStats]] = None,
+                   optimize: bool = True,
+                   peephole_stats: Optional[List[PeepholeStats]] = None) -> List[str]:
    """
-   Generate assembly code from AST and print the final result as: identifier=answer;
-   AST format:
+   Generate assembly code for a statement and print the final result as:
+   identifier=answer;
+   AST format (a SyntaxTree.Statement, or this dict):
    {
        "type": "int" or "double",
        "identifier": "y",
@@ -111,48 +250,63 @@ def test_assembler(ast: Dict[str, Any]) -> List[str]:
            "right": 3
        }
    }
+   The statement's three-address `code` is lowered instruction by
+   instruction (the Compiler passes the optimized TAC; without it the TAC is
+   generated from the AST). Nested temporaries live in registers of a
+   `registers`-sized file, e.g. (1 + 2) * (3 + 4):
+       LD R1, 1 / ADD R1, 2 / LD R2, 3 / ADD R2, 4 / MUL R1, R2 / ST z, R1
+   If `stats` is a list, the statement's AllocationStats is appended to it.
+   With `optimize` the result goes through Peephole.peephole(), which
+   appends its PeepholeStats to `peephole_stats` if that is a list.
    """
-   print("[ASSEMBLER]")
+   if verbose:
+       print("[ASSEMBLER]")
 
 
-   if not ast or "expression" not in ast:
-       print("Assembly error: invalid AST.")
+   try:
+       ast = from_dict(ast)
+   except ValueError:
+       report(diagnostics, verbose, "assembler", "Assembly", "invalid AST.")
        return []
 
 
-   var_type = ast.get("type", "int")
-   expr = ast["expression"]
-   op = expr["op"]
-   left = expr["left"]
-   right = expr["right"]
-   identifier = ast["identifier"]
+   var_type = ast.type
 
 
    if var_type not in _OP_MAP:
-       print(f"Assembly error: unsupported type '{var_type}'.")
+       report(diagnostics, verbose, "assembler", "Assembly", f"unsupported type '{var_type}'.")
        return []
 
 
-   ops = _OP_MAP[var_type]
-   reg = _new_reg()
+   if registers < 1:
+       raise ValueError("the register file needs at least one register")
+   if code is None:
+       code = test_intermediate(ast, verbose=False)
+   quads = Quads()
+   quads.add_tac(code, var_type)
+   code, allocation = _lower_quads(quads, registers)
+   if stats is not None:
+       stats.append(allocation)
+   if optimize:
+       code = peephole(code, peephole_stats)
 
 
-   # Generate pseudo-assembly
-   code = [
-       f"{ops['load']} {reg}, {left}",
-       f"{ops[op_to_mnemonic(op)]} {reg}, {right}",
-       f"{ops['store']} {identifier}, {reg}"
-   ]
-
+   if verbose:
+       # Print assembly
+       for line in code:
+           print(line)
 
-   # Print assembly
-   for line in code:
-       print(line)
 
-
-   # Compute and print final result using the *user's* identifier
-   _, rendered = _compute(var_type, op, left, right)
-   print(f"\nAnswer: {identifier}={rendered};\n")
+       # Run the assembly on the VM and print the result using the *user's* identifier
+       memory = symbols.values if symbols is not None else None
+       variables = {var.name: memory[var.slot] for var in iter_variables(ast.expression)} \
+           if memory is not None else None
+       try:
+           value = execute(code, variables)[ast.identifier]
+       except ZeroDivisionError:
+           report(diagnostics, verbose, "assembler", "Assembly", "division by zero.")
+           return []
+       print(f"\nAnswer: {format_answer(ast.identifier, ast.type, value)}\n")
 
 
    return code
@@ -165,11 +319,6 @@ def test_assembler_suite():
    print("===== Running Assembler Test Suite =====\n")
 
 
-   # Reset register counter for predictable tests
-   global _register_counter
-   _register_counter = 1
-
-
    tests = [
        {
            "name": "Integer addition",
@@ -187,7 +336,21 @@ def test_assembler_suite():
                "identifier": "area",
                "expression": {"op": "*", "left": 2.5, "right": 5.0}
            },
-           "expected": ["LDF R2, 2.5", "MULF R2, 5.0", "STF area, R2"]
+           "expected": ["LDF R1, 2.5", "MULF R1, 5.0", "STF area, R1"]
+       },
+       {
+           "name": "Nested expression with unary minus",
+           "input": {
+               "type": "int",
+               "identifier": "z",
+               "expression": {
+                   "op": "*",
+                   "left": {"op": "+", "left": 1, "right": 2},
+                   "right": {"op": "neg", "operand": {"op": "-", "left": 3, "right": 4}}
+               }
+           },
+           "expected": ["LD R1, 1", "ADD R1, 2", "LD R2, 3", "SUB R2, 4", "NEG R2",
+                        "MUL R1, R2", "ST z, R1"]
        }
    ]
 
@@ -205,7 +368,27 @@ def test_assembler_suite():
            print("Got:", result, "\n")
 
 
-   print(f"Summary: {passed}/{len(tests)} tests passed.\n")
+   # Register pressure beyond the register file spills to $k slots
+   print("--- Spill and reload with two registers ---")
+   stats = []
+   result = test_assembler({
+       "type": "int",
+       "identifier": "z",
+       "expression": {"op": "*", "left": {"op": "+", "left": 1, "right": 2},
+                      "right": {"op": "*", "left": {"op": "+", "left": 3, "right": 4},
+                                "right": {"op": "+", "left": 5, "right": 6}}}
+   }, verbose=False, registers=2, stats=stats)
+   expected = ["LD R1, 1", "ADD R1, 2", "LD R2, 3", "ADD R2, 4", "ST $1, R1", "LD R1, 5",
+               "ADD R1, 6", "MUL R2, R1", "LD R1, $1", "MUL R1, R2", "ST z, R1"]
+   if result == expected and stats == [AllocationStats(2, 2, 1, 1)]:
+       print("PASS\n")
+       passed += 1
+   else:
+       print("FAIL")
+       print("Expected:", expected)
+       print("Got:", result, stats, "\n")
+
+   print(f"Summary: {passed}/{len(tests) + 1} tests passed.\n")
 
 
 # ----------------------------------------------------------------------
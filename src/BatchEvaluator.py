@@ -0,0 +1,276 @@
+"""
+===== BatchEvaluator.py =====
+
+Vectorized evaluation of large batches of independent statements that
+share the template
+
+    int y = A op B;         double d = A op B;
+
+and differ only in their identifier and literals. Requires NumPy.
+
+evaluate_batch() matches every statement against the template, groups the
+rows by (type, op) and puts their operands into typed arrays (int64 for
+int, float64 for double). Each group is then computed with one vectorized
+operation and the results are scattered back into input order:
+
+    batch = evaluate_batch(["int y = 7 / 2;", "double d = 1.0 / 4.0;", "int z = 1 / 0;"])
+    batch.values        -> [3, 0.25, None]
+    batch.answers()     -> ["y=3;", "d=0.25;", None]
+    batch.errors[2]     -> Diagnostic("semantic", None, "division by zero.")
+
+Results match Assembler._compute row for row: int division truncates
+toward zero like C, and a zero divisor is reported on that row only (the
+arrays are masked, nothing is re-run in Python). Int operands are only
+vectorized below 2**31, where int64 cannot overflow and int(a / b) is exact
+truncating division.
+
+Rows that do not fit the template (variables, parentheses, mixed types,
+larger or non-finite literals, syntax errors) are compiled normally with
+compile_statement(), so every row gets the same result and diagnostics it
+would get on its own.
+"""
+
+import math
+import random
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from Assembler import _compute
+from Compiler import compile_statement
+from Diagnostics import Diagnostic
+from LexicalAnalyzer import _KEYWORDS
+
+_TEMPLATE = re.compile(
+    r"\s*(int|double)\s+([A-Za-z][A-Za-z0-9]*)\s*=\s*"
+    r"(\d+(?:\.\d+)?)\s*([-+*/])\s*(\d+(?:\.\d+)?)\s*;\s*", re.ASCII)
+
+_INT_LIMIT = 2 ** 31          # |operand| bound for exact int64 evaluation
+
+
+def parse_template(source: str) -> Optional[Tuple[str, str, str, Any, Any]]:
+    """(type, identifier, op, A, B) if `source` is a well-typed template statement, else None."""
+    match = _TEMPLATE.fullmatch(source)
+    if match is None:
+        return None
+    var_type, identifier, left, op, right = match.groups()
+    if identifier in _KEYWORDS:
+        return None
+    is_double = var_type == "double"
+    if ("." in left) != is_double or ("." in right) != is_double:
+        return None                             # mixed types: a semantic error
+    if is_double:
+        a, b = float(left), float(right)
+        if not (math.isfinite(a) and math.isfinite(b)):
+            return None                         # out of range: a semantic error
+        return var_type, identifier, op, a, b
+    a, b = int(left), int(right)
+    if a >= _INT_LIMIT or b >= _INT_LIMIT:
+        return None
+    return var_type, identifier, op, a, b
+
+
+class BatchResult:
+    """Per-row values and errors of a batch, in input order."""
+
+    __slots__ = ("identifiers", "types", "values", "errors", "vectorized")
+
+    def __init__(self, size: int):
+        self.identifiers: List[Optional[str]] = [None] * size
+        self.types: List[Optional[str]] = [None] * size
+        self.values: List[Any] = [None] * size
+        self.errors: List[Optional[Diagnostic]] = [None] * size
+        self.vectorized = 0                  # rows computed by the array path
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def failures(self) -> int:
+        return sum(error is not None for error in self.errors)
+
+    def answer(self, row: int) -> Optional[str]:
+        """Rendered answer of a row, e.g. "y=7;", or None if it failed."""
+        if self.errors[row] is not None:
+            return None
+        value = self.values[row]
+        rendered = str(value) if self.types[row] == "int" else f"{value:.12g}"
+        return f"{self.identifiers[row]}={rendered};"
+
+    def answers(self) -> List[Optional[str]]:
+        return [self.answer(row) for row in range(len(self.values))]
+
+# ----------------------------------------------------------------------
+# Vectorized kernels
+# ----------------------------------------------------------------------
+def _int_kernel(op: str, a: np.ndarray, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(result, failed) for int64 operands; division truncates toward zero."""
+    failed = np.zeros(len(a), dtype=bool)
+    if op == "+":
+        return a + b, failed
+    if op == "-":
+        return a - b, failed
+    if op == "*":
+        return a * b, failed
+    failed = b == 0
+    divisor = np.where(failed, 1, b)
+    quotient = a // divisor
+    # floor -> truncation: step back toward zero where the signs differ and it is inexact
+    quotient += (quotient < 0) & (quotient * divisor != a)
+    return quotient, failed
+
+
+def _double_kernel(op: str, a: np.ndarray, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(result, failed) for float64 operands; division by 0.0 fails like Python."""
+    failed = np.zeros(len(a), dtype=bool)
+    with np.errstate(all="ignore"):             # overflow to inf / nan as Python floats do
+        if op == "+":
+            return a + b, failed
+        if op == "-":
+            return a - b, failed
+        if op == "*":
+            return a * b, failed
+        failed = b == 0.0
+        return a / np.where(failed, 1.0, b), failed
+
+
+_KERNELS = {"int": (np.int64, _int_kernel), "double": (np.float64, _double_kernel)}
+
+# ----------------------------------------------------------------------
+# Batch evaluation
+# ----------------------------------------------------------------------
+def evaluate_batch(sources: Sequence[str]) -> BatchResult:
+    """Evaluate independent statements; template rows are computed per (type, op) group."""
+    result = BatchResult(len(sources))
+    groups: Dict[Tuple[str, str], Tuple[List[int], List[Any], List[Any]]] = {}
+
+    for row, source in enumerate(sources):
+        parsed = parse_template(source)
+        if parsed is None:
+            _compile_row(result, row, source)
+            continue
+        var_type, identifier, op, a, b = parsed
+        result.identifiers[row] = identifier
+        result.types[row] = var_type
+        rows, left, right = groups.setdefault((var_type, op), ([], [], []))
+        rows.append(row)
+        left.append(a)
+        right.append(b)
+
+    division_by_zero = Diagnostic("semantic", None, "division by zero.")
+    values, errors = result.values, result.errors
+    for (var_type, op), (rows, left, right) in groups.items():
+        dtype, kernel = _KERNELS[var_type]
+        computed, failed = kernel(op, np.array(left, dtype=dtype), np.array(right, dtype=dtype))
+        for row, value in zip(rows, computed.tolist()):
+            values[row] = value
+        for index in np.flatnonzero(failed).tolist():
+            values[rows[index]] = None
+            errors[rows[index]] = division_by_zero
+        result.vectorized += len(rows)
+    return result
+
+
+def _compile_row(result: BatchResult, row: int, source: str) -> None:
+    """Fill one row from the regular pipeline."""
+    compiled = compile_statement(source)
+    if compiled.ast is not None:
+        result.identifiers[row] = compiled.ast.identifier
+        result.types[row] = compiled.ast.type
+    if compiled.ok:
+        result.values[row] = compiled.value
+    else:
+        result.errors[row] = compiled.diagnostics[0]
+
+# ----------------------------------------------------------------------
+# Test Suite for the batch evaluator
+# ----------------------------------------------------------------------
+def test_batch_evaluator_suite():
+    print("===== Running Batch Evaluator Test Suite =====\n")
+
+    tests = [
+        {
+            "name": "Groups by type and operator",
+            "input": ["int y = 4 + 3;", "double d = 1.5 * 2.0;", "int z = 9 - 12;", "int w = 2 * 8;"],
+            "expected": ["y=7;", "d=3;", "z=-3;", "w=16;"]
+        },
+        {
+            "name": "Int division truncates; double does not",
+            "input": ["int q = 7 / 2;", "int r = 1 / 3;", "double h = 7.0 / 2.0;"],
+            "expected": ["q=3;", "r=0;", "h=3.5;"]
+        },
+        {
+            "name": "Division by zero fails only its row",
+            "input": ["int a = 1 / 0;", "int b = 8 / 4;", "double c = 1.0 / 0.0;"],
+            "expected": [None, "b=2;", None]
+        },
+        {
+            "name": "Other statements go through the compiler",
+            "input": ["int v = (2 + 3) * 4;", "int m = 1.5 + 2;", "int x = 4 +;",
+                      "int big = 3000000000 * 3000000000;", "double o = " + "9" * 400 + ".0 * 2.0;"],
+            "expected": ["v=20;", None, None, "big=9000000000000000000;", None]
+        },
+    ]
+
+    passed = 0
+    for case in tests:
+        print(f"--- {case['name']} ---")
+        batch = evaluate_batch(case["input"])
+        result = batch.answers()
+        if result == case["expected"]:
+            print("PASS\n")
+            passed += 1
+        else:
+            print("FAIL")
+            print("Expected:", case["expected"])
+            print("Got:", result, "\n")
+
+    print("--- Diagnostics match compile_statement ---")
+    sources = ["int a = 1 / 0;", "int m = 1.5 + 2;"]
+    batch = evaluate_batch(sources)
+    expected = [compile_statement(source).diagnostics[0] for source in sources]
+    if batch.errors == expected and batch.vectorized == 1:
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL")
+        print("Expected:", expected)
+        print("Got:", batch.errors, "\n")
+
+    # Random rows against Assembler._compute
+    print("--- Random rows match Assembler._compute ---")
+    rng = random.Random(18)
+    sources, expected = [], []
+    for row in range(5000):
+        op = rng.choice("+-*/")
+        if rng.random() < 0.5:
+            a, b = rng.randrange(_INT_LIMIT), rng.choice([0, 1, rng.randrange(_INT_LIMIT)])
+            var_type, text = "int", f"{a} {op} {b}"
+        else:
+            a, b = round(rng.uniform(0, 1e6), 3), rng.choice([0.0, round(rng.uniform(0, 10), 2)])
+            var_type, text = "double", f"{a!r} {op} {b!r}"
+        sources.append(f"{var_type} v{row} = {text};")
+        try:
+            expected.append(_compute(var_type, op, a, b)[0])
+        except ZeroDivisionError:
+            expected.append(None)
+    batch = evaluate_batch(sources)
+    mismatches = [row for row in range(len(sources))
+                  if batch.values[row] != expected[row]
+                  or type(batch.values[row]) is not type(expected[row])]
+    if not mismatches and batch.vectorized == len(sources):
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL")
+        print("Mismatched rows:", [sources[row] for row in mismatches[:5]], "\n")
+
+    print(f"Summary: {passed}/{len(tests) + 2} tests passed.\n")
+
+
+# ----------------------------------------------------------------------
+# Run suite if executed directly
+# ----------------------------------------------------------------------
+if __name__ == "__main__":
+    test_batch_evaluator_suite()
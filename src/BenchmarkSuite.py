@@ -0,0 +1,383 @@
+"""
+===== BenchmarkSuite.py =====
+
+Regression benchmarks for the whole pipeline on synthetic workloads.
+
+generate_workload() builds a program of `size` statements of one kind:
+
+    short    many short statements:  int v3 = v1 + 7;
+    nested   long nested expressions, alternately left- and right-nested
+    mixed    int and double statements interleaved
+
+A fraction `error_rate` of the statements is replaced by a broken one
+(lexical, syntax, undeclared variable or mixed types, in turn), and valid
+statements only read variables that earlier valid statements declared, so
+every injected error fails exactly one statement. The same seed always
+gives the same program, and the valid statements do not depend on the
+error rate, so rates can be compared on the same workload.
+
+run_workloads() compiles each workload with compile_program() and a
+Metrics object: end-to-end wall time plus the time of every phase, best
+of `rounds` runs. The results are a JSON document:
+
+    {"meta": {"python": ..., "compiler": ..., "rounds": ...},
+     "results": {"short/10000/0.01": {"statements": 10000, "failures": 100,
+                                      "seconds": 1.9, "stmts_per_sec": 5263,
+                                      "phases": {"lexical": 0.21, ...}}, ...}}
+
+compare_results() checks a run against a saved baseline and returns one
+Regression per workload and timer (end-to-end or phase) that got slower
+than `threshold`. Timers below NOISE_FLOOR seconds in the baseline are
+not compared.
+
+Usage:
+    python BenchmarkSuite.py --output baseline.json
+    python BenchmarkSuite.py --baseline baseline.json --threshold 0.10
+    python BenchmarkSuite.py --self-test
+
+The second form exits with status 1 if anything regressed.
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from typing import Any, Dict, List, NamedTuple, Sequence
+
+from CompileCache import compiler_version
+from Compiler import compile_program
+from Metrics import TIMED_PHASES, Metrics
+
+KINDS = ("short", "nested", "mixed")
+DEFAULT_SIZES = (1_000, 10_000)
+DEFAULT_ERROR_RATES = (0.0, 0.01)
+DEFAULT_THRESHOLD = 0.10
+NESTED_DEPTH = 24
+NOISE_FLOOR = 0.05              # seconds; shorter baseline timers are not compared
+
+_OPERATORS = "+-*/"
+
+
+class Workload(NamedTuple):
+    """A generated program and the number of statements made to fail."""
+    kind: str
+    statements: List[str]
+    errors: int
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.statements) + "\n"
+
+
+class Regression(NamedTuple):
+    """A timer that got slower than the threshold allows."""
+    workload: str
+    timer: str                  # "total" or a phase name
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        return self.current / self.baseline - 1
+
+# ----------------------------------------------------------------------
+# Workload generation
+# ----------------------------------------------------------------------
+def _literal(rng: random.Random, var_type: str) -> str:
+    if var_type == "int":
+        return str(rng.randint(1, 99))
+    return f"{rng.randint(1, 99)}.{rng.randint(0, 9)}"
+
+
+def _operand(rng: random.Random, var_type: str, names: List[str]) -> str:
+    """A literal, or a variable declared earlier with this type."""
+    if names and rng.random() < 0.5:
+        return rng.choice(names[-64:])
+    return _literal(rng, var_type)
+
+
+def _short_expression(rng: random.Random, var_type: str, names: List[str]) -> str:
+    op = rng.choice(_OPERATORS)
+    if op in "*/":
+        # Variables only on the left, so values stay small and divisors non-zero
+        return f"{_operand(rng, var_type, names)} {op} {_literal(rng, var_type)}"
+    return f"{_operand(rng, var_type, names)} {op} {_operand(rng, var_type, names)}"
+
+
+def _nested_expression(rng: random.Random, var_type: str, names: List[str],
+                       depth: int, left: bool) -> str:
+    expression = _operand(rng, var_type, names)
+    for _ in range(depth):
+        operand = _literal(rng, var_type)
+        if left:
+            expression = f"({expression} {rng.choice(_OPERATORS)} {operand})"
+        else:
+            # No division: the nested part would be the divisor and may be zero
+            expression = f"{operand} {rng.choice(_OPERATORS[:3])} ({expression})"
+    return expression
+
+
+def _broken(index: int, rng: random.Random, var_type: str, error: int) -> str:
+    """A statement that fails in the phase picked by `error` (0-3, cycling)."""
+    a, b = _literal(rng, var_type), _literal(rng, var_type)
+    name = f"v{index}"
+    if error == 0:
+        return f"{var_type} {name} = {a} $ {b};"                 # lexical
+    if error == 1:
+        return f"{var_type} {name} = {a} + ;"                    # syntax
+    if error == 2:
+        return f"{var_type} {name} = undeclared{index} + {b};"   # semantic: not declared
+    other = _literal(rng, "double" if var_type == "int" else "int")
+    return f"{var_type} {name} = {a} + {other};"                 # semantic: mixed types
+
+
+def generate_workload(kind: str, size: int, error_rate: float = 0.0, seed: int = 0,
+                      depth: int = NESTED_DEPTH) -> Workload:
+    """`size` statements of `kind` (see KINDS), with about `error_rate` of them broken."""
+    if kind not in KINDS:
+        raise ValueError(f"unknown workload {kind!r}; expected one of {', '.join(KINDS)}")
+    if not 0.0 <= error_rate <= 1.0:
+        raise ValueError("error_rate must be between 0 and 1")
+    # Errors are drawn from their own generator, so the workloads of every
+    # error rate share the same valid statements
+    rng = random.Random(f"{kind}/{size}/{seed}")
+    error_rng = random.Random(f"{error_rate}/{seed}")
+    declared: Dict[str, List[str]] = {"int": [], "double": []}
+    statements: List[str] = []
+    errors = 0
+    for index in range(size):
+        var_type = rng.choice(("int", "double")) if kind == "mixed" else "int"
+        names = declared[var_type]
+        if kind == "nested":
+            expression = _nested_expression(rng, var_type, names, depth, index % 2 == 0)
+        else:
+            expression = _short_expression(rng, var_type, names)
+        if error_rng.random() < error_rate:
+            statements.append(_broken(index, error_rng, var_type, errors % 4))
+            errors += 1
+            continue
+        statements.append(f"{var_type} v{index} = {expression};")
+        names.append(f"v{index}")
+    return Workload(kind, statements, errors)
+
+# ----------------------------------------------------------------------
+# Running and comparing
+# ----------------------------------------------------------------------
+def workload_name(kind: str, size: int, error_rate: float) -> str:
+    return f"{kind}/{size}/{error_rate:g}"
+
+
+def time_workload(workload: Workload, rounds: int = 3) -> Dict[str, Any]:
+    """
+    End-to-end and per-phase times of compiling the workload as one program;
+    each timer is the best of `rounds` runs.
+    """
+    text = workload.text
+    row: Dict[str, Any] = {"seconds": float("inf"), "phases": dict.fromkeys(TIMED_PHASES, float("inf"))}
+    for _ in range(rounds):
+        metrics = Metrics()
+        start = time.perf_counter()
+        program = compile_program(text, metrics=metrics)
+        elapsed = time.perf_counter() - start
+        row["statements"] = len(program.statements)
+        row["failures"] = sum(not result.ok for result in program.statements)
+        row["seconds"] = min(row["seconds"], elapsed)
+        for phase, seconds in metrics.wall.items():
+            row["phases"][phase] = min(row["phases"][phase], seconds)
+    row["stmts_per_sec"] = row["statements"] / row["seconds"] if row["seconds"] > 0 else float("inf")
+    return row
+
+
+def run_workloads(kinds: Sequence[str] = KINDS, sizes: Sequence[int] = DEFAULT_SIZES,
+                  error_rates: Sequence[float] = DEFAULT_ERROR_RATES, rounds: int = 3,
+                  seed: int = 0, report=None) -> Dict[str, Any]:
+    """Time every (kind, size, error rate) workload; `report(name, row)` is called after each."""
+    results: Dict[str, Any] = {}
+    for kind in kinds:
+        for size in sizes:
+            for error_rate in error_rates:
+                name = workload_name(kind, size, error_rate)
+                results[name] = time_workload(generate_workload(kind, size, error_rate, seed),
+                                              rounds)
+                if report is not None:
+                    report(name, results[name])
+    meta = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "compiler": compiler_version(),
+        "rounds": rounds,
+        "seed": seed,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    return {"meta": meta, "results": results}
+
+
+def save_results(results: Dict[str, Any], path: str) -> None:
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(results, handle, indent=2)
+        handle.write("\n")
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any],
+                    threshold: float = DEFAULT_THRESHOLD,
+                    noise_floor: float = NOISE_FLOOR) -> List[Regression]:
+    """
+    Timers (end-to-end and per phase) of workloads present in both runs
+    that are more than `threshold` (0.10 = 10%) slower than the baseline.
+    """
+    regressions = []
+    for name, row in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        timers = [("total", base["seconds"], row["seconds"])]
+        timers += [(phase, base["phases"].get(phase, 0.0), row["phases"].get(phase, 0.0))
+                   for phase in TIMED_PHASES]
+        for timer, before, after in timers:
+            if before >= noise_floor and after > before * (1 + threshold):
+                regressions.append(Regression(name, timer, before, after))
+    return regressions
+
+# ----------------------------------------------------------------------
+# Command line
+# ----------------------------------------------------------------------
+def _print_row(name: str, row: Dict[str, Any]) -> None:
+    phases = "".join(f"{row['phases'][phase] * 1000:>9.1f}" for phase in TIMED_PHASES)
+    print(f"{name:<22}{row['failures']:>7}{row['seconds']:>9.3f}{row['stmts_per_sec']:>11.0f}{phases}")
+
+
+def _print_header() -> None:
+    phases = "".join(f"{phase[:8]:>9}" for phase in TIMED_PHASES)
+    print(f"{'workload':<22}{'failed':>7}{'seconds':>9}{'stmts/sec':>11}{phases}")
+    print(f"{'':<49}{'(phase wall time, ms)':>{9 * len(TIMED_PHASES)}}")
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Time the compiler on synthetic workloads.")
+    parser.add_argument("--kinds", nargs="+", choices=KINDS, default=list(KINDS),
+                        help="workloads to run")
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES),
+                        help="statements per workload")
+    parser.add_argument("--error-rates", nargs="+", type=float, default=list(DEFAULT_ERROR_RATES),
+                        help="fraction of broken statements")
+    parser.add_argument("--rounds", type=int, default=3, help="runs per workload; the best counts")
+    parser.add_argument("--seed", type=int, default=0, help="workload generator seed")
+    parser.add_argument("--output", metavar="FILE", help="write the results as JSON to FILE")
+    parser.add_argument("--baseline", metavar="FILE", help="compare against results saved in FILE")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown that counts as a regression (0.10 = 10%%)")
+    parser.add_argument("--self-test", action="store_true", help="run the test suite and exit")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    if args.self_test:
+        test_benchmark_suite()
+        return 0
+    baseline = load_results(args.baseline) if args.baseline else None
+
+    _print_header()
+    results = run_workloads(args.kinds, args.sizes, args.error_rates, args.rounds, args.seed,
+                            report=_print_row)
+    if args.output:
+        save_results(results, args.output)
+        print(f"\nResults written to {args.output}")
+    if baseline is None:
+        return 0
+
+    print(f"\nBaseline compiler {baseline['meta'].get('compiler')}, "
+          f"current compiler {results['meta']['compiler']}.")
+    regressions = compare_results(results, baseline, args.threshold)
+    if not regressions:
+        print(f"\nNo regressions above {args.threshold:.0%} against {args.baseline}.")
+        return 0
+    print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%} against {args.baseline}:")
+    for regression in regressions:
+        print(f"  {regression.workload:<22}{regression.timer:<14}"
+              f"{regression.baseline:>9.4f}s -> {regression.current:.4f}s  (+{regression.change:.0%})")
+    return 1
+
+# ----------------------------------------------------------------------
+# Test Suite for the benchmark suite
+# ----------------------------------------------------------------------
+def test_benchmark_suite():
+    print("===== Running Benchmark Suite Test Suite =====\n")
+
+    failed = {}
+    for kind in KINDS:
+        workload = generate_workload(kind, 400, 0.05, depth=8)
+        program = compile_program(workload.text)
+        failed[kind] = (len(program.statements),
+                        sum(not result.ok for result in program.statements) == workload.errors > 0)
+    mixed = compile_program(generate_workload("mixed", 300).text)
+    nested = generate_workload("nested", 2, depth=10).statements
+
+    baseline = {"results": {"short/10/0": {"seconds": 1.0, "phases": {"syntax": 0.5, "lexical": 0.01}}}}
+    current = {"results": {"short/10/0": {"seconds": 1.05, "phases": {"syntax": 0.7, "lexical": 0.04}},
+                           "nested/10/0": {"seconds": 9.0, "phases": {}}}}
+    results = run_workloads(["short"], [50], [0.0, 0.1], rounds=1)
+
+    tests = [
+        {
+            "name": "Same seed, same workload",
+            "result": (generate_workload("mixed", 200, 0.05, seed=3)
+                       == generate_workload("mixed", 200, 0.05, seed=3)),
+            "expected": True
+        },
+        {
+            "name": "Every injected error fails exactly one statement",
+            "result": failed,
+            "expected": {kind: (400, True) for kind in KINDS}
+        },
+        {
+            "name": "Clean mixed workload compiles with both types",
+            "result": (mixed.ok, {result.ast.type for result in mixed.statements}),
+            "expected": (True, {"int", "double"})
+        },
+        {
+            "name": "Nested statements reach the requested depth",
+            "result": [statement.count("(") for statement in nested],
+            "expected": [10, 10]
+        },
+        {
+            "name": "Regressions above the threshold and the noise floor",
+            "result": compare_results(current, baseline, threshold=0.10),
+            "expected": [Regression("short/10/0", "syntax", 0.5, 0.7)]
+        },
+        {
+            "name": "Results round-trip through JSON with every phase",
+            "result": (json.loads(json.dumps(results)) == results, list(results["results"]),
+                       sorted(results["results"]["short/50/0"]["phases"]) == sorted(TIMED_PHASES),
+                       compare_results(results, results)),
+            "expected": (True, ["short/50/0", "short/50/0.1"], True, [])
+        },
+    ]
+
+    passed = 0
+    for case in tests:
+        print(f"--- {case['name']} ---")
+        if case["result"] == case["expected"]:
+            print("PASS\n")
+            passed += 1
+        else:
+            print("FAIL")
+            print("Expected:", case["expected"])
+            print("Got:", case["result"], "\n")
+
+    print(f"Summary: {passed}/{len(tests)} tests passed.\n")
+
+
+# ----------------------------------------------------------------------
+# Run the benchmarks (or the suite) if executed directly
+# ----------------------------------------------------------------------
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,718 @@
+"""
+===== Benchmarks.py =====
+
+Timing harnesses for the compiler. Each benchmark prints a small table and
+returns its numbers as a dict so it can also be driven from other code.
+
+Usage:
+    python Benchmarks.py            # run every benchmark
+    python Benchmarks.py quiet      # run only the named benchmark(s)
+
+Long-running benchmarks (soak, parallel) only run when named explicitly.
+Pipeline regressions against a saved baseline are tracked by
+BenchmarkSuite.py instead.
+"""
+
+import asyncio
+import contextlib
+import cProfile
+import os
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from Compiler import (CompilerSession, compile_batch, compile_file_parallel, compile_program,
+                      compile_statement)
+from Assembler import test_assembler
+from IntermediateCodeGenerator import test_intermediate
+from LexicalAnalyzer import _MASTER, _TOKEN_SPEC, scan
+from Metrics import Metrics, profiler_hook
+from Optimizer import evaluate_ir
+from Peephole import estimate_cycles
+from PythonBackend import compile_tac
+from QuadIR import Quads
+from Server import load
+from SyntaxAnalyzer import test_syntax
+from SyntaxTree import BinOp, Statement, to_dict
+from VM import assemble
+from math_solver import run_statement
+
+# A handful of valid and invalid statements in the shape the REPL accepts
+_SAMPLE_STATEMENTS = [
+    "int y = 4 + 3;",
+    "int z=3*4;",
+    "double t = 4.0 * 3.1;",
+    "double u = 9.2 / 2.0;",
+    "int w = 10 - 7;",
+    "int bad = 4 $ 3;",
+]
+
+# ----------------------------------------------------------------------
+# Helpers
+# ----------------------------------------------------------------------
+def _statements(n: int):
+    """Return n statements cycling through the sample set."""
+    return [_SAMPLE_STATEMENTS[i % len(_SAMPLE_STATEMENTS)] for i in range(n)]
+
+def _rate(count: int, seconds: float) -> float:
+    return count / seconds if seconds > 0 else float("inf")
+
+def _source_of_size(size: int) -> str:
+    """Multi-line source text of roughly `size` characters."""
+    block = "\n".join(_SAMPLE_STATEMENTS[:-1]) + "\n"
+    return block * max(1, size // len(block))
+
+def _human(size: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1000 or unit == "MB":
+            return f"{size:.4g} {unit}"
+        size /= 1000
+
+def _legacy_lexical(text: str):
+    """The original test_lexical loop: master regex, then re-verify every token."""
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        match = _MASTER.match(text, pos)
+        if not match:
+            return tokens
+        if match.lastgroup != "WS":
+            tokens.append((match.lastgroup, match.group()))
+        pos = match.end()
+    misclassified = []
+    for kind, lexeme in tokens:
+        matches = [k for k, pat in _TOKEN_SPEC if re.fullmatch(pat, lexeme)]
+        if kind not in matches:
+            misclassified.append((kind, lexeme))
+    return tokens
+
+# ----------------------------------------------------------------------
+# Quiet library mode vs the printing REPL path
+# ----------------------------------------------------------------------
+def bench_quiet_vs_repl(n: int = 20000):
+    """Statements/sec through compile_statement() vs math_solver.run_statement()."""
+    statements = _statements(n)
+
+    start = time.perf_counter()
+    for src in statements:
+        compile_statement(src)
+    quiet = time.perf_counter() - start
+
+    # The REPL path writes to a real file descriptor so formatting and I/O are paid
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        start = time.perf_counter()
+        for src in statements:
+            run_statement(src)
+        repl = time.perf_counter() - start
+
+    results = {
+        "statements": n,
+        "quiet_stmts_per_sec": _rate(n, quiet),
+        "repl_stmts_per_sec": _rate(n, repl),
+    }
+    print(f"{'mode':<8}{'seconds':>10}{'stmts/sec':>14}")
+    print(f"{'quiet':<8}{quiet:>10.3f}{results['quiet_stmts_per_sec']:>14.0f}")
+    print(f"{'repl':<8}{repl:>10.3f}{results['repl_stmts_per_sec']:>14.0f}")
+    print(f"speedup: {repl / quiet:.2f}x\n")
+    return results
+
+# ----------------------------------------------------------------------
+# Table-driven scanner vs the original regex + re-verification lexer
+# ----------------------------------------------------------------------
+_LEXER_SIZES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+
+def bench_lexer(sizes=_LEXER_SIZES, legacy_limit: int = 10_000_000):
+    """
+    MB/sec of LexicalAnalyzer.scan() vs the original lexer for each input size.
+    The original lexer is skipped above `legacy_limit` characters because it
+    needs several minutes there; pass legacy_limit=None to force it.
+    """
+    results = []
+    print(f"{'size':>10}{'scan MB/s':>12}{'legacy MB/s':>13}{'speedup':>10}")
+    for size in sizes:
+        text = _source_of_size(size)
+        mb = len(text) / 1e6
+
+        start = time.perf_counter()
+        scan(text)
+        new = time.perf_counter() - start
+
+        old = None
+        if legacy_limit is None or len(text) <= legacy_limit:
+            start = time.perf_counter()
+            _legacy_lexical(text)
+            old = time.perf_counter() - start
+
+        row = {"size": len(text), "scan_mb_per_sec": _rate(mb, new),
+               "legacy_mb_per_sec": _rate(mb, old) if old else None}
+        results.append(row)
+        legacy_col = f"{row['legacy_mb_per_sec']:>13.2f}" if old else f"{'skipped':>13}"
+        speedup_col = f"{old / new:>9.2f}x" if old else f"{'-':>10}"
+        print(f"{_human(len(text)):>10}{row['scan_mb_per_sec']:>12.2f}{legacy_col}{speedup_col}")
+    print()
+    return results
+
+# ----------------------------------------------------------------------
+# Expression parser: wide and deep expressions
+# ----------------------------------------------------------------------
+_PARSER_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+def _wide_tokens(operators: int):
+    """int w = 1 + 2 * 3 - 4 / 5 ... ; with `operators` binary operators."""
+    tokens = [("TYPE", "int"), ("IDENT", "w"), ("ASSIGN", "="), ("NUMBER", "1")]
+    ops = "+*-/"
+    for i in range(operators):
+        tokens.append(("OP", ops[i % 4]))
+        tokens.append(("NUMBER", str(i % 9 + 1)))
+    tokens.append(("SEMICOLON", ";"))
+    return tokens
+
+def _deep_tokens(operators: int):
+    """int d = -(1 + -(1 + -(1 + ... ))); nested `operators` levels deep."""
+    tokens = [("TYPE", "int"), ("IDENT", "d"), ("ASSIGN", "=")]
+    tokens += [("OP", "-"), ("LPAREN", "("), ("NUMBER", "1"), ("OP", "+")] * operators
+    tokens.append(("NUMBER", "1"))
+    tokens += [("RPAREN", ")")] * operators
+    tokens.append(("SEMICOLON", ";"))
+    return tokens
+
+def bench_parser(sizes=_PARSER_SIZES):
+    """Tokens/sec of test_syntax on wide and deep expressions; flat rates mean linear time."""
+    results = []
+    print(f"{'shape':<7}{'operators':>11}{'tokens':>10}{'seconds':>10}{'tokens/sec':>13}")
+    for shape, build in (("wide", _wide_tokens), ("deep", _deep_tokens)):
+        for size in sizes:
+            tokens = build(size)
+            start = time.perf_counter()
+            ast = test_syntax(tokens, verbose=False)
+            elapsed = time.perf_counter() - start
+            assert ast, f"{shape} expression with {size} operators failed to parse"
+            row = {"shape": shape, "operators": size, "tokens": len(tokens),
+                   "seconds": elapsed, "tokens_per_sec": _rate(len(tokens), elapsed)}
+            results.append(row)
+            print(f"{shape:<7}{size:>11}{len(tokens):>10}{elapsed:>10.3f}{row['tokens_per_sec']:>13.0f}")
+    print()
+    return results
+
+# ----------------------------------------------------------------------
+# IR generation: wide and deep expressions
+# ----------------------------------------------------------------------
+def bench_ir_gen(sizes=_PARSER_SIZES):
+    """Nodes/sec of test_intermediate on wide and deep trees; flat rates mean linear time."""
+    results = []
+    print(f"{'shape':<7}{'operators':>11}{'TAC lines':>11}{'seconds':>10}{'lines/sec':>12}")
+    for shape, build in (("wide", _wide_tokens), ("deep", _deep_tokens)):
+        for size in sizes:
+            ast = test_syntax(build(size), verbose=False)
+            start = time.perf_counter()
+            code = test_intermediate(ast, verbose=False)
+            elapsed = time.perf_counter() - start
+            row = {"shape": shape, "operators": size, "lines": len(code),
+                   "seconds": elapsed, "lines_per_sec": _rate(len(code), elapsed)}
+            results.append(row)
+            print(f"{shape:<7}{size:>11}{len(code):>11}{elapsed:>10.3f}{row['lines_per_sec']:>12.0f}")
+    print()
+    return results
+
+# ----------------------------------------------------------------------
+# AST memory: slotted nodes vs the original nested dicts
+# ----------------------------------------------------------------------
+def _traced_bytes(build):
+    """Run build() and return (result, bytes it allocated and kept alive)."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, after - before
+
+def bench_ast_memory(sizes=(1_000, 100_000)):
+    """Bytes per AST node (tracemalloc) for SyntaxTree nodes vs dict nodes."""
+    results = []
+    print(f"{'shape':<7}{'nodes':>10}{'slots B/node':>14}{'dict B/node':>13}{'ratio':>8}")
+    for shape, build in (("wide", _wide_tokens), ("deep", _deep_tokens)):
+        for size in sizes:
+            tokens = build(size)
+            ast, node_bytes = _traced_bytes(lambda: test_syntax(tokens, verbose=False))
+            _, dict_bytes = _traced_bytes(lambda: to_dict(ast))
+            nodes = size * 2 if shape == "deep" else size   # deep adds a Neg per level
+            row = {"shape": shape, "nodes": nodes,
+                   "slots_bytes_per_node": node_bytes / nodes,
+                   "dict_bytes_per_node": dict_bytes / nodes}
+            results.append(row)
+            print(f"{shape:<7}{nodes:>10}{row['slots_bytes_per_node']:>14.1f}"
+                  f"{row['dict_bytes_per_node']:>13.1f}{dict_bytes / node_bytes:>7.2f}x")
+    print()
+    return results
+
+# ----------------------------------------------------------------------
+# Multi-statement programs with a shared symbol table
+# ----------------------------------------------------------------------
+def _program_of(statements: int) -> str:
+    """A chain of statements where each one uses the two before it."""
+    lines = ["int v0 = 1;", "int v1 = 2;"]
+    for i in range(2, statements):
+        lines.append(f"int v{i} = (v{i - 1} + v{i - 2}) / 2 + {i % 7};")
+    return "\n".join(lines[:statements])
+
+def bench_program(sizes=(1_000, 10_000, 100_000)):
+    """Statements/sec of compile_program(); a flat rate means linear scaling."""
+    results = []
+    print(f"{'statements':>11}{'seconds':>10}{'stmts/sec':>12}")
+    for size in sizes:
+        text = _program_of(size)
+        start = time.perf_counter()
+        program = compile_program(text)
+        elapsed = time.perf_counter() - start
+        assert program.ok, program.diagnostics[:3]
+        row = {"statements": size, "seconds": elapsed, "stmts_per_sec": _rate(size, elapsed)}
+        results.append(row)
+        print(f"{size:>11}{elapsed:>10.3f}{row['stmts_per_sec']:>12.0f}")
+    print()
+    return results
+
+# ----------------------------------------------------------------------
+# Register allocation: spills under register pressure
+# ----------------------------------------------------------------------
+def _balanced(depth: int, leaf: int = 0):
+    """Full binary tree of + and * with 2**depth leaves; needs depth + 1 registers."""
+    if depth == 0:
+        return leaf % 9 + 1
+    return BinOp("+*"[depth % 2], _balanced(depth - 1, 2 * leaf), _balanced(depth - 1, 2 * leaf + 1))
+
+def bench_registers(depths=(4, 8, 12, 16), registers=(4, 8, 16)):
+    """Spills, reloads and lowering time for balanced trees over several register-file sizes."""
+    results = []
+    print(f"{'depth':>6}{'TAC lines':>11}{'registers':>11}{'used':>6}{'spills':>9}"
+          f"{'reloads':>9}{'asm lines':>11}{'ms':>9}")
+    for depth in depths:
+        ast = Statement("int", "b", _balanced(depth))
+        code = test_intermediate(ast, verbose=False)
+        for count in registers:
+            stats = []
+            start = time.perf_counter()
+            asm = test_assembler(ast, verbose=False, code=code, registers=count, stats=stats)
+            elapsed = time.perf_counter() - start
+            row = {"depth": depth, "tac_lines": len(code), "asm_lines": len(asm),
+                   "seconds": elapsed, **stats[0]._asdict()}
+            results.append(row)
+            print(f"{depth:>6}{len(code):>11}{count:>11}{row['registers_used']:>6}{row['spills']:>9}"
+                  f"{row['reloads']:>9}{len(asm):>11}{elapsed * 1e3:>9.1f}")
+    print()
+    return results
+
+# ----------------------------------------------------------------------
+# Peephole pass: estimated cycles before and after
+# ----------------------------------------------------------------------
+def bench_peephole(sizes=(1_000, 10_000)):
+    """
+    Instruction counts and estimated cycles of a program's assembly without
+    the peephole pass, with it per statement, and across statements.
+    """
+    results = []
+    print(f"{'statements':>11}{'stage':>16}{'instructions':>14}{'cycles':>10}{'ms':>9}")
+    for size in sizes:
+        program = compile_program(_program_of(size))
+        raw = [line for result in program.statements
+               for line in test_assembler(result.ast, verbose=False, code=result.optimized,
+                                          optimize=False)]
+        per_statement = [line for result in program.statements for line in result.asm]
+        start = time.perf_counter()
+        stats = []
+        program.assembly(stats)
+        elapsed = time.perf_counter() - start
+        stages = (("none", len(raw), estimate_cycles(raw), None),
+                  ("per statement", len(per_statement), estimate_cycles(per_statement), None),
+                  ("whole program", stats[0].instructions_after, stats[0].cycles_after, elapsed))
+        for stage, count, cycles, seconds in stages:
+            results.append({"statements": size, "stage": stage, "instructions": count,
+                            "cycles": cycles, "seconds": seconds})
+            timing = f"{seconds * 1e3:>9.1f}" if seconds is not None else f"{'-':>9}"
+            print(f"{size:>11}{stage:>16}{count:>14}{cycles:>10}{timing}")
+    print()
+    return results
+
+# ----------------------------------------------------------------------
+# VM: executing a program's assembly
+# ----------------------------------------------------------------------
+def bench_vm(sizes=(1_000, 10_000, 100_000)):
+    """Instructions/sec of assemble() (encoding) and Program.run() on whole-program assembly."""
+    results = []
+    print(f"{'statements':>11}{'instructions':>14}{'encode ms':>11}{'run ms':>9}{'instr/sec':>12}")
+    for size in sizes:
+        code = compile_program(_program_of(size)).assembly()
+        start = time.perf_counter()
+        vm = assemble(code)
+        encoded = time.perf_counter()
+        vm.run()
+        elapsed = time.perf_counter() - encoded
+        row = {"statements": size, "instructions": len(code), "encode_seconds": encoded - start,
+               "run_seconds": elapsed, "instr_per_sec": _rate(len(code), elapsed)}
+        results.append(row)
+        print(f"{size:>11}{len(code):>14}{row['encode_seconds'] * 1e3:>11.1f}"
+              f"{elapsed * 1e3:>9.1f}{row['instr_per_sec']:>12.0f}")
+    print()
+    return results
+
+# ----------------------------------------------------------------------
+# Repeated evaluation: pipeline, TAC interpreter, VM and Python backend
+# ----------------------------------------------------------------------
+def bench_backends(sizes=(100, 1_000, 10_000), repeats: int = 20):
+    """
+    Evaluations/sec of one compiled program run `repeats` times through each
+    path: the whole pipeline, evaluate_ir() per statement, the VM and the
+    Python backend (compile time reported separately).
+    """
+    results = []
+    print(f"{'statements':>11}{'path':>10}{'setup ms':>10}{'evals/sec':>12}{'vs vm':>8}")
+    for size in sizes:
+        text = _program_of(size)
+        program = compile_program(text)
+        statements = [(result.optimized, result.ast.type) for result in program.statements]
+
+        def interpret():
+            env = {}
+            for code, var_type in statements:
+                name, env[name] = evaluate_ir(code, var_type, env)
+            return env
+
+        start = time.perf_counter()
+        vm = assemble(program.assembly())
+        vm_setup = time.perf_counter() - start
+        start = time.perf_counter()
+        compiled = compile_tac(statements, cache=None)
+        python_setup = time.perf_counter() - start
+        paths = (("pipeline", None, lambda: compile_program(text).bindings(), 1),
+                 ("tac", None, interpret, repeats),
+                 ("vm", vm_setup, vm.run, repeats),
+                 ("python", python_setup, compiled, repeats))
+
+        rates = {}
+        for path, setup, run, count in paths:
+            start = time.perf_counter()
+            for _ in range(count):
+                run()
+            rates[path] = _rate(count, time.perf_counter() - start)
+        for path, setup, _, _ in paths:
+            row = {"statements": size, "path": path, "setup_seconds": setup,
+                   "evals_per_sec": rates[path], "speedup_vs_vm": rates[path] / rates["vm"]}
+            results.append(row)
+            timing = f"{setup * 1e3:>10.1f}" if setup is not None else f"{'-':>10}"
+            print(f"{size:>11}{path:>10}{timing}{rates[path]:>12.1f}{row['speedup_vs_vm']:>7.2f}x")
+    print()
+    return results
+
+# ----------------------------------------------------------------------
+# Vectorized batch evaluation of template statements
+# ----------------------------------------------------------------------
+def _template_statements(n: int):
+    """`n` statements of the form "int y = A op B;" / "double d = A op B;"."""
+    ops = "+-*/"
+    return [f"int v{i} = {i % 1000} {ops[i % 4]} {i % 97};" if i % 2 == 0
+            else f"double v{i} = {i % 1000}.5 {ops[i % 4]} {i % 89}.25;" for i in range(n)]
+
+def bench_batch(sizes=(10_000, 100_000, 1_000_000), scalar_limit: int = 20_000):
+    """Rows/sec of evaluate_batch() (NumPy) vs compile_statement() per row."""
+    try:
+        from BatchEvaluator import evaluate_batch   # NumPy is optional
+    except ImportError:
+        print("NumPy is not installed; skipping.\n")
+        return []
+    results = []
+    print(f"{'rows':>10}{'path':>10}{'seconds':>10}{'rows/sec':>12}")
+    for size in sizes:
+        sources = _template_statements(size)
+        start = time.perf_counter()
+        evaluate_batch(sources)
+        elapsed = time.perf_counter() - start
+        rows = [("numpy", size, elapsed)]
+        if size <= scalar_limit:
+            start = time.perf_counter()
+            for source in sources:
+                compile_statement(source)
+            rows.append(("compile", size, time.perf_counter() - start))
+        for path, count, seconds in rows:
+            row = {"rows": count, "path": path, "seconds": seconds, "rows_per_sec": _rate(count, seconds)}
+            results.append(row)
+            print(f"{count:>10}{path:>10}{seconds:>10.3f}{row['rows_per_sec']:>12.0f}")
+    print()
+    return results
+
+# ----------------------------------------------------------------------
+# Quadruple IR: memory per instruction and bytes round trip
+# ----------------------------------------------------------------------
+def _tac_program(instructions: int, per_statement: int = 500):
+    """TAC of enough wide statements to reach `instructions` lines, as (lines, type) pairs."""
+    ast = test_syntax(_wide_tokens(per_statement - 1), verbose=False)
+    return [(test_intermediate(ast, verbose=False), "int")
+            for _ in range(max(1, instructions // per_statement))]
+
+def bench_quad_ir(sizes=(10_000, 100_000, 1_000_000)):
+    """
+    Bytes per instruction (tracemalloc) of TAC as List[str] vs Quads, and the
+    time to serialize Quads to bytes and load them back without copying.
+    """
+    results = []
+    print(f"{'instructions':>13}{'str B/instr':>13}{'quad B/instr':>14}{'ratio':>8}"
+          f"{'to_bytes ms':>13}{'from_bytes ms':>15}")
+    for size in sizes:
+        program, text_bytes = _traced_bytes(lambda: _tac_program(size))
+        count = sum(len(code) for code, _ in program)
+
+        def pack():
+            quads = Quads()
+            for code, var_type in program:
+                quads.add_tac(code, var_type)
+            return quads
+        quads, quad_bytes = _traced_bytes(pack)
+
+        start = time.perf_counter()
+        data = quads.to_bytes()
+        dump = time.perf_counter() - start
+        start = time.perf_counter()
+        loaded = Quads.from_bytes(data)
+        load = time.perf_counter() - start
+        assert len(loaded) == count
+
+        row = {"instructions": count, "str_bytes_per_instr": text_bytes / count,
+               "quad_bytes_per_instr": quad_bytes / count,
+               "to_bytes_ms": dump * 1e3, "from_bytes_ms": load * 1e3}
+        results.append(row)
+        print(f"{count:>13}{row['str_bytes_per_instr']:>13.1f}{row['quad_bytes_per_instr']:>14.1f}"
+              f"{text_bytes / quad_bytes:>7.1f}x{row['to_bytes_ms']:>13.2f}{row['from_bytes_ms']:>15.3f}")
+    print()
+    return results
+
+# ----------------------------------------------------------------------
+# Soak: one long-lived bounded session, memory must stay flat
+# ----------------------------------------------------------------------
+def _max_rss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def bench_soak(compiles: int = 10_000_000, capacity: int = 1024,
+               samples: int = 10, cache_size: int = 1024, max_growth_kb: int = 2048):
+    """
+    Compile `compiles` statements in one session whose symbol table holds at
+    most `capacity` variables. Every statement declares a new name and reads
+    the previous one, so the table evicts on every compile once full. Peak
+    RSS and the session's own memory report are sampled `samples` times;
+    RSS may grow by at most `max_growth_kb` after the first sample.
+    """
+    session = CompilerSession(capacity=capacity, policy="lru", cache_size=cache_size)
+    session.compile("int v0 = 1;")
+    every = max(1, compiles // samples)
+    results = []
+    print(f"{'compiles':>12}{'stmts/sec':>11}{'variables':>11}{'evictions':>11}"
+          f"{'table bytes':>13}{'max RSS KB':>12}")
+    start = time.perf_counter()
+    for i in range(1, compiles + 1):
+        session.compile(f"int v{i} = v{i - 1} / 2 + {i % 5};")
+        if i % every == 0 or i == compiles:
+            usage = session.memory_usage()["symbols"]
+            row = {"compiles": i, "stmts_per_sec": _rate(i, time.perf_counter() - start),
+                   "variables": usage["variables"], "evictions": usage["evictions"],
+                   "table_bytes": usage["bytes"], "max_rss_kb": _max_rss_kb()}
+            results.append(row)
+            print(f"{i:>12}{row['stmts_per_sec']:>11.0f}{row['variables']:>11}"
+                  f"{row['evictions']:>11}{row['table_bytes']:>13}{row['max_rss_kb']:>12}")
+    growth = results[-1]["max_rss_kb"] - results[0]["max_rss_kb"]
+    print(f"RSS growth after first sample: {growth} KB\n")
+    assert growth <= max_growth_kb, f"RSS grew by {growth} KB over {compiles} compiles"
+    return {"samples": results, "rss_growth_kb": growth}
+
+# ----------------------------------------------------------------------
+# Thread-pool batch compiles across thread counts
+# ----------------------------------------------------------------------
+_FREE_THREADED = ("python3.14t", "python3.13t")
+
+def _gil_enabled() -> bool:
+    check = getattr(sys, "_is_gil_enabled", None)
+    return True if check is None else check()
+
+def _free_threaded_python():
+    """Path of a free-threaded CPython on PATH, or None."""
+    for name in _FREE_THREADED:
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+def bench_threads(n: int = 20000, threads=(1, 2, 4, 8), free_threaded: bool = True):
+    """
+    Statements/sec of compile_batch() for each thread count. With the GIL the
+    rate stays roughly flat; on a free-threaded build it should scale. When
+    this interpreter has the GIL and a free-threaded CPython is on PATH, the
+    benchmark is repeated under it.
+    """
+    sources = [f"int v = {i} * ({i % 97} + 1) - {i % 3} / 2;" for i in range(n)]
+    gil = _gil_enabled()
+    print(f"{sys.implementation.name} {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}")
+    results = []
+    base = None
+    print(f"{'threads':>8}{'seconds':>10}{'stmts/sec':>12}{'speedup':>10}")
+    for count in threads:
+        start = time.perf_counter()
+        compile_batch(sources, workers=count)
+        elapsed = time.perf_counter() - start
+        base = base or elapsed
+        row = {"threads": count, "gil": gil, "seconds": elapsed,
+               "stmts_per_sec": _rate(n, elapsed)}
+        results.append(row)
+        print(f"{count:>8}{elapsed:>10.3f}{row['stmts_per_sec']:>12.0f}{base / elapsed:>9.2f}x")
+    print()
+
+    other = _free_threaded_python() if free_threaded and gil else None
+    if other:
+        print(f"--- repeating under {other} ---")
+        subprocess.run([other, os.path.abspath(__file__), "threads"], check=False)
+    elif free_threaded and gil:
+        print("(no free-threaded CPython found on PATH; skipped)\n")
+    return results
+
+# ----------------------------------------------------------------------
+# Process pool: scaling with worker count on a large file
+# ----------------------------------------------------------------------
+def _write_statements(path: str, n: int, block: int = 100_000) -> None:
+    """Write `n` synthetic statements to `path`, one per line, in blocks."""
+    with open(path, "w", encoding="utf-8") as handle:
+        for first in range(0, n, block):
+            handle.write("".join(f"int v{i} = {i % 1000} * ({i % 97} + 1) - {i % 3} / 2;\n"
+                                 for i in range(first, min(n, first + block))))
+
+def bench_parallel(n: int = 10_000_000, workers=None, chunk_size: int = 10_000):
+    """
+    Statements/sec of compile_file_parallel() on a synthetic `n`-statement
+    file for 1, 2, 4 ... workers up to the CPU count.
+    """
+    cpus = os.cpu_count() or 1
+    workers = workers or sorted({1 << k for k in range(cpus.bit_length())} | {cpus})
+    results = []
+    base = None
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "statements.txt")
+        _write_statements(path, n)
+        print(f"{n} statements, {os.path.getsize(path) / 1e6:.0f} MB, {cpus} CPUs, "
+              f"chunks of {chunk_size}")
+        print(f"{'workers':>8}{'seconds':>10}{'stmts/sec':>12}{'speedup':>10}")
+        for count in workers:
+            start = time.perf_counter()
+            compiled = sum(1 for _ in compile_file_parallel(path, count, chunk_size))
+            elapsed = time.perf_counter() - start
+            assert compiled == n, (compiled, n)
+            base = base or elapsed
+            row = {"workers": count, "statements": n, "seconds": elapsed,
+                   "stmts_per_sec": _rate(n, elapsed), "speedup": base / elapsed}
+            results.append(row)
+            print(f"{count:>8}{elapsed:>10.3f}{row['stmts_per_sec']:>12.0f}{row['speedup']:>9.2f}x")
+    print()
+    return results
+
+# ----------------------------------------------------------------------
+# Compile server: latency and throughput under pipelined load
+# ----------------------------------------------------------------------
+def bench_server(requests: int = 5_000, connections: int = 8, pipelines=(1, 8, 32)):
+    """
+    Requests/sec and p50 / p99 latency of the compile server (run as a
+    separate `math_solver.py --serve` process on a Unix socket) for several
+    pipeline depths, using the load() client.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "solver.sock")
+        solver = os.path.join(os.path.dirname(os.path.abspath(__file__)), "math_solver.py")
+        server = subprocess.Popen([sys.executable, solver, "--serve", f"unix:{path}"],
+                                  stderr=subprocess.DEVNULL)
+        try:
+            for _ in range(100):
+                if os.path.exists(path):
+                    break
+                time.sleep(0.05)
+            print(f"{'pipeline':>9}{'requests':>10}{'req/sec':>10}{'p50 ms':>9}{'p99 ms':>9}")
+            for depth in pipelines:
+                report = asyncio.run(load(f"unix:{path}", requests, connections, depth))
+                results.append(report)
+                print(f"{depth:>9}{report['requests']:>10}{report['requests_per_sec']:>10.0f}"
+                      f"{report['p50'] * 1e3:>9.2f}{report['p99'] * 1e3:>9.2f}")
+        finally:
+            server.terminate()
+            server.wait()
+    print()
+    return results
+
+# ----------------------------------------------------------------------
+# Instrumentation overhead
+# ----------------------------------------------------------------------
+def bench_metrics(n: int = 20000, rounds: int = 3):
+    """Statements/sec of compile_statement() without metrics, with Metrics, and with a profiled phase."""
+    sources = [f"int v{i} = {i} * ({i % 97} + 1) - {i % 3} / 2;" for i in range(n)]
+
+    def profiled():
+        metrics = Metrics()
+        metrics.add_hook("syntax", profiler_hook(cProfile.Profile()))
+        return metrics
+
+    modes = (("disabled", lambda: None), ("metrics", Metrics), ("profiled", profiled))
+    results = []
+    base = None
+    print(f"{'mode':>10}{'seconds':>10}{'stmts/sec':>12}{'overhead':>10}")
+    for mode, make in modes:
+        best = None
+        for _ in range(rounds):
+            metrics = make()
+            start = time.perf_counter()
+            for source in sources:
+                compile_statement(source, metrics=metrics)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        base = base or best
+        row = {"mode": mode, "seconds": best, "stmts_per_sec": _rate(n, best),
+               "overhead": best / base - 1}
+        results.append(row)
+        print(f"{mode:>10}{best:>10.3f}{row['stmts_per_sec']:>12.0f}{row['overhead'] * 100:>9.1f}%")
+    print()
+    return results
+
+# ----------------------------------------------------------------------
+# Registry
+# ----------------------------------------------------------------------
+_BENCHMARKS = {
+    "quiet": bench_quiet_vs_repl,
+    "lexer": bench_lexer,
+    "parser": bench_parser,
+    "ir_gen": bench_ir_gen,
+    "ast_memory": bench_ast_memory,
+    "program": bench_program,
+    "threads": bench_threads,
+    "quad_ir": bench_quad_ir,
+    "registers": bench_registers,
+    "peephole": bench_peephole,
+    "vm": bench_vm,
+    "backends": bench_backends,
+    "batch": bench_batch,
+    "soak": bench_soak,
+    "parallel": bench_parallel,
+    "server": bench_server,
+    "metrics": bench_metrics,
+}
+
+_LONG_RUNNING = {"soak", "parallel"}
+
+def main(argv):
+    names = argv or [name for name in _BENCHMARKS if name not in _LONG_RUNNING]
+    for name in names:
+        if name not in _BENCHMARKS:
+            print(f"Unknown benchmark {name!r}. Choose from: {', '.join(_BENCHMARKS)}")
+            return 1
+        print(f"===== Benchmark: {name} =====")
+        _BENCHMARKS[name]()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,372 @@
+"""
+===== CompileCache.py =====
+
+Bounded, in-process LRU cache of compiled statements.
+
+Statements are keyed on a normalized form of their source: whitespace next
+to a single-character token (= + - * / ( ) ;) is dropped and other runs of
+whitespace collapse to one space, so these share one entry:
+
+    int y=4+3;     int y = 4 + 3 ;     "  int  y =4+ 3;"   ->   "int y=4+3;"
+
+Whitespace between two words or numbers is kept ("4 3" is not "43"), and
+so is whitespace around characters the lexer rejects ("4 . 5" is a
+lexical error, "4.5" is not).
+
+The cache stores the whole CompileResult (tokens, AST, IR, assembly and
+answer). Cached results are shared between callers and must be treated as
+read-only.
+
+DiskCache has the same interface but persists across runs in a SQLite
+file in a cache directory. Entries are keyed on the SHA-256 of the
+normalized statement and tagged with compiler_version(), a hash of the
+source of every compiler phase: opening the cache with a different
+version drops the old entries, so editing a phase invalidates it. The file
+is capped at `max_bytes` of stored results; least recently used entries
+are evicted first.
+
+Results are stored as JSON text (`dump` / `load` convert them; Compiler
+passes functions for CompileResult), never pickled, so reading the cache
+cannot run code; a row that does not decode is a miss. The directory is
+created private (mode 0o700) and must stay private: anyone who can write
+to it can still change the answers the compiler returns.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+_WS_RUN = re.compile(r"\s+")
+_PUNCT_SPACE = re.compile(r" ?([=+\-*/();]) ?")     # single-character tokens only
+
+DEFAULT_MAXSIZE = 1024
+
+
+def normalize(source: str) -> str:
+    """Cache key for a statement: whitespace stripped around operators."""
+    return _PUNCT_SPACE.sub(r"\1", _WS_RUN.sub(" ", source.strip()))
+
+
+class CompileCache:
+    """LRU map from normalized statement source to CompileResult."""
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, source: str, accept: Optional[Callable[[object], bool]] = None):
+        """
+        Return the cached result for `source`, or None. If `accept` is given
+        and returns False for the cached result, the lookup counts as a miss.
+        """
+        key = normalize(source)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None or (accept is not None and not accept(result)):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, source: str, result) -> None:
+        """Store a result, evicting the least recently used entry when full."""
+        key = normalize(source)
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Current size and hit / miss / eviction counters."""
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# ----------------------------------------------------------------------
+# Persistent cache
+# ----------------------------------------------------------------------
+# Modules whose code determines a CompileResult
+_PHASE_MODULES = ("Diagnostics", "LexicalAnalyzer", "SyntaxTree", "SyntaxAnalyzer", "SymbolTable",
+                  "SemanticAnalyzer", "IntermediateCodeGenerator", "Optimizer", "QuadIR",
+                  "Assembler", "Peephole", "VM", "Compiler", "CompileCache")
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+_CACHE_FILE = "compile-cache.sqlite3"
+_COMMIT_EVERY = 256         # writes per transaction
+
+
+def compiler_version() -> str:
+    """Hash of the Python version and the source of every compiler phase."""
+    digest = hashlib.sha256(sys.version.split()[0].encode())
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in _PHASE_MODULES:
+        with open(os.path.join(directory, name + ".py"), "rb") as handle:
+            digest.update(handle.read())
+    return digest.hexdigest()[:16]
+
+
+class DiskCache:
+    """Persistent map from normalized statement source to CompileResult (SQLite)."""
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES,
+                 version: Optional[str] = None,
+                 dump: Callable[[Any], str] = json.dumps, load: Callable[[str], Any] = json.loads):
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        self.path = os.path.join(directory, _CACHE_FILE)
+        self.max_bytes = max_bytes
+        self._dump = dump
+        self._load = load
+        self.version = version or compiler_version()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS entries (key BLOB PRIMARY KEY, "
+                         "version TEXT, result BLOB, size INTEGER, used INTEGER)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_used ON entries (used)")
+        self._db.execute("DELETE FROM entries WHERE version != ?", (self.version,))
+        self._db.commit()
+        self._bytes, self._clock = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0), COALESCE(MAX(used), 0) FROM entries").fetchone()
+
+    def _tick(self) -> int:
+        """Next value of the recency counter stored in `used`."""
+        self._clock += 1
+        return self._clock
+
+    @staticmethod
+    def _key(source: str) -> bytes:
+        return hashlib.sha256(normalize(source).encode("utf-8")).digest()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def get(self, source: str, accept: Optional[Callable[[object], bool]] = None):
+        """Same contract as CompileCache.get(); returns a fresh copy of the stored result."""
+        key = self._key(source)
+        with self._lock:
+            row = self._db.execute("SELECT result FROM entries WHERE key = ?", (key,)).fetchone()
+            result = self._decode(row[0]) if row is not None else None
+            if result is None or (accept is not None and not accept(result)):
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE entries SET used = ? WHERE key = ?", (self._tick(), key))
+            self._wrote()
+            self.hits += 1
+            return result
+
+    def put(self, source: str, result) -> None:
+        """Store a result, evicting least recently used entries past max_bytes."""
+        try:
+            data = self._dump(result).encode("utf-8")
+        except RecursionError:
+            return                                  # too deep to serialize; just not cached
+        key = self._key(source)
+        with self._lock:
+            old = self._db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                             (key, self.version, data, len(data), self._tick()))
+            self._bytes += len(data) - (old[0] if old else 0)
+            if self._bytes > self.max_bytes:
+                self._evict()
+            self._wrote()
+
+    def _decode(self, data: bytes):
+        """Stored result, or None if the row is not something `load` accepts."""
+        try:
+            return self._load(data.decode("utf-8"))
+        except (ValueError, TypeError, KeyError, RecursionError):
+            return None
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache is under 90% of max_bytes."""
+        target = self.max_bytes * 9 // 10
+        rows = self._db.execute("SELECT key, size FROM entries ORDER BY used")
+        doomed = []
+        for key, size in rows:
+            if self._bytes <= target:
+                break
+            doomed.append((key,))
+            self._bytes -= size
+        self._db.executemany("DELETE FROM entries WHERE key = ?", doomed)
+        self.evictions += len(doomed)
+
+    def _wrote(self) -> None:
+        self._pending += 1
+        if self._pending >= _COMMIT_EVERY:
+            self._db.commit()
+            self._pending = 0
+
+    def flush(self) -> None:
+        """Commit pending writes."""
+        with self._lock:
+            self._db.commit()
+            self._pending = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+            self._db.commit()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Current size and hit / miss / eviction counters."""
+        return {
+            "size": len(self),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+# ----------------------------------------------------------------------
+# Test Suite for the compile cache
+# ----------------------------------------------------------------------
+def test_compile_cache_suite():
+    print("===== Running Compile Cache Test Suite =====\n")
+
+    tests = [
+        {
+            "name": "Whitespace around operators is ignored",
+            "result": {normalize(s) for s in ("int y=4+3;", "int y = 4 + 3 ;", "  int\ty =4+ 3;\n")},
+            "expected": {"int y=4+3;"}
+        },
+        {
+            "name": "Whitespace between words is kept",
+            "result": (normalize("int  y=4;"), normalize("4 3"), normalize("int (x)")),
+            "expected": ("int y=4;", "4 3", "int(x)")
+        },
+        {
+            "name": "Whitespace around characters the lexer rejects is kept",
+            "result": (normalize("double y = 4 . 5;"), normalize("double y = 4.5;"),
+                       normalize("int y = 4 $ 3;")),
+            "expected": ("double y=4 . 5;", "double y=4.5;", "int y=4 $ 3;")
+        },
+    ]
+
+    cache = CompileCache(maxsize=2)
+    cache.put("int a = 1;", "A")
+    cache.put("int b = 2;", "B")
+    cache.get("int a=1;")               # hit; b becomes least recently used
+    cache.put("int c = 3;", "C")        # evicts b
+    tests.append({
+        "name": "LRU eviction and counters",
+        "result": (cache.get("int b = 2;"), cache.get("int a = 1;"), cache.stats()),
+        "expected": (None, "A", {"size": 2, "maxsize": 2, "hits": 2, "misses": 1, "evictions": 1})
+    })
+    tests.append({
+        "name": "Rejected entries count as misses",
+        "result": (cache.get("int c = 3;", accept=lambda r: False), cache.stats()["misses"]),
+        "expected": (None, 2)
+    })
+
+    # Persistent cache: survives reopening, invalidated by a new version, size-capped
+    with tempfile.TemporaryDirectory() as directory:
+        disk = DiskCache(directory, version="v1")
+        disk.put("int a = 1;", {"answer": "a=1;"})
+        disk.close()
+        disk = DiskCache(directory, version="v1")
+        reopened = disk.get("int a=1;")
+        disk.close()
+        disk = DiskCache(directory, version="v2")
+        tests.append({
+            "name": "Disk cache persists and is invalidated by the version",
+            "result": (reopened, disk.get("int a = 1;"), len(disk)),
+            "expected": ({"answer": "a=1;"}, None, 0)
+        })
+        disk.close()
+
+        disk = DiskCache(directory, max_bytes=2000, version="v2")
+        for i in range(10):
+            disk.put(f"int v{i} = {i};", "x" * 400)
+            disk.get("int v0 = 0;")                 # keep v0 recently used
+        tests.append({
+            "name": "Disk cache evicts least recently used entries past max_bytes",
+            "result": (disk.stats()["bytes"] <= 2000, disk.get("int v0 = 0;"), disk.get("int v1 = 1;")),
+            "expected": (True, "x" * 400, None)
+        })
+        disk.close()
+
+        with sqlite3.connect(os.path.join(directory, _CACHE_FILE)) as db:
+            db.execute("UPDATE entries SET result = ?", (b"\x80\x04K\x01.",))   # a pickle
+        disk = DiskCache(directory, version="v2")
+        tests.append({
+            "name": "Disk cache treats rows that are not JSON as misses",
+            "result": (disk.get("int v0 = 0;"), disk.stats()["misses"]),
+            "expected": (None, 1)
+        })
+        disk.close()
+
+    with tempfile.TemporaryDirectory() as parent:
+        directory = os.path.join(parent, "cache")
+        DiskCache(directory).close()
+        tests.append({
+            "name": "Disk cache directory is private",
+            "result": os.stat(directory).st_mode & 0o777,
+            "expected": 0o700
+        })
+
+    passed = 0
+    for case in tests:
+        print(f"--- {case['name']} ---")
+        if case["result"] == case["expected"]:
+            print("PASS\n")
+            passed += 1
+        else:
+            print("FAIL")
+            print("Expected:", case["expected"])
+            print("Got:", case["result"], "\n")
+
+    print(f"Summary: {passed}/{len(tests)} tests passed.\n")
+
+
+# ----------------------------------------------------------------------
+# Run suite if executed directly
+# ----------------------------------------------------------------------
+if __name__ == "__main__":
+    test_compile_cache_suite()
@@ -0,0 +1,694 @@
+"""
+===== Compiler.py =====
+
+Programmatic entry point that runs the five phases in order:
+[1] Lexical Analysis
+[2] Syntax Analysis
+[3] Semantic Analysis
+[4] Intermediate code generation (then the TAC optimizer, see Optimizer.py)
+[5] Assembler
+
+By default nothing is printed: every phase runs with verbose=False and its
+errors are collected as Diagnostic records on the returned CompileResult.
+Passing verbose=True reproduces the banners, tokens, AST, TAC and assembly
+that the REPL in math_solver.py shows.
+
+Example:
+    result = compile_statement("int y = 4 + 3;")
+    result.ok        -> True
+    result.ir        -> ["t1 = 4 + 3", "y = t1"]
+    result.optimized -> ["y = 7"]
+    result.asm       -> ["LD R1, 7", "ST y, R1"]
+    result.answer    -> "y=7;"        (result.asm run on the VM, see VM.py)
+
+compile_program() compiles several statements that share one SymbolTable:
+    compile_program("int x = 2; int y = x * 3;").bindings()  -> {"x": 2, "y": 6}
+
+A CompilerSession keeps that state (symbol table, cache) for one caller
+across calls, e.g. one REPL or one service client.
+
+compile_batch() compiles independent statements on a thread pool; results
+come back in input order and match compiling each statement on its own.
+compile_file_parallel() does the same for a file on a process pool, in
+chunks of statements, so it is not limited to one core.
+
+Every function also takes metrics=Metrics() to time each phase and count
+tokens, nodes, instructions and failures (see Metrics.py).
+"""
+
+import io
+import json
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from Diagnostics import Diagnostic, report
+from LexicalAnalyzer import SourceChunk, iter_statements, split_source, test_lexical
+from SyntaxAnalyzer import test_syntax
+from SemanticAnalyzer import test_semantic
+from IntermediateCodeGenerator import test_intermediate
+from Assembler import format_answer, test_assembler
+from Optimizer import is_constant, test_optimizer
+from Peephole import PeepholeStats, peephole
+from CompileCache import CompileCache, DiskCache
+from Metrics import Metrics
+from PythonBackend import CompiledProgram, compile_tac
+from QuadIR import Quads
+from SymbolTable import SymbolTable
+from SyntaxTree import Statement, format_dict, from_dict, iter_variables, to_dict
+from VM import execute
+
+
+class CompileResult:
+    """Everything produced while compiling one statement."""
+
+    __slots__ = ("source", "tokens", "ast", "ir", "optimized", "asm", "value", "answer",
+                 "diagnostics", "failed_phase")
+
+    def __init__(self, source: str):
+        self.source = source
+        self.tokens: List[Tuple[str, str]] = []
+        self.ast: Optional[Statement] = None
+        self.ir: List[str] = []
+        self.optimized: List[str] = []      # ir after Optimizer.optimize()
+        self.asm: List[str] = []
+        self.value = None                   # numeric answer
+        self.answer: Optional[str] = None   # rendered answer, e.g. "y=7;"
+        self.diagnostics: List[Diagnostic] = []
+        self.failed_phase: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.failed_phase is None
+
+    def __repr__(self) -> str:
+        status = "ok" if self.ok else f"failed in {self.failed_phase}"
+        return f"<CompileResult {self.source!r} {status}>"
+
+
+def _dump_result(result: CompileResult) -> str:
+    """JSON text of a CompileResult, the format DiskCache stores."""
+    return json.dumps({
+        "source": result.source,
+        "tokens": result.tokens,
+        "ast": to_dict(result.ast) if result.ast is not None else None,
+        "ir": result.ir,
+        "optimized": result.optimized,
+        "asm": result.asm,
+        "value": result.value,
+        "answer": result.answer,
+        "diagnostics": result.diagnostics,
+        "failed_phase": result.failed_phase,
+    })
+
+
+def _load_result(text: str) -> CompileResult:
+    """Inverse of _dump_result. Raises ValueError, KeyError or TypeError on malformed text."""
+    data = json.loads(text)
+    result = CompileResult(data["source"])
+    result.tokens = [(kind, lexeme) for kind, lexeme in data["tokens"]]
+    result.ast = from_dict(data["ast"]) if data["ast"] is not None else None
+    result.ir = data["ir"]
+    result.optimized = data["optimized"]
+    result.asm = data["asm"]
+    result.value = data["value"]
+    result.answer = data["answer"]
+    result.diagnostics = [Diagnostic(phase, tuple(position) if position else None, message)
+                          for phase, position, message in data["diagnostics"]]
+    result.failed_phase = data["failed_phase"]
+    return result
+
+
+def print_result(result: CompileResult) -> None:
+    """
+    Print a finished result the way the phases print it in verbose mode.
+    Used to show cache hits, which skip the phases.
+    """
+    print("[LEXICAL ANALYSIS]")
+    for token in result.tokens:
+        print(token)
+    print()
+    print("[SYNTAX ANALYSIS]")
+    if result.failed_phase == "syntax":
+        for diagnostic in result.diagnostics:
+            print(f"Syntax error: {diagnostic.message}")
+        return
+    print("Syntax valid. AST:")
+    print(format_dict(result.ast))
+    print()
+    print("[SEMANTIC ANALYSIS]")
+    print("Semantics valid.")
+    print()
+    print("[INTERMEDIATE CODE GENERATION]")
+    for line in result.ir:
+        print(line)
+    print()
+    print("[OPTIMIZATION]")
+    for line in result.optimized:
+        print(line)
+    print()
+    print("[ASSEMBLER]")
+    for line in result.asm:
+        print(line)
+    print(f"\nAnswer: {result.answer}\n")
+
+
+def _cacheable(result: CompileResult) -> bool:
+    """
+    Only results that do not depend on the symbol table are cached: syntax
+    failures and successful statements that use no variables. Lexical
+    failures are not cached because their messages quote source offsets.
+    """
+    if result.failed_phase == "syntax":
+        return True
+    return result.ok and all(kind != "IDENT" for kind, _ in result.tokens[2:])
+
+
+def _fits(result: CompileResult, symbols: SymbolTable) -> bool:
+    """
+    A cached declaration is reusable unless it redeclares a name with another
+    type, or declares a new name in a full table that rejects new names (a
+    normal compile then reports the full table).
+    """
+    if not result.ok:
+        return True
+    slot = symbols.lookup(result.ast.identifier)
+    if slot is None:
+        full = symbols.capacity is not None and len(symbols) >= symbols.capacity
+        return not (full and symbols.policy == "reject")
+    return symbols.types[slot] == result.ast.type
+
+
+def _cache_hit(cache: CompileCache, source: str, verbose: bool,
+               symbols: Optional[SymbolTable]) -> Optional[CompileResult]:
+    """Serve a statement from the cache, replaying its declaration into `symbols`."""
+    cached = cache.get(source, None if symbols is None else lambda r: _fits(r, symbols))
+    if cached is None:
+        return None
+    if verbose:
+        print_result(cached)
+    if symbols is not None and cached.ok:
+        slot = symbols.declare(cached.ast.identifier, cached.ast.type)
+        symbols.values[slot] = cached.value
+    return cached
+
+
+def _call(phase: str, function, *args):
+    """Phase runner used when no Metrics object is given."""
+    return function(*args)
+
+
+def compile_statement(source: str, verbose: bool = False,
+                      symbols: Optional[SymbolTable] = None,
+                      cache: Optional[CompileCache] = None,
+                      metrics: Optional[Metrics] = None) -> CompileResult:
+    """
+    Compile one statement through all five phases.
+    Stops at the first failing phase and records it in result.failed_phase.
+    With a SymbolTable the statement may use variables declared earlier, and
+    its own variable and value are recorded there.
+    With a CompileCache, a statement seen before (up to whitespace) returns
+    the cached, shared result without running the phases again.
+    With a Metrics object, phase times and counts are recorded there.
+    """
+    if cache is not None:
+        cached = _cache_hit(cache, source, verbose, symbols)
+        if cached is not None:
+            if metrics is not None:
+                metrics.record(cached, cached=True)
+            return cached
+
+    result = CompileResult(source)
+    run = metrics.run if metrics is not None else _call
+
+    # 1. LEXICAL ANALYSIS
+    result.tokens = run("lexical", test_lexical, source, verbose, result.diagnostics)
+    if not result.tokens:
+        result.failed_phase = "lexical"
+    else:
+        _compile_tokens(result, verbose, symbols, run)
+        if cache is not None and _cacheable(result):
+            cache.put(source, result)
+    if metrics is not None:
+        metrics.record(result)
+    return result
+
+
+def _compile_tokens(result: CompileResult, verbose: bool,
+                    symbols: Optional[SymbolTable] = None, run=_call) -> CompileResult:
+    """Run phases 2-5 on result.tokens; `run` calls each phase (see Metrics.run)."""
+    diags = result.diagnostics
+
+    # 2. SYNTAX ANALYSIS
+    result.ast = run("syntax", test_syntax, result.tokens, verbose, diags)
+    if not result.ast:
+        result.failed_phase = "syntax"
+        return result
+
+    # 3. SEMANTIC ANALYSIS
+    if not run("semantic", test_semantic, result.ast, verbose, diags, symbols):
+        result.failed_phase = "semantic"
+        return result
+
+    # 4. INTERMEDIATE CODE GENERATION
+    result.ir = run("intermediate", test_intermediate, result.ast, verbose, diags)
+    if not result.ir:
+        result.failed_phase = "intermediate"
+        return result
+
+    result.optimized = run("optimizer", test_optimizer, result.ir, result.ast.type, verbose)
+
+    # 5. ASSEMBLER
+    result.asm = run("assembler", test_assembler, result.ast, verbose, diags, symbols,
+                     result.optimized)
+    if not result.asm:
+        result.failed_phase = "assembler"
+        return result
+
+    # The answer comes from running the assembly on the VM; only statements
+    # that still read variables after optimization need their values.
+    memory = symbols.values if symbols is not None else None
+    variables = None if is_constant(result.optimized) else _variable_values(result.ast, memory)
+    try:
+        result.value = run("execute", execute, result.asm, variables)[result.ast.identifier]
+    except ZeroDivisionError:
+        result.diagnostics.append(Diagnostic("assembler", None, "division by zero."))
+        result.failed_phase = "assembler"
+        return result
+    result.answer = format_answer(result.ast.identifier, result.ast.type, result.value)
+
+    if memory is not None:
+        memory[result.ast.slot] = result.value
+    return result
+
+
+def _variable_values(ast: Statement, memory: Optional[List[Any]]) -> Dict[str, Any]:
+    """Name -> current value of every variable the statement reads (by slot)."""
+    return {var.name: memory[var.slot] for var in iter_variables(ast.expression)}
+
+
+def compile_stream(source, verbose: bool = False,
+                   symbols: Optional[SymbolTable] = None,
+                   cache: Optional[CompileCache] = None,
+                   span: Optional[SourceChunk] = None,
+                   metrics: Optional[Metrics] = None) -> Iterator[CompileResult]:
+    """
+    Compile a source file (path or binary stream) one statement at a time.
+    Statements come from LexicalAnalyzer.iter_statements, so memory use stays
+    constant no matter how large the file is. Pass a SymbolTable to let
+    statements use variables declared earlier in the file, and a
+    CompileCache to reuse results for repeated statements. With a `span`
+    from split_source() only that part of the file at path `source` is compiled.
+    With a Metrics object, reading and tokenizing each statement counts as
+    its lexical phase.
+    """
+    run = metrics.run if metrics is not None else _call
+    statements = iter_statements(source, span)
+    while True:
+        statement = run("lexical", next, statements, None)
+        if statement is None:
+            break
+        if cache is not None:
+            cached = _cache_hit(cache, statement.text, verbose, symbols)
+            if cached is not None:
+                if metrics is not None:
+                    metrics.record(cached, cached=True)
+                yield cached
+                continue
+
+        result = CompileResult(statement.text)
+        result.tokens = statement.tokens
+        if statement.error_offset is not None:
+            report(result.diagnostics, verbose, "lexical", "Lexical",
+                   f"Invalid token at byte offset {statement.error_offset}",
+                   statement.error_position)
+            result.failed_phase = "lexical"
+        else:
+            _compile_tokens(result, verbose, symbols, run)
+        if cache is not None and _cacheable(result):
+            cache.put(statement.text, result)
+        if metrics is not None:
+            metrics.record(result)
+        yield result
+
+
+class ProgramResult:
+    """Results of compiling every statement of a program with one symbol table."""
+
+    __slots__ = ("statements", "symbols")
+
+    def __init__(self, statements: List[CompileResult], symbols: SymbolTable):
+        self.statements = statements
+        self.symbols = symbols
+
+    @property
+    def ok(self) -> bool:
+        return all(result.ok for result in self.statements)
+
+    @property
+    def diagnostics(self) -> List[Diagnostic]:
+        return [d for result in self.statements for d in result.diagnostics]
+
+    def bindings(self):
+        """Final value of every variable the program declared, by name."""
+        return self.symbols.bindings()
+
+    def assembly(self, stats: Optional[List[PeepholeStats]] = None) -> List[str]:
+        """
+        Assembly of every successful statement as one stream, run through the
+        peephole pass again so a statement that reloads a variable the
+        previous statement just stored uses the register instead.
+        """
+        code = [line for result in self.statements if result.ok for line in result.asm]
+        return peephole(code, stats)
+
+    def execute(self) -> Dict[str, Any]:
+        """Run assembly() on the VM; the result matches bindings() for declared variables."""
+        return execute(self.assembly())
+
+    def to_python(self) -> CompiledProgram:
+        """Optimized IR of every successful statement compiled into one (cached) Python function."""
+        return compile_tac([(result.optimized, result.ast.type)
+                            for result in self.statements if result.ok])
+
+    def quads(self) -> Quads:
+        """Optimized IR of every successful statement, packed into one Quads buffer."""
+        quads = Quads()
+        for result in self.statements:
+            if result.ok:
+                quads.add_tac(result.optimized, result.ast.type)
+        return quads
+
+
+def compile_program(text: str, verbose: bool = False,
+                    symbols: Optional[SymbolTable] = None,
+                    cache: Optional[CompileCache] = None,
+                    metrics: Optional[Metrics] = None) -> ProgramResult:
+    """
+    Compile a whole program (several ';'-terminated statements). Later
+    statements may use variables declared by earlier ones; a failing
+    statement is reported and compilation continues with the next one.
+    """
+    symbols = symbols if symbols is not None else SymbolTable()
+    results = list(compile_stream(io.BytesIO(text.encode("utf-8")), verbose, symbols, cache,
+                                  metrics=metrics))
+    return ProgramResult(results, symbols)
+
+
+def compile_batch(sources: Iterable[str], workers: Optional[int] = None,
+                  cache: Optional[CompileCache] = None,
+                  metrics: Optional[Metrics] = None) -> List[CompileResult]:
+    """
+    Compile independent statements concurrently on `workers` threads
+    (default: ThreadPoolExecutor's default). Statements do not share a
+    symbol table, so each result is the same as compile_statement(source)
+    and results are returned in input order. A CompileCache may be shared
+    across threads, and so may a Metrics object. Nothing is printed.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda source: compile_statement(source, cache=cache, metrics=metrics),
+                             sources))
+
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+
+def _compile_span(path: str, span: SourceChunk) -> List[CompileResult]:
+    """Process-pool task: compile one chunk, keeping only what the caller reads."""
+    results = []
+    for result in compile_stream(path, span=span):
+        result.tokens, result.ast, result.ir, result.optimized, result.asm = [], None, [], [], []
+        results.append(result)
+    return results
+
+
+def compile_file_parallel(path: str, workers: Optional[int] = None,
+                          chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[CompileResult]:
+    """
+    Compile the statements of a file on a pool of `workers` processes
+    (default: one per CPU) and yield the results in input order.
+
+    The file is cut into chunks of `chunk_size` statements by byte offset
+    (LexicalAnalyzer.split_source); each worker maps the file and compiles
+    its chunk. Statements are independent, as in compile_batch(). To keep
+    the results cheap to send back, only source, value, answer, diagnostics
+    and failed_phase are kept; tokens, AST, IR and assembly are dropped.
+    At most two chunks per worker are in flight, so memory stays bounded.
+    """
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers)
+    pending: Deque[Future] = deque()
+    try:
+        for span in split_source(path, chunk_size):
+            pending.append(pool.submit(_compile_span, path, span))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+class CompilerSession:
+    """
+    Compilation state owned by one caller: its own symbol table (optionally
+    bounded, see SymbolTable) and an optional compile cache. Unrelated
+    sessions never see each other's variables. With `cache_dir` the cache
+    is a persistent DiskCache in that directory instead of an in-memory one;
+    close() the session to commit it. With `metrics`, every compile in the
+    session is recorded there.
+    """
+
+    def __init__(self, capacity: Optional[int] = None, policy: str = "lru",
+                 cache_size: Optional[int] = None, cache_dir: Optional[str] = None,
+                 metrics: Optional[Metrics] = None):
+        self.symbols = SymbolTable(capacity, policy)
+        self.metrics = metrics
+        if cache_dir is not None:
+            self.cache = DiskCache(cache_dir, dump=_dump_result, load=_load_result)
+        else:
+            self.cache = CompileCache(cache_size) if cache_size else None
+        self.compiles = 0
+
+    def compile(self, source: str, verbose: bool = False) -> CompileResult:
+        """Compile one statement in this session."""
+        self.compiles += 1
+        return compile_statement(source, verbose, self.symbols, self.cache, self.metrics)
+
+    def compile_program(self, text: str, verbose: bool = False) -> ProgramResult:
+        """Compile several statements in this session."""
+        result = compile_program(text, verbose, self.symbols, self.cache, self.metrics)
+        self.compiles += len(result.statements)
+        return result
+
+    def reset(self) -> None:
+        """Forget all variables and cached statements (a persistent cache is kept)."""
+        self.symbols.reset()
+        if isinstance(self.cache, CompileCache):
+            self.cache.clear()
+        self.compiles = 0
+
+    def close(self) -> None:
+        """Commit and close a persistent cache."""
+        if isinstance(self.cache, DiskCache):
+            self.cache.close()
+
+    def memory_usage(self) -> Dict[str, Any]:
+        """Symbol-table usage plus cache size, for monitoring long-running sessions."""
+        return {
+            "compiles": self.compiles,
+            "symbols": self.symbols.memory_usage(),
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
+
+
+# ----------------------------------------------------------------------
+# Test Suite for the compile API
+# ----------------------------------------------------------------------
+def test_compiler_suite():
+    print("===== Running Compiler API Test Suite =====\n")
+
+    tests = [
+        {
+            "name": "Quiet int addition",
+            "input": "int y = 4 + 3;",
+            "expected": (None, "y=7;", [])
+        },
+        {
+            "name": "Lexical error is recorded with its position",
+            "input": "int y = 4 $ 3;",
+            "expected": ("lexical", None,
+                         [("lexical", (1, 11))])
+        },
+        {
+            "name": "Semantic error is recorded",
+            "input": "int y = 4 / 0;",
+            "expected": ("semantic", None, [("semantic", None)])
+        },
+        {
+            "name": "Double literal overflowing to inf is a semantic error",
+            "input": "double x = " + "9" * 400 + ".0 * 2.0;",
+            "expected": ("semantic", None, [("semantic", None)])
+        },
+        {
+            "name": "Negative zero keeps its sign",
+            "input": "double x = 0.0 * -1.0;",
+            "expected": (None, "x=-0;", [])
+        },
+        {
+            "name": "Int division is exact beyond float precision",
+            "input": "int x = " + "9" * 400 + " / 3;",
+            "expected": (None, "x=" + "3" * 400 + ";", [])
+        },
+    ]
+
+    passed = 0
+    for case in tests:
+        print(f"--- {case['name']} ---")
+        result = compile_statement(case["input"])
+        got = (result.failed_phase, result.answer,
+               [(d.phase, d.position) for d in result.diagnostics])
+        if got == case["expected"]:
+            print("PASS\n")
+            passed += 1
+        else:
+            print("FAIL")
+            print("Expected:", case["expected"])
+            print("Got:", got, "\n")
+
+    # Multi-statement programs share one symbol table
+    program = "int x = 2;\nint y = x * (x + 1);\ndouble d = 1.5;\nint z = d;\nint w = y - x;"
+    expected = {"x": 2, "y": 6, "d": 1.5, "w": 4}
+    print("--- Program with variable references ---")
+    result = compile_program(program)
+    failed = [r.failed_phase for r in result.statements]
+    packed = ["x = 2", "t1 = x + 1", "y = x * t1", "d = 1.5", "w = y - x"]
+    assembly = ["LD R1, 2", "ST x, R1", "ADD R1, 1", "LD R2, x", "MUL R2, R1", "ST y, R2",
+                "LDF R1, 1.5", "STF d, R1", "LD R1, R2", "SUB R1, x", "ST w, R1"]
+    if result.bindings() == expected and failed == [None, None, None, "semantic", None] \
+            and result.quads().to_tac() == packed and result.assembly() == assembly \
+            and result.execute() == expected and result.to_python()() == expected:
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL")
+        print("Expected:", expected)
+        print("Got:", result.bindings(), failed, "\n")
+
+    # Bad statements are reported and the rest of the program still compiles
+    print("--- Program keeps compiling past errors ---")
+    result = compile_program("int a = 1; int b = 2 $ 3; int c = a +; double d = a; int e = a * 2;")
+    got = ([d.phase for d in result.diagnostics], result.bindings())
+    expected = (["lexical", "syntax", "semantic"], {"a": 1, "e": 2})
+    if got == expected:
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL")
+        print("Expected:", expected)
+        print("Got:", got, "\n")
+
+    # A cache shared with another session must not bypass a full "reject" table
+    print("--- Cache hit into a full reject-policy table ---")
+    cache = CompileCache(maxsize=8)
+    compile_statement("int y = 4 + 3;", symbols=SymbolTable(), cache=cache)
+    symbols = SymbolTable(capacity=1, policy="reject")
+    compile_statement("int a = 1;", symbols=symbols, cache=cache)
+    result = compile_statement("int y = 4 + 3;", symbols=symbols, cache=cache)
+    got = (result.failed_phase, [d.message for d in result.diagnostics], symbols.bindings())
+    expected = ("semantic", ["symbol table is full (1 variables); cannot declare 'y'."], {"a": 1})
+    if got == expected:
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL")
+        print("Expected:", expected)
+        print("Got:", got, "\n")
+
+    # Repeated statements are served from the cache
+    cache = CompileCache(maxsize=8)
+    symbols = SymbolTable()
+    first = compile_statement("int y = 4 + 3;", symbols=symbols, cache=cache)
+    second = compile_statement("int y=4+3;", symbols=symbols, cache=cache)
+    compile_statement("int z = y + 1;", symbols=symbols, cache=cache)   # uses a variable: not cached
+    print("--- Compile cache ---")
+    got = (second is first, second.answer, len(cache), cache.hits, cache.misses)
+    if got == (True, "y=7;", 1, 1, 2):
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL")
+        print("Got:", got, "\n")
+
+    # Sessions are isolated and can be bounded
+    session = CompilerSession(capacity=2, policy="lru")
+    other = CompilerSession()
+    session.compile_program("int a = 1; int b = a + 1; int c = b + 1; int d = a;")
+    other.compile("int a = 5;")
+    print("--- Bounded, isolated sessions ---")
+    got = (session.symbols.bindings(), other.symbols.bindings(),
+           session.memory_usage()["symbols"]["evictions"])
+    if got == ({"b": 2, "c": 3}, {"a": 5}, 1):
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL")
+        print("Got:", got, "\n")
+
+    # Batches compile on threads but match sequential compiles, in order
+    sources = [f"int v = {i} * ({i} + 1) - {i % 3};" for i in range(200)] + ["int y = 4 $ 3;"]
+    batch = compile_batch(sources, workers=8)
+    print("--- Thread-pool batch matches sequential compiles ---")
+    sequential = [compile_statement(source) for source in sources]
+    got = [(r.source, r.ir, r.asm, r.answer, r.diagnostics) for r in batch]
+    if got == [(r.source, r.ir, r.asm, r.answer, r.diagnostics) for r in sequential]:
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL\n")
+
+    # Process-pool file compiles stream back in order, chunk by chunk
+    print("--- Process-pool file compile matches compile_stream ---")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "batch.txt")
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write("\n".join(sources))
+        parallel = [(r.source, r.answer, r.diagnostics)
+                    for r in compile_file_parallel(path, workers=2, chunk_size=7)]
+        sequential = [(r.source, r.answer, r.diagnostics) for r in compile_stream(path)]
+    if parallel == sequential and len(parallel) == len(sources):
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL\n")
+
+    # A persistent cache hands back equal results after reopening
+    print("--- Disk cache round-trips results as JSON ---")
+    sources = ["double d = 0.0 * -1.5 + 2.0 / 8.0;", "int y = (4 + 3;", "int q = 7 / 2;"]
+    with tempfile.TemporaryDirectory() as directory:
+        session = CompilerSession(cache_dir=directory)
+        fresh = [session.compile(source) for source in sources]
+        session.close()
+        session = CompilerSession(cache_dir=directory)
+        reloaded = [session.compile(source) for source in sources]
+        hits = session.cache.hits
+        session.close()
+    fields = lambda r: (r.source, r.tokens, format_dict(r.ast) if r.ast else None, r.ir,
+                        r.optimized, r.asm, repr(r.value), r.answer, r.diagnostics, r.failed_phase)
+    if hits == len(sources) and [fields(r) for r in reloaded] == [fields(r) for r in fresh]:
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL")
+        print("Got:", hits, [fields(r) for r in reloaded], "\n")
+
+    print(f"Summary: {passed}/{len(tests) + 8} tests passed.\n")
+
+
+# ----------------------------------------------------------------------
+# Run suite if executed directly
+# ----------------------------------------------------------------------
+if __name__ == "__main__":
+    test_compiler_suite()
@@ -0,0 +1,43 @@
+"""
+===== Diagnostics.py =====
+
+Structured error records shared by every phase of the compiler.
+
+Each phase still prints its "<Phase> error: ..." lines when run in verbose
+mode (the REPL), but it can also append a Diagnostic to a caller-supplied
+list so that library users get the errors without parsing stdout.
+
+Example:
+    Diagnostic(phase="lexical", position=(1, 9), message="Invalid token ...")
+"""
+
+from typing import List, NamedTuple, Optional, Tuple
+
+# Phase names, in pipeline order
+PHASES = ("lexical", "syntax", "semantic", "intermediate", "assembler")
+
+
+class Diagnostic(NamedTuple):
+    phase: str                              # one of PHASES
+    position: Optional[Tuple[int, int]]     # (line, column), 1-based; None if unknown
+    message: str
+
+    def __str__(self) -> str:
+        where = f" at {self.position[0]}:{self.position[1]}" if self.position else ""
+        return f"{self.phase.capitalize()} error{where}: {self.message}"
+
+
+def line_col(text: str, offset: int) -> Tuple[int, int]:
+    """Convert a 0-based character offset into a 1-based (line, column) pair."""
+    line = text.count("\n", 0, offset) + 1
+    column = offset - (text.rfind("\n", 0, offset) + 1) + 1
+    return line, column
+
+
+def report(diagnostics: Optional[List[Diagnostic]], verbose: bool, phase: str,
+           label: str, msg: str, position: Optional[Tuple[int, int]] = None) -> None:
+    """Record an error for `phase` and print it as '<label> error: msg' when verbose."""
+    if diagnostics is not None:
+        diagnostics.append(Diagnostic(phase, position, msg))
+    if verbose:
+        print(f"{label} error: {msg}")
@@ -9,7 +9,7 @@ This intermediate code is a lower-level, platform-independent
 representation that will be passed to the assembler or optimizer
 for translation to machine code.
 
-Expected Input (AST from Syntax Analyzer):
+Expected Input (AST from Syntax Analyzer, as a SyntaxTree.Statement or this dict):
 {
     "type": "int",
     "identifier": "y",
@@ -23,67 +23,83 @@ Expected Input (AST from Syntax Analyzer):
 Expected Output (Three Address Code):
 t1 = 4 + 3
 y = t1
+
+Unary minus is written as "t2 = minus t1".
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Union
 
-# ----------------------------------------------------------------------
-# Temporary variable generator
-# ----------------------------------------------------------------------
-_temp_counter = 1
-
-def _new_temp() -> str:
-    """Generate a new temporary variable name."""
-    global _temp_counter
-    name = f"t{_temp_counter}"
-    _temp_counter += 1
-    return name
+from Diagnostics import Diagnostic, report
+from SyntaxTree import (NEG, NODE_TYPES, BinOp, NameAllocator, Neg, Statement, Var,
+                        from_dict, iter_variables)
 
 # ----------------------------------------------------------------------
 # Expression code generation
 # ----------------------------------------------------------------------
-def _generate_expression(expr: Any, code: List[str]) -> str:
+def _generate_expression(expr: Any, code: List[str], temps: NameAllocator) -> str:
     """
-    Recursively generate code for an expression node.
-    Returns the temporary variable name (or value) holding the result.
+    Generate code for an expression tree in post-order (left operand, right
+    operand, then the operation) and return the temporary variable name (or
+    value) holding the result. Walks the tree with an explicit stack, so
+    depth is not limited by Python recursion and time is linear in the
+    number of nodes.
     """
-    # Base case: direct number (int/float)
-    if isinstance(expr, (int, float)):
-        return str(expr)
-
-    # Recursive case: expression node
-    op = expr.get("op")
-    left = expr.get("left")
-    right = expr.get("right")
-
-    left_var = _generate_expression(left, code) if isinstance(left, dict) else str(left)
-    right_var = _generate_expression(right, code) if isinstance(right, dict) else str(right)
-
-    temp = _new_temp()
-    code.append(f"{temp} = {left_var} {op} {right_var}")
-    return temp
+    results: List[str] = []     # operand names of finished subtrees
+    stack = [(expr, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if isinstance(node, Var):
+            results.append(node.name)
+        elif not isinstance(node, NODE_TYPES):
+            results.append(str(node))       # direct number (int/float)
+        elif not children_done:
+            stack.append((node, True))
+            if node.code == NEG:
+                stack.append((node.operand, False))
+            else:
+                stack.append((node.right, False))
+                stack.append((node.left, False))
+        elif node.code == NEG:
+            # Unary minus: t = minus x
+            temp = temps.new()
+            code.append(f"{temp} = minus {results.pop()}")
+            results.append(temp)
+        else:
+            right = results.pop()
+            temp = temps.new()
+            code.append(f"{temp} = {results.pop()} {node.op} {right}")
+            results.append(temp)
+    return results.pop()
 
 # ----------------------------------------------------------------------
 # Main Intermediate Code Generator
 # ----------------------------------------------------------------------
-def test_intermediate(ast: Dict[str, Any]) -> List[str]:
+def test_intermediate(ast: Union[Statement, Dict[str, Any]], verbose: bool = True,
+                      diagnostics: Optional[List[Diagnostic]] = None) -> List[str]:
     """
     Generate intermediate (three-address) code from the AST.
     Returns a list of code lines.
     """
-    print("[INTERMEDIATE CODE GENERATION]")
+    if verbose:
+        print("[INTERMEDIATE CODE GENERATION]")
 
-    if not ast or "expression" not in ast or "identifier" not in ast:
-        print("Intermediate code error: invalid AST.")
+    try:
+        ast = from_dict(ast)
+    except ValueError:
+        report(diagnostics, verbose, "intermediate", "Intermediate code", "invalid AST.")
         return []
 
+    # Temporaries are numbered per statement (t1, t2, ...), skipping any
+    # name the statement reads as a variable.
+    temps = NameAllocator("t", (var.name for var in iter_variables(ast.expression)))
     code: List[str] = []
-    temp_result = _generate_expression(ast["expression"], code)
-    code.append(f"{ast['identifier']} = {temp_result}")
+    temp_result = _generate_expression(ast.expression, code, temps)
+    code.append(f"{ast.identifier} = {temp_result}")
 
-    for line in code:
-        print(line)
-    print()
+    if verbose:
+        for line in code:
+            print(line)
+        print()
 
     return code
 
@@ -93,6 +109,18 @@ def test_intermediate(ast: Dict[str, Any]) -> List[str]:
 def test_intermediate_suite():
     print("===== Running Intermediate Code Generator Test Suite =====\n")
 
+    # -(1 + -(1 + ... -(1 + 1))) : one Neg and one BinOp per level
+    levels = 100000
+    expression = 1
+    for _ in range(levels):
+        expression = Neg(BinOp("+", 1, expression))
+    deep = Statement("int", "d", expression)
+    deep_expected = ["t1 = 1 + 1", "t2 = minus t1"]
+    for level in range(1, levels):
+        deep_expected.append(f"t{2 * level + 1} = 1 + t{2 * level}")
+        deep_expected.append(f"t{2 * level + 2} = minus t{2 * level + 1}")
+    deep_expected.append(f"d = t{2 * levels}")
+
     tests = [
         {
             "name": "Simple addition",
@@ -116,6 +144,21 @@ def test_intermediate_suite():
             },
             "expected": ["t1 = 2 + 3", "t2 = t1 * 5", "z = t2"]
         },
+        {
+            "name": "Temporaries skip variable names",
+            "input": {
+                "type": "int",
+                "identifier": "y",
+                "expression": {"op": "+", "left": "t1", "right": {"op": "*", "left": 1, "right": 2}}
+            },
+            "expected": ["t2 = 1 * 2", "t3 = t1 + t2", "y = t3"]
+        },
+        {
+            "name": "Expression nested 100000 levels deep",
+            "input": deep,
+            "expected": deep_expected,
+            "verbose": False
+        },
         {
             "name": "Invalid AST",
             "input": {},
@@ -126,7 +169,7 @@ def test_intermediate_suite():
     passed = 0
     for case in tests:
         print(f"--- {case['name']} ---")
-        result = test_intermediate(case["input"])
+        result = test_intermediate(case["input"], case.get("verbose", True))
         if result == case["expected"]:
             print("PASS\n")
             passed += 1
@@ -11,6 +11,19 @@ The keywords to identify are:
 Lexical Input:  Raw string typed by the user
 Lexical Output: List of (TOKEN_TYPE, LEXEME) tuples
 
+For source files, iter_statements() streams a file path or binary stream
+one ';'-terminated statement at a time (memory-mapping regular files), so
+memory use does not grow with the size of the file. split_source() cuts a
+file into SourceChunks of N statements by byte offset, and
+iter_statements(path, chunk) streams only that range, so chunks can be
+tokenized independently (e.g. in separate processes).
+
+Errors are recovered from in panic mode, resynchronizing on ';': a file
+statement with an invalid character is flagged and the next one is read
+as usual, and test_lexical(text, recover=True) (see scan_recover) reports
+every invalid token of a multi-statement string and returns the tokens of
+the statements that scanned cleanly.
+
 Example:
 Input:
     int y = 4 + 3;
@@ -27,17 +40,26 @@ Output:
 ]
 """
 
+import mmap
+import os
 import re
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from Diagnostics import Diagnostic, line_col, report
 
 # ----------------------------------------------------------------------
 # Token definitions (order matters!)
 # ----------------------------------------------------------------------
+_KEYWORDS = ("int", "double")
+
 _TOKEN_SPEC = [
-    ("TYPE",      r"\b(?:int|double)\b"),   # Specific keywords must come first
+    ("TYPE",      rf"\b(?:{'|'.join(_KEYWORDS)})\b"),  # Specific keywords must come first
     ("IDENT",     r"[A-Za-z][A-Za-z0-9]*"), # Variable names (alphabetic only)
     ("NUMBER",    r"(?:\d+\.\d+|\d+)"),     # Integer or float literals
     ("ASSIGN",    r"="),                    # Assignment operator
     ("OP",        r"[+\-*/]"),              # Arithmetic operators
+    ("LPAREN",    r"\("),                   # Grouping
+    ("RPAREN",    r"\)"),
     ("SEMICOLON", r";"),                    # Statement terminator
     ("WS",        r"\s+"),                  # Whitespace (ignored)
 ]
@@ -45,53 +67,332 @@ _TOKEN_SPEC = [
 # Build a single master regex
 _MASTER = re.compile("|".join(f"(?P<{k}>{pat})" for k, pat in _TOKEN_SPEC))
 
+# ----------------------------------------------------------------------
+# Scanner tables (built once from _TOKEN_SPEC)
+# ----------------------------------------------------------------------
+# The first character of a token decides its class. For every ASCII
+# character we record the first _TOKEN_SPEC kind that can start with it;
+# None means the character cannot start any token.
+_CHAR_CLASS: List[Optional[str]] = [None] * 128
+for _code in range(128):
+    for _kind, _pat in _TOKEN_SPEC:
+        if re.fullmatch(_pat, chr(_code)):
+            _CHAR_CLASS[_code] = _kind
+            break
+
+# Multi-character kinds consume the rest of their lexeme with one anchored match
+_IDENT_RUN = re.compile(r"[A-Za-z0-9]*").match
+_NUMBER_RUN = re.compile(r"\d*(?:\.\d+)?").match
+_WS_RUN = re.compile(r"\s*").match
+_KEYWORD_KIND = {kw: "TYPE" for kw in _KEYWORDS}
+# Same character class as the \b around TYPE, so keyword boundaries agree with _MASTER
+_WORD_CHAR = re.compile(r"\w").match
+
+def _classify(ch: str) -> Optional[str]:
+    """Token class for a non-ASCII character (the regex classes are Unicode-aware)."""
+    if ch.isspace():
+        return "WS"
+    if ch.isdecimal():
+        return "NUMBER"
+    return None
+
 # ----------------------------------------------------------------------
 # Helpers
 # ----------------------------------------------------------------------
-def _err(msg):
-    print(f"Lexical error: {msg}")
+def _err(msg, verbose=True, diagnostics=None, position=None):
+    report(diagnostics, verbose, "lexical", "Lexical", msg, position)
+
+# ----------------------------------------------------------------------
+# Single-pass scanner
+# ----------------------------------------------------------------------
+def scan(text: str, start: int = 0
+         ) -> Tuple[List[Tuple[str, str]], List[Tuple[int, int]], Optional[int]]:
+    """
+    Tokenize `text` from offset `start` in one left-to-right pass.
+    Returns (tokens, positions, error_offset):
+      tokens        list of (KIND, LEXEME), whitespace dropped
+      positions     1-based (line, column) of each token, parallel to tokens
+      error_offset  offset of the first character that starts no token, else None
+    """
+    tokens: List[Tuple[str, str]] = []
+    positions: List[Tuple[int, int]] = []
+    add_token = tokens.append
+    add_position = positions.append
+    table = _CHAR_CLASS
+
+    pos = start
+    n = len(text)
+    line = 1
+    line_start = 0
+    if start:
+        line, column = line_col(text, start)
+        line_start = start - column + 1
+
+    while pos < n:
+        ch = text[pos]
+        code = ord(ch)
+        kind = table[code] if code < 128 else _classify(ch)
+
+        if kind == "WS":
+            end = _WS_RUN(text, pos + 1).end()
+            newlines = text.count("\n", pos, end)
+            if newlines:
+                line += newlines
+                line_start = text.rfind("\n", pos, end) + 1
+            pos = end
+            continue
+
+        if kind == "IDENT":
+            end = _IDENT_RUN(text, pos + 1).end()
+            lexeme = text[pos:end]
+            kind = _KEYWORD_KIND.get(lexeme, "IDENT")
+            if kind == "TYPE" and ((pos and _WORD_CHAR(text, pos - 1))
+                                   or _WORD_CHAR(text, end)):
+                kind = "IDENT"      # "4int", "int\u0663": no word boundary around the keyword
+        elif kind == "NUMBER":
+            end = _NUMBER_RUN(text, pos + 1).end()
+            lexeme = text[pos:end]
+        elif kind is None:
+            return tokens, positions, pos
+        else:
+            # Single-character token: ASSIGN, OP, LPAREN, RPAREN, SEMICOLON
+            end = pos + 1
+            lexeme = ch
+
+        add_token((kind, lexeme))
+        add_position((line, pos - line_start + 1))
+        pos = end
+
+    return tokens, positions, None
+
+
+def scan_recover(text: str) -> Tuple[List[Tuple[str, str]], List[Tuple[int, int]], List[int]]:
+    """
+    Tokenize `text`, which may hold several statements, recovering from
+    errors in panic mode: at a character that starts no token, the tokens of
+    the statement it is in are dropped and scanning resumes after the next
+    ';'. Returns (tokens, positions, error_offsets) where tokens and
+    positions only cover the statements that scanned cleanly, and
+    error_offsets holds the first invalid character of every other one.
+    """
+    tokens, positions, error = scan(text)
+    errors: List[int] = []
+    while error is not None:
+        errors.append(error)
+        # Keep everything up to the last ';' before the error
+        keep = len(tokens)
+        while keep and tokens[keep - 1][0] != "SEMICOLON":
+            keep -= 1
+        del tokens[keep:], positions[keep:]
+        resume = text.find(";", error) + 1
+        if not resume:
+            break
+        more_tokens, more_positions, error = scan(text, resume)
+        tokens += more_tokens
+        positions += more_positions
+    return tokens, positions, errors
 
 # ----------------------------------------------------------------------
 # Lexical analyzer function
 # ----------------------------------------------------------------------
-def test_lexical(user_input: str):
-    print("[LEXICAL ANALYSIS]")
+def test_lexical(user_input: str, verbose: bool = True,
+                 diagnostics: Optional[List[Diagnostic]] = None, recover: bool = False):
+    """
+    Tokenize one statement.
+    With verbose=False nothing is printed; errors are only appended to
+    `diagnostics` (if given).
+    With recover=True the input may hold several statements: every invalid
+    token is reported, the statements containing one are skipped (see
+    scan_recover) and the tokens of the others are returned.
+    """
+    if verbose:
+        print("[LEXICAL ANALYSIS]")
 
     if not isinstance(user_input, str):
-        _err("Input must be a string.")
+        _err("Input must be a string.", verbose, diagnostics)
         return []
     if not user_input.strip():
-        _err("Empty input.")
+        _err("Empty input.", verbose, diagnostics)
         return []
 
-    tokens = []
-    pos = 0
-    n = len(user_input)
-
-    while pos < n:
-        match = _MASTER.match(user_input, pos)
-        if not match:
-            snippet = user_input[pos:pos+10]
-            _err(f"Invalid token starting at position {pos}: {snippet!r}")
-            return []
-        kind = match.lastgroup
-        lexeme = match.group()
-        pos = match.end()
-
-        if kind != "WS":
-            tokens.append((kind, lexeme))
-
-    for kind, lexeme in tokens:
-        matches = [k for k, pat in _TOKEN_SPEC if re.fullmatch(pat, lexeme)]
-        if kind not in matches:
-            _err(f"Token {lexeme!r} misclassified as {kind}, possible match: {matches}")
+    if recover:
+        tokens, _, errors = scan_recover(user_input)
+    else:
+        tokens, _, error_pos = scan(user_input)
+        errors = [] if error_pos is None else [error_pos]
+    for error_pos in errors:
+        snippet = user_input[error_pos:error_pos+10]
+        _err(f"Invalid token starting at position {error_pos}: {snippet!r}",
+             verbose, diagnostics, line_col(user_input, error_pos))
+    if errors and not recover:
+        return []
 
     # Print and return
-    for token in tokens:
-        print(token)
-    print()
+    if verbose:
+        for token in tokens:
+            print(token)
+        print()
     return tokens
 
+# ----------------------------------------------------------------------
+# Streaming tokenizer for source files
+# ----------------------------------------------------------------------
+_READ_SIZE = 1 << 16   # bytes per read() for streams that cannot be mapped
+
+class SourceStatement(NamedTuple):
+    index: int                      # 0-based statement number in the file
+    start: int                      # byte offset of the statement's first byte
+    end: int                        # byte offset just past its ';' (or end of file)
+    line: int                       # 1-based line of the first token
+    text: str                       # statement source, surrounding whitespace stripped
+    tokens: List[Tuple[str, str]]   # (KIND, LEXEME) tokens, as from test_lexical
+    error_offset: Optional[int]     # byte offset of an invalid character, else None
+    error_position: Optional[Tuple[int, int]]   # (line, column) of that character
+
+
+class SourceChunk(NamedTuple):
+    start: int                      # byte offset of the chunk's first statement
+    end: int                        # byte offset just past its last statement
+    index: int                      # statement number of its first statement
+    line: int                       # 1-based line at `start`
+    column: int = 1                 # 1-based column at `start`
+
+
+def _mapped_chunks(data, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, bytes]]:
+    """Yield (offset, bytes) for each ';'-terminated chunk of a bytes-like buffer."""
+    pos = start
+    n = len(data) if end is None else end
+    while pos < n:
+        semi = data.find(b";", pos, n)
+        stop = n if semi < 0 else semi + 1
+        yield pos, data[pos:stop]
+        pos = stop
+
+
+def _stream_chunks(stream: BinaryIO) -> Iterator[Tuple[int, bytes]]:
+    """Same as _mapped_chunks, but reading a stream in fixed-size blocks."""
+    pending = b""
+    offset = 0
+    while True:
+        block = stream.read(_READ_SIZE)
+        if not block:
+            break
+        pending += block
+        pos = 0
+        semi = pending.find(b";")
+        while semi >= 0:
+            yield offset, pending[pos:semi + 1]
+            offset += semi + 1 - pos
+            pos = semi + 1
+            semi = pending.find(b";", pos)
+        pending = pending[pos:]
+    if pending:
+        yield offset, pending
+
+
+def _next_column(column: int, chunk: bytes) -> int:
+    """Column just past `chunk` when it starts at `column`."""
+    newline = chunk.rfind(b"\n")
+    tail = len(chunk[newline + 1:].decode("utf-8", errors="replace"))
+    return tail + 1 if newline >= 0 else column + tail
+
+
+def _is_path(source) -> bool:
+    return isinstance(source, (str, bytes, os.PathLike))
+
+
+def _source_chunks(source, span: Optional[SourceChunk] = None) -> Iterator[Tuple[int, bytes]]:
+    """Open a path (memory-mapped) or wrap a binary stream and yield its chunks."""
+    if _is_path(source):
+        with open(source, "rb") as handle:
+            if os.fstat(handle.fileno()).st_size == 0:
+                return
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if span is None:
+                    yield from _mapped_chunks(data)
+                else:
+                    yield from _mapped_chunks(data, span.start, span.end)
+    else:
+        yield from _stream_chunks(source)
+
+
+def split_source(path: Union[str, os.PathLike], statements: int) -> Iterator[SourceChunk]:
+    """
+    Cut a file into chunks of `statements` ';'-terminated statements (the
+    last chunk also holds any trailing text). Only ';' and newlines are
+    scanned; nothing is tokenized.
+    """
+    if statements < 1:
+        raise ValueError("a chunk needs at least one statement")
+    with open(path, "rb") as handle:
+        if os.fstat(handle.fileno()).st_size == 0:
+            return
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            size = len(data)
+            start, index, line, column = 0, 0, 1, 1
+            while start < size:
+                end = start
+                for _ in range(statements):
+                    semi = data.find(b";", end)
+                    if semi < 0:
+                        end = size
+                        break
+                    end = semi + 1
+                if data.find(b";", end) < 0:
+                    end = size                  # trailing text joins the last chunk
+                yield SourceChunk(start, end, index, line, column)
+                index += statements
+                line += data[start:end].count(b"\n")
+                column = _next_column(column, data[start:end])
+                start = end
+
+
+def iter_statements(source: Union[str, os.PathLike, BinaryIO],
+                    span: Optional[SourceChunk] = None) -> Iterator[SourceStatement]:
+    """
+    Lazily split a source file into statements on SEMICOLON and tokenize each.
+    `source` is a file path or a binary stream. Only one statement is held in
+    memory at a time. Trailing text without a ';' is yielded as a last
+    statement so the parser can report it; whitespace-only text is skipped.
+    With a `span` from split_source(), only that range of the file at path
+    `source` is read; indexes, lines and offsets stay file-relative.
+    """
+    if span is not None and not _is_path(source):
+        raise ValueError("a span can only be read from a file path")
+    index = 0 if span is None else span.index
+    line = 1 if span is None else span.line
+    column = 1 if span is None else span.column
+    for offset, chunk in _source_chunks(source, span):
+        text = chunk.decode("utf-8", errors="replace")
+        stripped = text.lstrip()
+        if not stripped.strip():
+            line += chunk.count(b"\n")
+            column = _next_column(column, chunk)
+            continue
+
+        lead = len(text) - len(stripped)
+        first_line = line + text.count("\n", 0, lead)
+        tokens, _, error_pos = scan(text)
+        error_offset = error_position = None
+        if error_pos is not None:
+            error_offset = offset + len(text[:error_pos].encode("utf-8"))
+            err_line, err_col = line_col(text, error_pos)
+            if err_line == 1:
+                err_col += column - 1       # the chunk may start mid-line, after a ';'
+            error_position = (line + err_line - 1, err_col)
+
+        yield SourceStatement(index, offset, offset + len(chunk), first_line,
+                              stripped.rstrip(), tokens, error_offset, error_position)
+        index += 1
+        line += chunk.count(b"\n")
+        column = _next_column(column, chunk)
+
+
+def iter_tokens(source: Union[str, os.PathLike, BinaryIO]) -> Iterator[Tuple[str, str]]:
+    """Yield (KIND, LEXEME) tokens of a whole source file, one at a time."""
+    for statement in iter_statements(source):
+        yield from statement.tokens
+
 # ----------------------------------------------------------------------
 # Unit Test Suite
 # ----------------------------------------------------------------------
@@ -108,6 +409,11 @@ def _test_suite():
         "x = 10;": [
             ("IDENT", "x"), ("ASSIGN", "="), ("NUMBER", "10"), ("SEMICOLON", ";")
         ],
+        "int z=(2+3)*-5;": [
+            ("TYPE", "int"), ("IDENT", "z"), ("ASSIGN", "="), ("LPAREN", "("),
+            ("NUMBER", "2"), ("OP", "+"), ("NUMBER", "3"), ("RPAREN", ")"),
+            ("OP", "*"), ("OP", "-"), ("NUMBER", "5"), ("SEMICOLON", ";")
+        ],
     }
 
     for src, expected in tests.items():
@@ -118,6 +424,98 @@ def _test_suite():
         else:
             print("FAIL\nExpected:", expected, "\nGot:", result, "\n")
 
+    # Token positions recorded by the scanner
+    position_tests = {
+        "int y\n  = 4;": [(1, 1), (1, 5), (2, 3), (2, 5), (2, 6)],
+        "4int;": [(1, 1), (1, 2), (1, 5)],
+    }
+
+    for src, expected in position_tests.items():
+        print(f"--- Positions: {src!r} ---")
+        _, result, _ = scan(src)
+        if result == expected:
+            print("PASS\n")
+        else:
+            print("FAIL\nExpected:", expected, "\nGot:", result, "\n")
+
+    # The scanner must agree with the master regex, including Unicode word boundaries
+    def regex_tokens(text):
+        tokens, pos = [], 0
+        while pos < len(text):
+            match = _MASTER.match(text, pos)
+            if not match:
+                return tokens, pos
+            if match.lastgroup != "WS":
+                tokens.append((match.lastgroup, match.group()))
+            pos = match.end()
+        return tokens, None
+
+    for src in ("int x = 4;", "4int;", "int\u0663", "\u0663int", "double\u0663 = 1;", "int_"):
+        print(f"--- Scanner vs regex: {src!r} ---")
+        tokens, _, error_pos = scan(src)
+        expected = regex_tokens(src)
+        if (tokens, error_pos) == expected:
+            print("PASS\n")
+        else:
+            print("FAIL\nExpected:", expected, "\nGot:", (tokens, error_pos), "\n")
+
+    # Streaming statements with byte offsets
+    import io
+    source = b"int y = 4 + 3;\ndouble a=7.5;\n\nint $ = 1;\nx = 10"
+    expected = [
+        (0, 0, 14, 1, "int y = 4 + 3;", None),
+        (1, 14, 28, 2, "double a=7.5;", None),
+        (2, 28, 40, 4, "int $ = 1;", 34),
+        (3, 40, 47, 5, "x = 10", None),
+    ]
+    print("--- Streaming: iter_statements ---")
+    result = [(st.index, st.start, st.end, st.line, st.text, st.error_offset)
+              for st in iter_statements(io.BytesIO(source))]
+    if result == expected:
+        print("PASS\n")
+    else:
+        print("FAIL\nExpected:", expected, "\nGot:", result, "\n")
+
+    # Error columns count from the start of the line, not of the statement
+    print("--- Streaming: error column after a ';' on the same line ---")
+    same_line = b"int a = 1; int b = $;\nint $;"
+    result = [st.error_position for st in iter_statements(io.BytesIO(same_line))]
+    if result == [None, (1, 20), (2, 5)]:
+        print("PASS\n")
+    else:
+        print("FAIL\nExpected:", [None, (1, 20), (2, 5)], "\nGot:", result, "\n")
+
+    # Chunks of a file stream the same statements as the whole file
+    import tempfile
+    print("--- Streaming: split_source chunks ---")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "source.txt")
+        with open(path, "wb") as handle:
+            handle.write(source)
+        spans = list(split_source(path, 2))
+        result = [st for span in spans for st in iter_statements(path, span)]
+        with open(path, "wb") as handle:
+            handle.write(same_line)     # a span that starts mid-line keeps file columns
+        mid_line = [st for span in split_source(path, 1) for st in iter_statements(path, span)]
+        if (result == list(iter_statements(io.BytesIO(source))) and [s.index for s in spans] == [0, 2]
+                and mid_line == list(iter_statements(path))):
+            print("PASS\n")
+        else:
+            print("FAIL\nGot:", spans, result, mid_line, "\n")
+
+    # Panic-mode recovery: skip to the next ';' and keep scanning
+    print("--- Recovery: every invalid token is reported ---")
+    source = "int a = 1;\nint b = 2 $ 3 # 4;\nint c = a;\nint d = @"
+    diagnostics = []
+    result = test_lexical(source, False, diagnostics, recover=True)
+    expected = [("TYPE", "int"), ("IDENT", "a"), ("ASSIGN", "="), ("NUMBER", "1"), ("SEMICOLON", ";"),
+                ("TYPE", "int"), ("IDENT", "c"), ("ASSIGN", "="), ("IDENT", "a"), ("SEMICOLON", ";")]
+    positions = [d.position for d in diagnostics]
+    if result == expected and positions == [(2, 11), (4, 9)]:
+        print("PASS\n")
+    else:
+        print("FAIL\nExpected:", expected, [(2, 11), (4, 9)], "\nGot:", result, positions, "\n")
+
 # ----------------------------------------------------------------------
 # Run tests if executed directly
 # ----------------------------------------------------------------------
@@ -0,0 +1,279 @@
+"""
+===== Metrics.py =====
+
+Per-phase instrumentation for the compiler.
+
+A Metrics object passed to the compile functions (or to a CompilerSession)
+records, for every phase the statement went through:
+    calls, wall time and CPU time (of the compiling thread)
+and, per finished statement:
+    statements, cache hits, tokens, AST nodes, TAC / optimized TAC /
+    assembly instructions, and failures by phase and error kind
+
+Phases are timed as: lexical, syntax, semantic, intermediate, optimizer,
+assembler, execute. The error kind is the first diagnostic's message with
+quoted names and numbers blanked ("variable '_' is not declared."), so
+failures group without one label per variable.
+
+    metrics = Metrics()
+    compile_statement("int y = 4 + 3;", metrics=metrics)
+    print(metrics.dump("prometheus"))
+
+Hooks let a caller run code around one phase, e.g. a profiler:
+
+    profile = cProfile.Profile()
+    metrics.add_hook("syntax", profiler_hook(profile))
+
+A hook is a callable taking the phase name and returning a context manager
+that is entered around every run of that phase. When no Metrics object is
+given the compiler calls each phase through a plain pass-through function,
+so the instrumentation costs nothing measurable when disabled (see
+`Benchmarks.py metrics`).
+"""
+
+import contextlib
+import cProfile
+import json
+import re
+import threading
+import time
+from typing import Any, Callable, ContextManager, Dict, List, Tuple
+
+from Diagnostics import PHASES
+from SyntaxTree import count_nodes
+
+TIMED_PHASES = ("lexical", "syntax", "semantic", "intermediate", "optimizer", "assembler", "execute")
+FORMATS = ("json", "prometheus")
+
+_QUOTED = re.compile(r"'[^']*'")
+_NUMBER = re.compile(r"\d+")
+
+Hook = Callable[[str], ContextManager]
+
+
+def error_kind(message: str) -> str:
+    """A diagnostic message with quoted parts and numbers blanked out."""
+    return _NUMBER.sub("N", _QUOTED.sub("'_'", message))
+
+
+def profiler_hook(profiler: cProfile.Profile) -> Hook:
+    """Hook that enables `profiler` (cProfile or anything with enable/disable) for the phase."""
+    @contextlib.contextmanager
+    def hook(phase: str):
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+    return hook
+
+
+class Metrics:
+    """Counters and timers for compiled statements; safe to share across threads."""
+
+    _COUNTS = ("statements", "cache_hits", "tokens", "ast_nodes",
+               "ir_instructions", "optimized_instructions", "asm_instructions")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hooks: Dict[str, List[Hook]] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        """Zero every timer and counter (hooks are kept)."""
+        with self._lock:
+            self.calls = dict.fromkeys(TIMED_PHASES, 0)
+            self.wall = dict.fromkeys(TIMED_PHASES, 0.0)
+            self.cpu = dict.fromkeys(TIMED_PHASES, 0.0)
+            self.counts = dict.fromkeys(self._COUNTS, 0)
+            self.failures: Dict[Tuple[str, str], int] = {}
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+    def add_hook(self, phase: str, hook: Hook) -> None:
+        """Run `hook(phase)` as a context manager around every run of `phase`."""
+        if phase not in TIMED_PHASES:
+            raise ValueError(f"unknown phase {phase!r}; expected one of {', '.join(TIMED_PHASES)}")
+        self._hooks.setdefault(phase, []).append(hook)
+
+    def remove_hooks(self, phase: str) -> None:
+        self._hooks.pop(phase, None)
+
+    def run(self, phase: str, function: Callable, *args):
+        """Call function(*args) as `phase`: timed, with that phase's hooks around it."""
+        hooks = self._hooks.get(phase)
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            if not hooks:
+                return function(*args)
+            with contextlib.ExitStack() as stack:
+                for hook in hooks:
+                    stack.enter_context(hook(phase))
+                return function(*args)
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+            with self._lock:
+                self.calls[phase] += 1
+                self.wall[phase] += wall
+                self.cpu[phase] += cpu
+
+    def record(self, result, cached: bool = False) -> None:
+        """Count a finished CompileResult."""
+        counts = (
+            1, int(cached), len(result.tokens),
+            count_nodes(result.ast.expression) if result.ast is not None else 0,
+            len(result.ir), len(result.optimized), len(result.asm),
+        )
+        failure = None
+        if result.failed_phase is not None:
+            message = result.diagnostics[0].message if result.diagnostics else ""
+            failure = (result.failed_phase, error_kind(message))
+        with self._lock:
+            for name, count in zip(self._COUNTS, counts):
+                self.counts[name] += count
+            if failure is not None:
+                self.failures[failure] = self.failures.get(failure, 0) + 1
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+    def snapshot(self) -> Dict[str, Any]:
+        """Everything recorded so far as plain dicts."""
+        with self._lock:
+            by_phase = {phase: 0 for phase in PHASES}
+            for (phase, _), count in self.failures.items():
+                by_phase[phase] = by_phase.get(phase, 0) + count
+            return {
+                "phases": {phase: {"calls": self.calls[phase], "wall_seconds": self.wall[phase],
+                                   "cpu_seconds": self.cpu[phase]} for phase in TIMED_PHASES},
+                "counts": dict(self.counts),
+                "failures": by_phase,
+                "failures_by_kind": [{"phase": phase, "kind": kind, "count": count}
+                                     for (phase, kind), count in sorted(self.failures.items())],
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format."""
+        data = self.snapshot()
+        lines: List[str] = []
+
+        def family(name: str, help_text: str, samples) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in samples:
+                text = ",".join(f'{key}="{_escape(label)}"' for key, label in labels)
+                lines.append(f"{name}{{{text}}} {value}" if text else f"{name} {value}")
+
+        phases = data["phases"]
+        family("compiler_phase_calls_total", "Runs of each compiler phase.",
+               [((("phase", p),), phases[p]["calls"]) for p in TIMED_PHASES])
+        family("compiler_phase_seconds_total", "Wall time spent in each compiler phase.",
+               [((("phase", p),), repr(phases[p]["wall_seconds"])) for p in TIMED_PHASES])
+        family("compiler_phase_cpu_seconds_total", "CPU time spent in each compiler phase.",
+               [((("phase", p),), repr(phases[p]["cpu_seconds"])) for p in TIMED_PHASES])
+        for name, count in data["counts"].items():
+            family(f"compiler_{name}_total", f"Total {name.replace('_', ' ')}.", [((), count)])
+        family("compiler_failures_total", "Failed statements by phase and error kind.",
+               [((("phase", f["phase"]), ("kind", f["kind"])), f["count"])
+                for f in data["failures_by_kind"]])
+        return "\n".join(lines) + "\n"
+
+    def dump(self, fmt: str = "json") -> str:
+        """The metrics as "json" or "prometheus" text."""
+        if fmt == "json":
+            return self.to_json()
+        if fmt == "prometheus":
+            return self.to_prometheus()
+        raise ValueError(f"unknown metrics format {fmt!r}; expected one of {', '.join(FORMATS)}")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+# ----------------------------------------------------------------------
+# Test Suite for the metrics
+# ----------------------------------------------------------------------
+def test_metrics_suite():
+    from Compiler import CompilerSession, compile_statement     # Compiler imports this module
+
+    print("===== Running Metrics Test Suite =====\n")
+
+    metrics = Metrics()
+    session = CompilerSession(cache_size=8, metrics=metrics)
+    for source in ("int y = 4 + 3;", "int y = 4 + 3;", "int z = y * 2;",
+                   "int a = b + 1;", "int c = d + 1;", "int $ = 1;"):
+        session.compile(source)
+    data = metrics.snapshot()
+    text = metrics.dump("prometheus")
+
+    entered = []
+
+    @contextlib.contextmanager
+    def hook(phase):
+        entered.append(phase)
+        yield
+
+    hooked = Metrics()
+    hooked.add_hook("assembler", hook)
+    profile = cProfile.Profile()
+    hooked.add_hook("syntax", profiler_hook(profile))
+    compile_statement("int w = (1 + 2) * 3;", metrics=hooked)
+    profiled = {entry.code.co_name for entry in profile.getstats() if not isinstance(entry.code, str)}
+
+    tests = [
+        {
+            "name": "Statements, cache hits and counts",
+            "result": (data["counts"]["statements"], data["counts"]["cache_hits"],
+                       data["counts"]["tokens"], data["phases"]["lexical"]["calls"],
+                       data["phases"]["execute"]["calls"]),
+            "expected": (6, 1, 7 + 7 + 7 + 7 + 7, 5, 2)
+        },
+        {
+            "name": "Failures by phase and kind",
+            "result": (data["failures"]["semantic"], data["failures"]["lexical"],
+                       data["failures_by_kind"][1]),
+            "expected": (2, 1, {"phase": "semantic", "kind": "variable '_' is not declared.", "count": 2})
+        },
+        {
+            "name": "Prometheus text",
+            "result": ('compiler_phase_calls_total{phase="syntax"} 4' in text,
+                       "compiler_statements_total 6" in text,
+                       'compiler_failures_total{phase="semantic",kind="variable \'_\' is not declared."} 2'
+                       in text),
+            "expected": (True, True, True)
+        },
+        {
+            "name": "JSON dump round-trips",
+            "result": json.loads(metrics.dump("json")),
+            "expected": metrics.snapshot()
+        },
+        {
+            "name": "Hooks run around their phase only",
+            "result": (entered, "test_syntax" in profiled, "test_semantic" in profiled),
+            "expected": (["assembler"], True, False)
+        },
+    ]
+
+    passed = 0
+    for case in tests:
+        print(f"--- {case['name']} ---")
+        if case["result"] == case["expected"]:
+            print("PASS\n")
+            passed += 1
+        else:
+            print("FAIL")
+            print("Expected:", case["expected"])
+            print("Got:", case["result"], "\n")
+
+    print(f"Summary: {passed}/{len(tests)} tests passed.\n")
+
+
+# ----------------------------------------------------------------------
+# Run suite if executed directly
+# ----------------------------------------------------------------------
+if __name__ == "__main__":
+    test_metrics_suite()
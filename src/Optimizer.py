@@ -0,0 +1,405 @@
+"""
+===== Optimizer.py =====
+
+Optimization passes over the three-address code produced by the
+intermediate code generator, and a small evaluator that computes a
+statement's answer from (optimized) TAC.
+
+Constant folding evaluates every instruction whose operands are all
+literals, using the same arithmetic as Assembler._compute, so int
+statements truncate after every operation (C-like) and double statements
+stay floating point. Folded temporaries are substituted into the
+instructions that use them and their own instructions are dropped:
+
+    int z = (2 + 3) * -(4 - 1);
+
+    t1 = 2 + 3                          z = -15
+    t2 = 4 - 1
+    t3 = minus t2           ->
+    t4 = t1 * t3
+    z = t4
+
+Instructions that read variables are kept (their operands are still
+folded), and a division whose divisor folds to zero is left in place so the
+error is raised when the code is evaluated.
+
+optimize() runs the local passes in order, each over one statement's TAC:
+    constant folding        as above
+    value numbering         a repeated operation becomes a copy of its first result
+    copy propagation        uses of copies read the source; the final
+                            "y = tN" copy is merged into tN's instruction
+    dead code elimination   instructions the final store does not need are dropped
+
+    int y = (a + b) * (b + a);      t1 = a + b
+                                    y = t1 * t1
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from Assembler import _compute
+from QuadIR import parse_literal as _literal
+
+# ----------------------------------------------------------------------
+# Operands
+# ----------------------------------------------------------------------
+_INF = float("inf")
+
+# Operand positions in "a", "minus a" and "a op b"
+_OPERANDS = {1: (0,), 2: (1,), 3: (0, 2)}
+
+
+def _fold(var_type: str, parts: List[str], values: List[Any]):
+    """Fold one instruction, or return None if it must be left to run time."""
+    if len(parts) == 1:
+        return values[0]
+    if len(parts) == 2:
+        value = -values[0]
+    elif parts[1] == "/" and values[1] == 0:
+        return None
+    else:
+        value = _compute(var_type, parts[1], values[0], values[1])[0]
+    # inf / nan have no literal form in TAC; leave them to run time
+    return value if value == value and value not in (_INF, -_INF) else None
+
+
+# ----------------------------------------------------------------------
+# Constant folding
+# ----------------------------------------------------------------------
+def fold_constants(code: List[str], var_type: str) -> List[str]:
+    """
+    Fold constant instructions in the TAC of one `var_type` statement.
+    The last instruction is the store to the declared variable and is always
+    kept; a fully constant statement reduces to that single store.
+    """
+    constants: Dict[str, Any] = {}
+    folded: List[str] = []
+    last = len(code) - 1
+    for index, line in enumerate(code):
+        dest, rhs = line.split(" = ", 1)
+        parts = rhs.split(" ")
+        values = []
+        for position in _OPERANDS[len(parts)]:
+            value = constants.get(parts[position])
+            if value is None:
+                value = _literal(parts[position])
+            if value is not None:
+                parts[position] = repr(value)
+            values.append(value)
+
+        value = None if None in values else _fold(var_type, parts, values)
+        if value is not None:
+            constants[dest] = value
+            if index != last:
+                continue
+            parts = [repr(value)]
+        folded.append(f"{dest} = {' '.join(parts)}")
+    return folded
+
+
+def is_constant(code: List[str]) -> bool:
+    """True if folding reduced the statement to a single literal store."""
+    if len(code) != 1:
+        return False
+    rhs = code[0].split(" = ", 1)[1]
+    return " " not in rhs and _literal(rhs) is not None
+
+# ----------------------------------------------------------------------
+# Local value numbering
+# ----------------------------------------------------------------------
+_COMMUTATIVE = ("+", "*")
+
+def value_numbering(code: List[str], var_type: str) -> List[str]:
+    """
+    Remove common subexpressions. Every name in a statement's TAC is assigned
+    once (temporaries are fresh, variables are only read), so an operation
+    is identified by its operator and operand names; operands of + and * are
+    ordered so a + b and b + a share a value. A repeated operation becomes a
+    copy of the temporary that first computed it.
+    """
+    available: Dict[Tuple[str, ...], str] = {}
+    numbered: List[str] = []
+    last = len(code) - 1
+    for index, line in enumerate(code):
+        dest, rhs = line.split(" = ", 1)
+        parts = rhs.split(" ")
+        if len(parts) > 1 and index != last:
+            if len(parts) == 2:
+                key = tuple(parts)
+            elif parts[1] in _COMMUTATIVE and parts[2] < parts[0]:
+                key = (parts[1], parts[2], parts[0])
+            else:
+                key = (parts[1], parts[0], parts[2])
+            holder = available.get(key)
+            if holder is not None:
+                numbered.append(f"{dest} = {holder}")
+                continue
+            available[key] = dest
+        numbered.append(line)
+    return numbered
+
+# ----------------------------------------------------------------------
+# Copy propagation
+# ----------------------------------------------------------------------
+def propagate_copies(code: List[str], var_type: str) -> List[str]:
+    """
+    Replace uses of copied temporaries (t2 = t1) with their source and drop
+    the copies. The final store's copy (y = t3) is merged into the
+    instruction that computes t3 when that is the only use of t3.
+    """
+    copies: Dict[str, str] = {}
+    uses: Dict[str, int] = {}
+    propagated: List[List[str]] = []
+    last = len(code) - 1
+    for index, line in enumerate(code):
+        dest, rhs = line.split(" = ", 1)
+        parts = rhs.split(" ")
+        for position in _OPERANDS[len(parts)]:
+            name = copies.get(parts[position], parts[position])
+            parts[position] = name
+            uses[name] = uses.get(name, 0) + 1
+        if len(parts) == 1 and index != last:
+            copies[dest] = parts[0]
+            uses[parts[0]] -= 1
+            continue
+        propagated.append([dest] + parts)
+
+    store = propagated[-1]
+    if len(store) == 2 and len(propagated) > 1:
+        previous = propagated[-2]
+        if previous[0] == store[1] and uses[store[1]] == 1:
+            propagated[-2:] = [[store[0]] + previous[1:]]
+    return [f"{line[0]} = {' '.join(line[1:])}" for line in propagated]
+
+# ----------------------------------------------------------------------
+# Dead code elimination
+# ----------------------------------------------------------------------
+def eliminate_dead_code(code: List[str], var_type: str) -> List[str]:
+    """Drop instructions whose result is never used by the final store."""
+    live = set()
+    kept: List[str] = []
+    for index in range(len(code) - 1, -1, -1):
+        line = code[index]
+        dest, rhs = line.split(" = ", 1)
+        if index != len(code) - 1 and dest not in live:
+            continue
+        parts = rhs.split(" ")
+        for position in _OPERANDS[len(parts)]:
+            live.add(parts[position])
+        kept.append(line)
+    kept.reverse()
+    return kept
+
+# ----------------------------------------------------------------------
+# Pass pipeline
+# ----------------------------------------------------------------------
+class PassStats(NamedTuple):
+    name: str
+    removed: int        # instructions removed by the pass
+    temps_saved: int    # temporaries no longer computed after the pass
+
+
+_PASSES = (
+    ("constant folding", fold_constants),
+    ("value numbering", value_numbering),
+    ("copy propagation", propagate_copies),
+    ("dead code elimination", eliminate_dead_code),
+)
+
+
+def _temp_count(code: List[str]) -> int:
+    """Distinct temporaries that compute a value; a copy (t2 = t1) only renames one."""
+    return len({line.split(" = ", 1)[0] for line in code[:-1] if " " in line.split(" = ", 1)[1]})
+
+
+def optimize(code: List[str], var_type: str,
+             stats: Optional[List[PassStats]] = None) -> List[str]:
+    """
+    Run every pass in order over the TAC of one statement. If `stats` is a
+    list, one PassStats per pass is appended to it.
+    """
+    for name, run in _PASSES:
+        optimized = run(code, var_type)
+        if stats is not None:
+            stats.append(PassStats(name, len(code) - len(optimized),
+                                   _temp_count(code) - _temp_count(optimized)))
+        code = optimized
+    return code
+
+# ----------------------------------------------------------------------
+# TAC evaluation
+# ----------------------------------------------------------------------
+def evaluate_ir(code: List[str], var_type: str,
+                variables: Optional[Dict[str, Any]] = None) -> Tuple[str, Any]:
+    """
+    Run the TAC of one statement and return (identifier, value) of its final
+    store. `variables` maps the names of referenced variables to their values;
+    it is only read, so a caller may pass its whole environment without a copy.
+    Raises ZeroDivisionError if the code divides by zero.
+    """
+    variables = variables or {}
+    temps: Dict[str, Any] = {}
+
+    def read(operand: str):
+        value = _literal(operand)
+        if value is not None:
+            return value
+        return temps[operand] if operand in temps else variables[operand]
+
+    dest = None
+    for line in code:
+        dest, rhs = line.split(" = ", 1)
+        parts = rhs.split(" ")
+        if len(parts) == 1:
+            temps[dest] = read(parts[0])
+        elif len(parts) == 2:
+            temps[dest] = -read(parts[1])
+        else:
+            temps[dest] = _compute(var_type, parts[1], read(parts[0]), read(parts[2]))[0]
+    return dest, temps[dest]
+
+
+def test_optimizer(code: List[str], var_type: str, verbose: bool = True,
+                   stats: Optional[List[PassStats]] = None) -> List[str]:
+    """Run the optimization passes over `code` and return the optimized TAC."""
+    if verbose:
+        print("[OPTIMIZATION]")
+    optimized = optimize(code, var_type, stats)
+    if verbose:
+        for line in optimized:
+            print(line)
+        print()
+    return optimized
+
+# ----------------------------------------------------------------------
+# Test Suite for the Optimizer
+# ----------------------------------------------------------------------
+def test_optimizer_suite():
+    print("===== Running Optimizer Test Suite =====\n")
+
+    tests = [
+        {
+            "name": "Fully constant int statement folds to one store",
+            "input": (["t1 = 2 + 3", "t2 = 4 - 1", "t3 = minus t2", "t4 = t1 * t3", "z = t4"], "int"),
+            "expected": (["z = -15"], -15)
+        },
+        {
+            "name": "Int division truncates at every step",
+            "input": (["t1 = 7 / 2", "t2 = t1 * 2", "q = t2"], "int"),
+            "expected": (["q = 6"], 6)
+        },
+        {
+            "name": "Double folding keeps fractions",
+            "input": (["t1 = 7.0 / 2.0", "t2 = t1 * 2.0", "d = t2"], "double"),
+            "expected": (["d = 7.0"], 7.0)
+        },
+        {
+            "name": "Variables stop folding; constant operands are substituted",
+            "input": (["t1 = 2 * 3", "t2 = x + t1", "t3 = t2 - 1", "y = t3"], "int"),
+            "expected": (["t2 = x + 6", "t3 = t2 - 1", "y = t3"], 10)
+        },
+        {
+            "name": "Division by a folded zero is left for run time",
+            "input": (["t1 = 2 - 2", "t2 = 5 / t1", "y = t2"], "int"),
+            "expected": (["t2 = 5 / 0", "y = t2"], ZeroDivisionError)
+        },
+        {
+            "name": "Negating 0.0 folds to -0.0",
+            "input": (["t1 = 1.0 - 1.0", "t2 = minus t1", "y = t2"], "double"),
+            "expected": (["y = -0.0"], -0.0)
+        },
+        {
+            "name": "Bare literal",
+            "input": (["a = 7.5"], "double"),
+            "expected": (["a = 7.5"], 7.5)
+        },
+    ]
+
+    passed = 0
+    for case in tests:
+        print(f"--- {case['name']} ---")
+        code, var_type = case["input"]
+        folded = fold_constants(code, var_type)
+        try:
+            value = evaluate_ir(folded, var_type, {"x": 5})[1]
+        except ZeroDivisionError:
+            value = ZeroDivisionError
+        result = (folded, value)
+        if result == case["expected"]:
+            print("PASS\n")
+            passed += 1
+        else:
+            print("FAIL")
+            print("Expected:", case["expected"])
+            print("Got:", result, "\n")
+
+    # The full pipeline removes common subexpressions and the final copy
+    print("--- Value numbering, copy propagation and per-pass stats ---")
+    stats: List[PassStats] = []
+    code = ["t1 = a + b", "t2 = b + a", "t3 = t1 * t2", "t4 = a + b",
+            "t5 = minus t4", "t6 = t3 - t5", "y = t6"]
+    result = (optimize(code, "int", stats), [tuple(s[1:]) for s in stats])
+    expected = (["t1 = a + b", "t3 = t1 * t1", "t5 = minus t1", "y = t3 - t5"],
+                [(0, 0), (0, 2), (3, 1), (0, 0)])
+    if result == expected and evaluate_ir(result[0], "int", {"a": 2, "b": 3})[1] == 30:
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL")
+        print("Expected:", expected)
+        print("Got:", result, "\n")
+
+    print("--- Dead code elimination ---")
+    result = eliminate_dead_code(["t1 = a * 2", "t2 = a - 1", "y = t2"], "int")
+    if result == ["t2 = a - 1", "y = t2"]:
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL")
+        print("Got:", result, "\n")
+
+    # Differential fuzz: optimized TAC of random statements answers like the original
+    import random
+    from IntermediateCodeGenerator import test_intermediate
+    from SyntaxTree import BinOp, Neg, Statement, Var
+
+    def expression(rng, var_type, depth):
+        if depth == 0 or rng.random() < 0.25:
+            if rng.random() < 0.5:
+                return Var(rng.choice("ab"))
+            return rng.randint(0, 9) + (0 if var_type == "int" else 0.5)
+        if rng.random() < 0.15:
+            return Neg(expression(rng, var_type, depth - 1))
+        return BinOp(rng.choice("+-*/"), expression(rng, var_type, depth - 1),
+                     expression(rng, var_type, depth - 1))
+
+    print("--- Fuzz: optimize() against unoptimized TAC ---")
+    rng = random.Random(11)
+    failures = []
+    for _ in range(2000):
+        var_type = rng.choice(("int", "double"))
+        statement = Statement(var_type, "y", expression(rng, var_type, 4))
+        code = test_intermediate(statement, verbose=False)
+        variables = {"a": rng.randint(-5, 5), "b": rng.randint(-5, 5)}
+        answers = []
+        for program in (code, optimize(code, var_type)):
+            try:
+                answers.append(evaluate_ir(program, var_type, variables)[1])
+            except ZeroDivisionError:
+                answers.append(ZeroDivisionError)
+        if answers[0] != answers[1]:
+            failures.append((var_type, code, answers))
+    if not failures:
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL")
+        print("Got:", failures[:3], "\n")
+
+    print(f"Summary: {passed}/{len(tests) + 3} tests passed.\n")
+
+
+# ----------------------------------------------------------------------
+# Run suite if executed directly
+# ----------------------------------------------------------------------
+if __name__ == "__main__":
+    test_optimizer_suite()
@@ -0,0 +1,243 @@
+"""
+===== Peephole.py =====
+
+Peephole optimizer for the assembly produced by the Assembler, with a
+per-instruction cycle cost model.
+
+Rewrites, applied in one forward pass over the instruction stream:
+    redundant load    ST x, R1 / ... / LD R2, x    ->  LD R2, R1   (or nothing if R2 is R1)
+                      while R1 still holds x
+    memory operand    ADD R3, x                    ->  ADD R3, R1   likewise
+    identity ops      ADD R1, 0   SUB R1, 0   MUL R1, 1   DIV R1, 1
+                      SUBF R1, 0.0   MULF R1, 1.0   DIVF R1, 1.0        ->  removed
+                      (ADDF R1, 0.0 is kept: -0.0 + 0.0 is +0.0)
+    strength          MUL R1, 8   ->  SHL R1, 3
+    reduction         DIV R1, 8   ->  SHR R1, 3    (int only)
+
+SHR divides by 2**k rounding toward zero, like C's signed division; a
+machine does this as a sign bias plus an arithmetic shift, which the cost
+model charges as two cycles.
+
+The pass works on a single statement or on the concatenated assembly of a
+whole program, where a statement that reloads the variable the previous
+one just stored is the common case:
+
+    LD R1, 3 / ST x, R1 / LD R1, x / MUL R1, 4 / ST y, R1
+ -> LD R1, 3 / ST x, R1 / SHL R1, 2 / ST y, R1
+"""
+
+import re
+from typing import Dict, List, NamedTuple, Optional, Set
+
+from QuadIR import parse_literal
+
+# ----------------------------------------------------------------------
+# Cost model (estimated cycles)
+# ----------------------------------------------------------------------
+CYCLES = {
+    "LD": 1, "LDF": 1,
+    "ST": 4, "STF": 4,
+    "ADD": 1, "SUB": 1, "MUL": 3, "DIV": 25,
+    "ADDF": 3, "SUBF": 3, "MULF": 5, "DIVF": 15,
+    "NEG": 1, "NEGF": 1,
+    "SHL": 1, "SHR": 2,
+}
+MEMORY_CYCLES = 3       # extra cycles when the source operand is in memory
+
+_REGISTER = re.compile(r"R\d+$")
+_IDENTITY = {"ADD": 0, "SUB": 0, "MUL": 1, "DIV": 1,
+             "SUBF": 0.0, "MULF": 1.0, "DIVF": 1.0}
+_SHIFTS = {"MUL": "SHL", "DIV": "SHR"}
+_WRITES_REGISTER = frozenset(CYCLES) - {"ST", "STF"}
+
+
+def _split(line: str):
+    """'ADD R1, 2' -> ('ADD', ['R1', '2'])"""
+    mnemonic, _, rest = line.partition(" ")
+    return mnemonic, rest.split(", ")
+
+
+def _in_memory(operand: str) -> bool:
+    return not _REGISTER.match(operand) and parse_literal(operand) is None
+
+
+def instruction_cycles(line: str) -> int:
+    """Estimated cycles of one instruction."""
+    mnemonic, args = _split(line)
+    cycles = CYCLES[mnemonic]
+    if mnemonic not in ("ST", "STF") and len(args) == 2 and _in_memory(args[1]):
+        cycles += MEMORY_CYCLES
+    return cycles
+
+
+def estimate_cycles(code: List[str]) -> int:
+    """Estimated cycles of an instruction sequence (no overlap between instructions)."""
+    return sum(instruction_cycles(line) for line in code)
+
+# ----------------------------------------------------------------------
+# Peephole pass
+# ----------------------------------------------------------------------
+class PeepholeStats(NamedTuple):
+    instructions_before: int
+    instructions_after: int
+    cycles_before: int
+    cycles_after: int
+
+
+def _power_of_two(operand: str) -> Optional[int]:
+    """k if operand is the int literal 2**k (k >= 1), else None."""
+    value = parse_literal(operand)
+    if type(value) is int and value > 1 and value & (value - 1) == 0:
+        return value.bit_length() - 1
+    return None
+
+
+def peephole(code: List[str], stats: Optional[List[PeepholeStats]] = None) -> List[str]:
+    """
+    Apply the peephole rewrites to an assembly stream and return the new
+    stream. If `stats` is a list, one PeepholeStats is appended to it.
+    """
+    holds: Dict[str, str] = {}          # memory operand -> register holding its value
+    held_by: Dict[str, Set[str]] = {}   # register -> memory operands it holds
+
+    def forget_register(register: str) -> None:
+        for memory in held_by.pop(register, ()):
+            del holds[memory]
+
+    def remember(memory: str, register: str) -> None:
+        old = holds.get(memory)
+        if old is not None:
+            held_by[old].discard(memory)
+        holds[memory] = register
+        held_by.setdefault(register, set()).add(memory)
+
+    optimized: List[str] = []
+    for line in code:
+        mnemonic, args = _split(line)
+
+        if mnemonic in ("ST", "STF"):
+            memory, register = args
+            optimized.append(line)
+            remember(memory, register)
+            continue
+
+        if mnemonic in ("LD", "LDF"):
+            register, source = args
+            if source == register:
+                continue
+            holder = holds.get(source)
+            if holder == register:
+                continue                                        # value is already there
+            if holder is not None:
+                line = f"{mnemonic} {register}, {holder}"       # register move
+            forget_register(register)
+            optimized.append(line)
+            if _in_memory(source):
+                remember(source, register)
+            continue
+
+        if len(args) == 2:
+            register, operand = args
+            holder = holds.get(operand)
+            if holder is not None:
+                operand = holder
+                line = f"{mnemonic} {register}, {operand}"              # read the register
+            identity = _IDENTITY.get(mnemonic)
+            if identity is not None:
+                value = parse_literal(operand)
+                if value == identity and type(value) is type(identity):
+                    continue
+            shift = _power_of_two(operand) if mnemonic in _SHIFTS else None
+            if shift is not None:
+                line = f"{_SHIFTS[mnemonic]} {register}, {shift}"
+
+        if mnemonic in _WRITES_REGISTER:
+            forget_register(args[0])
+        optimized.append(line)
+
+    if stats is not None:
+        stats.append(PeepholeStats(len(code), len(optimized),
+                                   estimate_cycles(code), estimate_cycles(optimized)))
+    return optimized
+
+# ----------------------------------------------------------------------
+# Test Suite for the peephole optimizer
+# ----------------------------------------------------------------------
+def test_peephole_suite():
+    print("===== Running Peephole Optimizer Test Suite =====\n")
+
+    tests = [
+        {
+            "name": "Reload of a just-stored variable is dropped",
+            "input": ["LD R1, 3", "ST x, R1", "LD R1, x", "MUL R1, 4", "ST y, R1"],
+            "expected": ["LD R1, 3", "ST x, R1", "SHL R1, 2", "ST y, R1"]
+        },
+        {
+            "name": "Reload into another register becomes a move",
+            "input": ["LD R1, 3", "ST x, R1", "LD R2, 5", "SUB R2, 1", "LD R3, x", "ADD R3, R2", "ST y, R3"],
+            "expected": ["LD R1, 3", "ST x, R1", "LD R2, 5", "SUB R2, 1", "LD R3, R1", "ADD R3, R2", "ST y, R3"]
+        },
+        {
+            "name": "Overwritten register is not reused",
+            "input": ["ST x, R1", "ADD R1, 2", "LD R1, x", "ST y, R1"],
+            "expected": ["ST x, R1", "ADD R1, 2", "LD R1, x", "ST y, R1"]
+        },
+        {
+            "name": "Identity operations are removed",
+            "input": ["LD R1, a", "ADD R1, 0", "MUL R1, 1", "DIV R1, 1", "ST y, R1",
+                      "LDF R1, d", "ADDF R1, 0.0", "MULF R1, 1.0", "STF e, R1"],
+            "expected": ["LD R1, a", "ST y, R1", "LDF R1, d", "ADDF R1, 0.0", "STF e, R1"]
+        },
+        {
+            "name": "Int multiply / divide by powers of two become shifts",
+            "input": ["LD R1, a", "MUL R1, 16", "DIV R1, 2", "DIV R1, 6", "MULF R1, 2.0", "ST y, R1"],
+            "expected": ["LD R1, a", "SHL R1, 4", "SHR R1, 1", "DIV R1, 6", "MULF R1, 2.0", "ST y, R1"]
+        },
+    ]
+
+    passed = 0
+    for case in tests:
+        print(f"--- {case['name']} ---")
+        result = peephole(case["input"])
+        if result == case["expected"]:
+            print("PASS\n")
+            passed += 1
+        else:
+            print("FAIL")
+            print("Expected:", case["expected"])
+            print("Got:", result, "\n")
+
+    print("--- Cycle estimates before and after ---")
+    stats: List[PeepholeStats] = []
+    peephole(tests[0]["input"], stats)
+    # before: LD 1 + ST 4 + LD mem 4 + MUL 3 + ST 4 = 16; after: 1 + 4 + 1 + 4 = 10
+    if stats == [PeepholeStats(5, 4, 16, 10)]:
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL")
+        print("Got:", stats, "\n")
+
+    # Rewritten division must answer like DIV beyond float precision
+    print("--- Identity and shift rewrites keep large ints exact ---")
+    from VM import execute
+    code = ["LD R1, x", "DIV R1, 1", "DIV R1, 8", "ST y, R1"]
+    big = 2 ** 60 + 15
+    values = {big: big // 8, -big: -(big // 8), -7: 0}
+    result = {x: (execute(peephole(code), {"x": x})["y"], execute(code, {"x": x})["y"])
+              for x in values}
+    if result == {x: (y, y) for x, y in values.items()}:
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL")
+        print("Got:", result, "\n")
+
+    print(f"Summary: {passed}/{len(tests) + 2} tests passed.\n")
+
+
+# ----------------------------------------------------------------------
+# Run suite if executed directly
+# ----------------------------------------------------------------------
+if __name__ == "__main__":
+    test_peephole_suite()
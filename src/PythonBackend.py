@@ -0,0 +1,210 @@
+"""
+===== PythonBackend.py =====
+
+Backend that turns the three-address code of a program into one Python
+function, for workloads that evaluate the same program many times.
+
+generate_source() writes the TAC of every statement as Python assignments;
+compile_tac() passes that source through compile() once and returns a
+CompiledProgram. Calling it runs the function and returns the variable
+bindings, like the VM:
+
+    program = compile_tac([(["x = 2"], "int"), (["t1 = x + 1", "y = x * t1"], "int")])
+    program()           -> {"x": 2, "y": 6}
+
+    def _program(variables):
+        v0 = 2
+        t1 = v0 + 1
+        v1 = v0 * t1
+        return {'x': v0, 'y': v1}
+
+Variables become locals v0, v1 ... and temporaries keep their tN names, so
+no source name can clash with Python keywords, builtins or a temporary of
+another statement. Arithmetic follows Assembler._compute: int division
+truncates toward zero (VM.truncate_div), minus x is -x, and dividing
+by zero raises ZeroDivisionError.
+
+Compiled programs are cached (LRU, see CompileCache.py) on their TAC, so
+compiling the same program again returns the same function.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from CompileCache import CompileCache
+from QuadIR import parse_literal
+from VM import truncate_div
+
+DEFAULT_CACHE_SIZE = 64
+
+_cache = CompileCache(maxsize=DEFAULT_CACHE_SIZE)
+
+
+class CompiledProgram:
+    """A program's TAC compiled into a Python function."""
+
+    __slots__ = ("source", "function")
+
+    def __init__(self, source: str, function):
+        self.source = source
+        self.function = function
+
+    def __call__(self, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Run the program. `variables` gives the values of variables it reads
+        before writing them. Returns the value of every variable it touched.
+        Raises ZeroDivisionError if it divides by zero.
+        """
+        return self.function(variables if variables is not None else {})
+
+# ----------------------------------------------------------------------
+# Source generation
+# ----------------------------------------------------------------------
+def generate_source(statements: List[Tuple[List[str], str]], name: str = "_program") -> str:
+    """
+    Python source of a function `name(variables)` that runs the TAC of each
+    (code, var_type) statement in order and returns the bindings.
+    """
+    locals_: Dict[str, str] = {}        # variable -> Python local
+    loads: List[str] = []               # variables read before any statement writes them
+    body: List[str] = []
+
+    def variable(text: str, reading: bool) -> str:
+        local = locals_.get(text)
+        if local is None:
+            local = locals_[text] = f"v{len(locals_)}"
+            if reading:
+                loads.append(f"    {local} = variables[{text!r}]")
+        return local
+
+    for code, var_type in statements:
+        temps = set()
+
+        def operand(text: str) -> str:
+            if text in temps:
+                return text
+            value = parse_literal(text)
+            return variable(text, True) if value is None else repr(value)
+
+        last = len(code) - 1
+        for index, line in enumerate(code):
+            dest, rhs = line.split(" = ", 1)
+            parts = rhs.split(" ")
+            if len(parts) == 1:
+                expression = operand(parts[0])
+            elif len(parts) == 2:
+                expression = f"-{operand(parts[1])}"
+            elif parts[1] == "/" and var_type == "int":
+                expression = f"_div({operand(parts[0])}, {operand(parts[2])})"
+            else:
+                expression = f"{operand(parts[0])} {parts[1]} {operand(parts[2])}"
+            if index == last:
+                target = variable(dest, False)
+            else:
+                temps.add(dest)
+                target = dest
+            body.append(f"    {target} = {expression}")
+
+    bindings = ", ".join(f"{text!r}: {local}" for text, local in locals_.items())
+    return "\n".join([f"def {name}(variables):", *loads, *body,
+                      f"    return {{{bindings}}}", ""])
+
+
+def compile_tac(statements: List[Tuple[List[str], str]],
+                cache: Optional[CompileCache] = _cache) -> CompiledProgram:
+    """
+    Compile the TAC of a program, given as (code, var_type) pairs, into a
+    CompiledProgram. Programs already in `cache` are not compiled again;
+    pass cache=None to always compile.
+    """
+    key = "\n".join(f"{var_type}:{';'.join(code)}" for code, var_type in statements)
+    if cache is not None:
+        compiled = cache.get(key)
+        if compiled is not None:
+            return compiled
+
+    source = generate_source(statements)
+    namespace: Dict[str, Any] = {"_div": truncate_div}
+    exec(compile(source, "<tac>", "exec"), namespace)
+    compiled = CompiledProgram(source, namespace["_program"])
+    if cache is not None:
+        cache.put(key, compiled)
+    return compiled
+
+# ----------------------------------------------------------------------
+# Test Suite for the Python backend
+# ----------------------------------------------------------------------
+def test_python_backend_suite():
+    print("===== Running Python Backend Test Suite =====\n")
+
+    tests = [
+        {
+            "name": "Statements share variables",
+            "input": ([(["x = 2"], "int"), (["t1 = x + 1", "y = x * t1"], "int")], None),
+            "expected": {"x": 2, "y": 6}
+        },
+        {
+            "name": "Int division truncates toward zero",
+            "input": ([(["t1 = minus a", "q = t1 / 2"], "int")], {"a": 7}),
+            "expected": {"a": 7, "q": -3}
+        },
+        {
+            "name": "Doubles keep true division",
+            "input": ([(["t1 = d / 4.0", "e = minus t1"], "double")], {"d": 3.0}),
+            "expected": {"d": 3.0, "e": -0.75}
+        },
+        {
+            "name": "Names that are Python keywords or temporaries",
+            "input": ([(["t1 = 5"], "int"), (["t2 = t1 * 2", "if = t2 + t1"], "int")], None),
+            "expected": {"t1": 5, "if": 15}
+        },
+    ]
+
+    passed = 0
+    for case in tests:
+        print(f"--- {case['name']} ---")
+        statements, variables = case["input"]
+        result = compile_tac(statements, cache=None)(variables)
+        if result == case["expected"]:
+            print("PASS\n")
+            passed += 1
+        else:
+            print("FAIL")
+            print("Expected:", case["expected"])
+            print("Got:", result, "\n")
+
+    print("--- Division by zero ---")
+    try:
+        compile_tac([(["y = x / 0"], "int")], cache=None)({"x": 1})
+        print("FAIL\n")
+    except ZeroDivisionError:
+        print("PASS\n")
+        passed += 1
+
+    print("--- Compiled programs are cached ---")
+    cache = CompileCache(maxsize=4)
+    first = compile_tac(tests[0]["input"][0], cache)
+    second = compile_tac([(["x = 2"], "int"), (["t1 = x + 1", "y = x * t1"], "int")], cache)
+    if second is first and (cache.hits, cache.misses) == (1, 1):
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL")
+        print("Got:", cache.hits, cache.misses, "\n")
+
+    print("--- Negating 0.0 gives -0.0 ---")
+    result = compile_tac([(["t1 = minus d", "e = t1"], "double")], cache=None)({"d": 0.0})["e"]
+    if repr(result) == "-0.0":
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL")
+        print("Got:", result, "\n")
+
+    print(f"Summary: {passed}/{len(tests) + 3} tests passed.\n")
+
+
+# ----------------------------------------------------------------------
+# Run suite if executed directly
+# ----------------------------------------------------------------------
+if __name__ == "__main__":
+    test_python_backend_suite()
@@ -0,0 +1,291 @@
+"""
+===== QuadIR.py =====
+
+Binary form of the three-address code: one quadruple per instruction,
+stored column-wise in parallel `array` buffers, plus a constant pool and a
+name pool.
+
+    opcode  array('B')   COPY ADD SUB MUL DIV NEG
+    type    array('B')   INT or DOUBLE, the statement's declared type
+    dest    array('i')   operand written
+    src1    array('i')   first operand
+    src2    array('i')   second operand (NONE for COPY / NEG)
+
+An operand is an int32 holding (index << 2) | kind:
+    TEMP    index is the temporary's number (t7 -> 7)
+    CONST   index into the constant pool
+    NAME    index into the name pool (variables)
+
+A statement's quadruples end with the one whose dest is a NAME (its store),
+so several statements can share one Quads buffer. to_tac() prints the same
+text the intermediate code generator produces:
+
+    t1 = 4 + 3      ->   ADD  int  t1       4 (CONST 0)  3 (CONST 1)
+    y = t1               COPY int  y (NAME 0)  t1       NONE
+
+to_bytes() writes the buffers and pools into one bytes object and
+from_bytes() reads it back as memoryviews over that object, without copying
+the instruction columns (the result is read-only).
+"""
+
+import struct
+import sys
+from array import array
+from typing import Any, Dict, List, Tuple
+
+# Opcodes
+COPY, ADD, SUB, MUL, DIV, NEG = range(6)
+_OPCODES = {"+": ADD, "-": SUB, "*": MUL, "/": DIV}
+_SYMBOLS = {ADD: "+", SUB: "-", MUL: "*", DIV: "/"}
+
+# Type tags
+INT, DOUBLE = 0, 1
+TYPE_TAGS = {"int": INT, "double": DOUBLE}
+TYPE_NAMES = ("int", "double")
+
+# Operand kinds
+TEMP, CONST, NAME = 0, 1, 2
+NONE = -1
+
+_MAGIC = b"QIR1"
+_HEADER = struct.Struct("<4sBxxxIII")  # magic, little-endian flag, count, constants / names bytes
+_LITTLE = sys.byteorder == "little"
+
+
+def parse_literal(text: str):
+    """The number written in `text`, or None if it is a name."""
+    if text[0].isdigit() or text[0] in "-.":
+        return float(text) if ("." in text or "e" in text) else int(text)
+    return None
+
+
+class Quads:
+    """Column-wise quadruples with constant and name pools."""
+
+    __slots__ = ("opcodes", "types", "dest", "src1", "src2",
+                 "constants", "names", "_constant_index", "_name_index")
+
+    def __init__(self):
+        self.opcodes = array("B")
+        self.types = array("B")
+        self.dest = array("i")
+        self.src1 = array("i")
+        self.src2 = array("i")
+        self.constants: List[Any] = []
+        self.names: List[str] = []
+        self._constant_index: Dict[Tuple[type, str], int] = {}
+        self._name_index: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.opcodes)
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+    def constant(self, value) -> int:
+        """Operand for a literal, adding it to the pool on first use."""
+        key = (type(value), repr(value))
+        index = self._constant_index.get(key)
+        if index is None:
+            index = self._constant_index[key] = len(self.constants)
+            self.constants.append(value)
+        return (index << 2) | CONST
+
+    def name(self, name: str) -> int:
+        """Operand for a variable, adding it to the pool on first use."""
+        index = self._name_index.get(name)
+        if index is None:
+            index = self._name_index[name] = len(self.names)
+            self.names.append(name)
+        return (index << 2) | NAME
+
+    @staticmethod
+    def temp(number: int) -> int:
+        return (number << 2) | TEMP
+
+    def append(self, opcode: int, type_tag: int, dest: int, src1: int, src2: int = NONE) -> None:
+        self.opcodes.append(opcode)
+        self.types.append(type_tag)
+        self.dest.append(dest)
+        self.src1.append(src1)
+        self.src2.append(src2)
+
+    def add_tac(self, code: List[str], var_type: str) -> None:
+        """
+        Append the TAC lines of one statement. Names defined before the final
+        store are temporaries; every other name is a variable.
+        """
+        type_tag = TYPE_TAGS[var_type]
+        temps: Dict[str, int] = {}
+
+        def operand(text: str) -> int:
+            if text in temps:
+                return temps[text]
+            value = parse_literal(text)
+            return self.name(text) if value is None else self.constant(value)
+
+        last = len(code) - 1
+        for index, line in enumerate(code):
+            dest, rhs = line.split(" = ", 1)
+            parts = rhs.split(" ")
+            if len(parts) == 1:
+                opcode, src1, src2 = COPY, operand(parts[0]), NONE
+            elif len(parts) == 2:
+                opcode, src1, src2 = NEG, operand(parts[1]), NONE
+            else:
+                opcode, src1, src2 = _OPCODES[parts[1]], operand(parts[0]), operand(parts[2])
+            if index == last:
+                target = self.name(dest)
+            else:
+                target = temps[dest] = self.temp(int(dest[1:]))
+            self.append(opcode, type_tag, target, src1, src2)
+
+    # ------------------------------------------------------------------
+    # Text form
+    # ------------------------------------------------------------------
+    def operand_text(self, operand: int) -> str:
+        kind = operand & 3
+        if kind == TEMP:
+            return f"t{operand >> 2}"
+        if kind == CONST:
+            return repr(self.constants[operand >> 2])
+        return self.names[operand >> 2]
+
+    def format(self, i: int) -> str:
+        """TAC text of instruction i."""
+        text = self.operand_text
+        opcode = self.opcodes[i]
+        if opcode == COPY:
+            rhs = text(self.src1[i])
+        elif opcode == NEG:
+            rhs = f"minus {text(self.src1[i])}"
+        else:
+            rhs = f"{text(self.src1[i])} {_SYMBOLS[opcode]} {text(self.src2[i])}"
+        return f"{text(self.dest[i])} = {rhs}"
+
+    def to_tac(self) -> List[str]:
+        return [self.format(i) for i in range(len(self.opcodes))]
+
+    # ------------------------------------------------------------------
+    # Bytes
+    # ------------------------------------------------------------------
+    def to_bytes(self) -> bytes:
+        """Serialize the columns and pools into one bytes object."""
+        constants = "\n".join(map(repr, self.constants)).encode("utf-8")
+        names = "\n".join(self.names).encode("utf-8")
+        count = len(self.opcodes)
+        pad = b"\0" * (-2 * count % 4)      # keep the int32 columns 4-byte aligned
+        return b"".join((
+            _HEADER.pack(_MAGIC, _LITTLE, count, len(constants), len(names)),
+            self.opcodes, self.types, pad, self.dest, self.src1, self.src2,
+            constants, names,
+        ))
+
+    @classmethod
+    def from_bytes(cls, data) -> "Quads":
+        """
+        Read a buffer written by to_bytes(). The instruction columns are
+        memoryviews into `data` (no copy); only the pools are decoded.
+        Raises ValueError if the buffer is not a quadruple IR.
+        """
+        view = memoryview(data).cast("B")
+        if len(view) < _HEADER.size:
+            raise ValueError("buffer is too short for a quadruple IR")
+        magic, little, count, constants_size, names_size = _HEADER.unpack_from(view)
+        if magic != _MAGIC:
+            raise ValueError("buffer is not a quadruple IR")
+        if little != _LITTLE:
+            raise ValueError("quadruple IR was written with a different byte order")
+
+        quads = cls.__new__(cls)
+        offset = _HEADER.size
+        quads.opcodes = view[offset:offset + count]
+        quads.types = view[offset + count:offset + 2 * count]
+        offset += 2 * count + (-2 * count % 4)
+        columns = []
+        for _ in range(3):
+            columns.append(view[offset:offset + 4 * count].cast("i"))
+            offset += 4 * count
+        quads.dest, quads.src1, quads.src2 = columns
+
+        constants = bytes(view[offset:offset + constants_size]).decode("utf-8")
+        offset += constants_size
+        names = bytes(view[offset:offset + names_size]).decode("utf-8")
+        quads.constants = [parse_literal(text) for text in constants.split("\n")] if constants else []
+        quads.names = names.split("\n") if names else []
+        quads._constant_index = {}
+        quads._name_index = {}
+        return quads
+
+    def nbytes(self) -> int:
+        """Bytes held by the instruction columns (pools not included)."""
+        return sum(column.nbytes if isinstance(column, memoryview)
+                   else column.itemsize * len(column)
+                   for column in (self.opcodes, self.types, self.dest, self.src1, self.src2))
+
+
+# ----------------------------------------------------------------------
+# Test Suite for the quadruple IR
+# ----------------------------------------------------------------------
+def test_quad_ir_suite():
+    print("===== Running Quadruple IR Test Suite =====\n")
+
+    tests = [
+        {
+            "name": "Simple addition",
+            "input": (["t1 = 4 + 3", "y = t1"], "int"),
+        },
+        {
+            "name": "Unary minus, variables and doubles",
+            "input": (["t1 = x * 2.5", "t2 = minus t1", "d = t2 - 0.5"], "double"),
+        },
+        {
+            "name": "Variable named like a temporary",
+            "input": (["t2 = t1 + 1", "t1 = t2 * t2"], "int"),
+        },
+        {
+            "name": "Folded store",
+            "input": (["z = -15"], "int"),
+        },
+    ]
+
+    passed = 0
+    for case in tests:
+        print(f"--- {case['name']} ---")
+        code, var_type = case["input"]
+        quads = Quads()
+        quads.add_tac(code, var_type)
+        copy = Quads.from_bytes(quads.to_bytes())
+        result = (quads.to_tac(), copy.to_tac())
+        if result == (code, code) and list(copy.types) == [TYPE_TAGS[var_type]] * len(code):
+            print("PASS\n")
+            passed += 1
+        else:
+            print("FAIL")
+            print("Expected:", code)
+            print("Got:", result, "\n")
+
+    # Several statements share one buffer; from_bytes does not copy the columns
+    print("--- Multi-statement buffer and zero-copy load ---")
+    quads = Quads()
+    quads.add_tac(["t1 = 4 + 3", "y = t1"], "int")
+    quads.add_tac(["t1 = y * 2", "z = t1"], "int")
+    data = bytearray(quads.to_bytes())
+    loaded = Quads.from_bytes(data)
+    data[_HEADER.size] = MUL                  # patch the first opcode in the source buffer
+    if loaded.to_tac() == ["t1 = 4 * 3", "y = t1", "t1 = y * 2", "z = t1"] \
+            and loaded.names == ["y", "z"] and loaded.nbytes() == quads.nbytes():
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL")
+        print("Got:", loaded.to_tac(), "\n")
+
+    print(f"Summary: {passed}/{len(tests) + 1} tests passed.\n")
+
+
+# ----------------------------------------------------------------------
+# Run suite if executed directly
+# ----------------------------------------------------------------------
+if __name__ == "__main__":
+    test_quad_ir_suite()
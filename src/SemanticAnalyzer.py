@@ -31,40 +31,48 @@ SemanticAnalyzer is used to check the validity of the user input. After
 syntax/lexical analysis, this code is used for type checking and making sure
 the expression is logically correct.
 
-Input AST format (from SyntaxAnalyzer):
+Input AST format (a SyntaxTree.Statement from SyntaxAnalyzer, or the
+equivalent dict):
 
 {
     "type": "int" or "double",
     "identifier": "y",
     "expression": {
         "op": "+",       # one of +, -, *, /
-        "left": 4,       # Python int or float literal
-        "right": 3       # Python int or float literal
+        "left": 4,       # Python int or float literal, or a nested node
+        "right": 3       # Python int or float literal, or a nested node
     }
 }
+The expression may also be a bare literal or a unary minus node
+{"op": "neg", "operand": <node>}.
 
 Semantic checks:
 [1] Variable type matches expression type (NO implicit promotion)
 [2] Numbers are allowed for the operation
 [3] Operator is valid (+, -, *, /)
 [4] No mixed-type expressions: int op int OR double op double only
-[5] Division by zero is forbidden
+[5] Division by a zero literal is forbidden
+[6] Variables used in the expression were declared by an earlier statement
+    (resolved through a SymbolTable, which maps each name to an integer slot)
 
 Output:
 - True if valid
 - False if invalid
 """
 
-from typing import Dict, Any
+import math
+from typing import Dict, Any, List, Optional, Union
 
-_SYMBOL_TABLE: Dict[str, Dict[str, str]] = {}
+from Diagnostics import Diagnostic, report
+from SymbolTable import SymbolTable
+from SyntaxTree import NEG, NODE_TYPES, Statement, Var, from_dict
 
 VALID_TYPES = {"int", "double"}
 VALID_OPS = {"+", "-", "*", "/"}
 
 
-def _err(msg: str) -> None:
-    print(f"Semantic error: {msg}")
+def _err(msg: str, verbose: bool = True, diagnostics: Optional[List[Diagnostic]] = None) -> None:
+    report(diagnostics, verbose, "semantic", "Semantic", msg)
 
 
 def _infer_literal_type(value) -> str:
@@ -76,88 +84,152 @@ def _infer_literal_type(value) -> str:
     return "unknown"
 
 
-def test_semantic(ast: Dict[str, Any]) -> bool:
-    print("[SEMANTIC ANALYSIS]")
-
-    # Basic AST sanity
-    if not isinstance(ast, dict):
-        _err("AST is not a dictionary.")
-        return False
-
-    if "type" not in ast or "identifier" not in ast or "expression" not in ast:
-        _err("AST missing required fields (type / identifier / expression).")
+def _check_expression(expr: Any, verbose: bool = True,
+                      diagnostics: Optional[List[Diagnostic]] = None,
+                      symbols: Optional[SymbolTable] = None) -> Optional[str]:
+    """
+    Type-check an expression tree and return its type ('int' or 'double'),
+    or None after reporting an error. Variable references are resolved
+    through `symbols` and get their slot filled in. The tree is walked
+    post-order with an explicit stack, so nesting depth is not limited by
+    Python recursion.
+    """
+    types: List[str] = []              # types of finished subtrees
+    stack = [(expr, False)]
+    while stack:
+        node, children_done = stack.pop()
+
+        # [6] Variables must be declared; their type comes from the symbol table
+        if isinstance(node, Var):
+            slot = symbols.lookup(node.name) if symbols is not None else None
+            if slot is None:
+                _err(f"variable '{node.name}' is not declared.", verbose, diagnostics)
+                return None
+            if symbols.values[slot] is None:
+                _err(f"variable '{node.name}' has no value (its declaration failed).",
+                     verbose, diagnostics)
+                return None
+            node.slot = slot
+            types.append(symbols.types[slot])
+            continue
+
+        # [2] Numbers must be allowed
+        if not isinstance(node, NODE_TYPES):
+            node_type = _infer_literal_type(node)
+            if node_type == "unknown":
+                _err(f"operand {node!r} must be a numeric literal.", verbose, diagnostics)
+                return None
+            if node_type == "double" and not math.isfinite(node):
+                _err("double literal is out of range.", verbose, diagnostics)
+                return None
+            types.append(node_type)
+            continue
+
+        if node.code == NEG:
+            if not children_done:
+                stack.append((node, True))
+                stack.append((node.operand, False))
+            # A negation has the type of its operand, already on `types`
+            continue
+
+        # [3] Operator validity
+        op = node.op
+        if op not in VALID_OPS:
+            _err(f"operator '{op}' is not supported.", verbose, diagnostics)
+            return None
+
+        if not children_done:
+            stack.append((node, True))
+            stack.append((node.right, False))
+            stack.append((node.left, False))
+            continue
+
+        right_type = types.pop()
+        left_type = types.pop()
+
+        # [5] Division by zero (literal divisor)
+        right_val = node.right
+        if op == "/" and isinstance(right_val, (int, float)) and float(right_val) == 0.0:
+            _err("division by zero.", verbose, diagnostics)
+            return None
+
+        # [4] No mixed-type expressions
+        if left_type != right_type:
+            _err(
+                f"mixed-type expression is not allowed: left is '{left_type}' "
+                f"but right is '{right_type}'. Must use all int or all double expressions.",
+                verbose, diagnostics
+            )
+            return None
+
+        # Expression type is the common operand type
+        types.append(left_type)
+
+    return types.pop()
+
+
+def test_semantic(ast: Union[Statement, Dict[str, Any]], verbose: bool = True,
+                  diagnostics: Optional[List[Diagnostic]] = None,
+                  session=None) -> bool:
+    """
+    Check one statement. `session` is a Compiler.CompilerSession (or a bare
+    SymbolTable): variables declared by earlier statements of the session
+    may be used, and the declared identifier is added to its symbol table
+    (ast.slot is set). Redeclaring a name with a different type is an error.
+    Without a session nothing is recorded.
+    """
+    symbols = session if session is None or isinstance(session, SymbolTable) else session.symbols
+    if verbose:
+        print("[SEMANTIC ANALYSIS]")
+
+    # Basic AST sanity (dict ASTs are converted to nodes first)
+    try:
+        ast = from_dict(ast)
+    except ValueError as exc:
+        _err(str(exc), verbose, diagnostics)
         return False
 
-    declared_type = ast["type"]          # 'int' or 'double'
-    var_name = ast["identifier"]
-    expr = ast["expression"]
+    declared_type = ast.type             # 'int' or 'double'
+    var_name = ast.identifier
+    expr = ast.expression
 
     if declared_type not in VALID_TYPES:
-        _err(f"unknown declared type '{declared_type}'.")
+        _err(f"unknown declared type '{declared_type}'.", verbose, diagnostics)
         return False
 
     if not isinstance(var_name, str) or not var_name:
-        _err("invalid identifier name.")
-        return False
-
-    # Expression structure
-    if not isinstance(expr, dict) or not {"op", "left", "right"} <= expr.keys():
-        _err("invalid expression node in AST.")
-        return False
-
-    op = expr["op"]
-    left_val = expr["left"]
-    right_val = expr["right"]
-
-    # [3] Operator validity
-    if op not in VALID_OPS:
-        _err(f"operator '{op}' is not supported.")
-        return False
-
-    # [2] Numbers must be allowed (only numeric literals for now)
-    if not isinstance(left_val, (int, float)):
-        _err("left operand must be a numeric literal.")
-        return False
-
-    if not isinstance(right_val, (int, float)):
-        _err("right operand must be a numeric literal.")
-        return False
-
-    # [5] Division by zero
-    if op == "/" and float(right_val) == 0.0:
-        _err("division by zero.")
+        _err("invalid identifier name.", verbose, diagnostics)
         return False
 
-    # Infer operand types
-    left_type = _infer_literal_type(left_val)
-    right_type = _infer_literal_type(right_val)
-
-    if left_type == "unknown" or right_type == "unknown":
-        _err("unable to infer operand types.")
+    expr_type = _check_expression(expr, verbose, diagnostics, symbols)
+    if expr_type is None:
         return False
 
-    # [4] No mixed-type expressions
-    if left_type != right_type:
-        _err(
-            f"mixed-type expression is not allowed: left is '{left_type}' "
-            f"but right is '{right_type}'. Must use all int or all double expressions."
-        )
-        return False
-
-    # Expression type is the common operand type
-    expr_type = left_type
-
     # [1] Variable type must match expression type exactly
     if declared_type != expr_type:
         _err(
             f"mixed-type expression is not allowed: variable is '{declared_type}' but expression is '{expr_type}'. "
-            "Only int→int and double→double assignments are allowed."
+            "Only int→int and double→double assignments are allowed.",
+            verbose, diagnostics
         )
         return False
 
-    # If we reach here, semantics are valid; record variable type
-    _SYMBOL_TABLE[var_name] = {"type": declared_type}
+    if symbols is not None:
+        slot = symbols.lookup(var_name)
+        if slot is not None and symbols.types[slot] != declared_type:
+            _err(f"variable '{var_name}' was already declared as '{symbols.types[slot]}'.",
+                 verbose, diagnostics)
+            return False
 
-    print("Semantics valid.")
-    print()
+    # If we reach here, semantics are valid; record variable type
+    if symbols is not None:
+        ast.slot = symbols.declare(var_name, declared_type)
+        if ast.slot is None:
+            _err(f"symbol table is full ({symbols.capacity} variables); "
+                 f"cannot declare '{var_name}'.", verbose, diagnostics)
+            return False
+
+    if verbose:
+        print("Semantics valid.")
+        print()
     return True
@@ -0,0 +1,395 @@
+"""
+===== Server.py =====
+
+asyncio compile server speaking newline-delimited JSON over a local TCP
+or Unix socket, and a load-generator client for it.
+
+Address forms:  "127.0.0.1:8765"  or  "unix:/tmp/solver.sock"
+
+Protocol: one JSON object per line in each direction. Each connection
+has its own CompilerSession, so later statements may use variables
+declared by earlier ones on the same connection.
+
+    -> {"id": 1, "source": "int x = 4 + 3;"}
+    <- {"id": 1, "ok": true, "answer": "x=7;"}
+    -> {"id": 2, "source": "int y = x / 0;"}
+    <- {"id": 2, "ok": false, "phase": "assembler", "errors": ["division by zero."]}
+
+Requests may be pipelined: a client can send many lines without waiting,
+and responses come back in request order. Compiles are CPU-bound, so
+they run on a bounded thread pool (`workers`) and the event loop only does
+socket I/O; requests already queued on a connection are compiled in one
+executor call and their responses written together. Backpressure limits:
+    max_pipeline     requests read ahead per connection; when full the
+                     server stops reading that socket
+    max_connections  further connections get one error line and are closed
+    max_line         longer request lines get an error and the connection is closed
+Responses are written with drain(), so a client that does not read its
+responses stops its own requests from being read.
+
+load() opens several connections, keeps up to `pipeline` requests in
+flight on each, and reports requests/sec and p50 / p99 latency.
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from Compiler import CompilerSession
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_PIPELINE = 64
+DEFAULT_MAX_CONNECTIONS = 256
+DEFAULT_MAX_LINE = 64 * 1024
+_CACHE_SIZE = 1024
+
+
+def _encode(response: Dict[str, Any]) -> bytes:
+    return json.dumps(response).encode("utf-8") + b"\n"
+
+
+async def _open(address: str, limit: int = DEFAULT_MAX_LINE):
+    """open_connection() for a "host:port" or "unix:path" address."""
+    if address.startswith("unix:"):
+        return await asyncio.open_unix_connection(address[5:], limit=limit)
+    host, _, port = address.rpartition(":")
+    return await asyncio.open_connection(host, int(port), limit=limit)
+
+# ----------------------------------------------------------------------
+# Server
+# ----------------------------------------------------------------------
+class CompileServer:
+    """Newline-delimited JSON compile server; see the module docstring."""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS,
+                 max_pipeline: int = DEFAULT_MAX_PIPELINE,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 max_line: int = DEFAULT_MAX_LINE):
+        if workers < 1 or max_pipeline < 1 or max_connections < 1:
+            raise ValueError("workers, max_pipeline and max_connections must be at least 1")
+        self.workers = workers
+        self.max_pipeline = max_pipeline
+        self.max_connections = max_connections
+        self.max_line = max_line
+        self.connections = 0
+        self.requests = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._listener: Optional[asyncio.AbstractServer] = None
+        self._handlers: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    async def start(self, address: str) -> asyncio.AbstractServer:
+        """Start listening on `address` (port 0 picks a free port) and return the listener."""
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        if address.startswith("unix:"):
+            self._listener = await asyncio.start_unix_server(self._handle, address[5:],
+                                                             limit=self.max_line)
+        else:
+            host, _, port = address.rpartition(":")
+            self._listener = await asyncio.start_server(self._handle, host, int(port),
+                                                        limit=self.max_line)
+        return self._listener
+
+    async def serve_forever(self, address: str) -> None:
+        await self.start(address)
+        try:
+            await self._listener.serve_forever()
+        finally:
+            await self.stop()
+
+    async def stop(self) -> None:
+        """Stop listening, close open connections and wait for their handlers to finish."""
+        if self._listener is not None:
+            self._listener.close()
+            await self._listener.wait_closed()
+            self._listener = None
+        for writer in self._handlers.values():
+            writer.close()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        if self.connections >= self.max_connections:
+            writer.write(_encode({"id": None, "ok": False, "error": "too many connections"}))
+            await writer.drain()
+            writer.close()
+            return
+
+        self.connections += 1
+        self._handlers[asyncio.current_task()] = writer
+        session = CompilerSession(cache_size=_CACHE_SIZE)
+        queue: asyncio.Queue = asyncio.Queue(self.max_pipeline)
+        responder = asyncio.create_task(self._respond(session, queue, writer))
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:                  # longer than max_line
+                    await queue.put({"id": None, "ok": False, "error": "request line too long"})
+                    break
+                if not line or responder.done():
+                    break
+                await queue.put(line)               # blocks while the pipeline is full
+        except ConnectionError:
+            pass
+        finally:
+            try:
+                if not responder.done():
+                    await queue.put(None)
+                await responder
+            except ConnectionError:
+                pass
+            finally:
+                self.connections -= 1
+                del self._handlers[asyncio.current_task()]
+                writer.close()
+
+    async def _respond(self, session: CompilerSession, queue: asyncio.Queue,
+                       writer: asyncio.StreamWriter) -> None:
+        """
+        Answer queued requests of one connection in order. Requests already
+        waiting in the queue are compiled together in one executor call.
+        """
+        loop = asyncio.get_running_loop()
+        done = False
+        while not done:
+            items = [await queue.get()]
+            while not queue.empty():
+                items.append(queue.get_nowait())
+            if items[-1] is None:                   # end of connection; always last
+                items.pop()
+                done = True
+            if not items:
+                continue
+            self.requests += len(items)
+            responses = await loop.run_in_executor(self._executor, self._answer_all, session, items)
+            writer.write(b"".join(map(_encode, responses)))
+            await writer.drain()
+
+    @staticmethod
+    def _answer_all(session: CompilerSession, items: List[Any]) -> List[Dict[str, Any]]:
+        """Executor task: responses for a run of request lines (or ready error responses)."""
+        return [item if isinstance(item, dict) else _answer(session, item) for item in items]
+
+
+def _answer(session: CompilerSession, line: bytes) -> Dict[str, Any]:
+    try:
+        request = json.loads(line)
+        source = request["source"]
+        if not isinstance(source, str):
+            raise TypeError("source must be a string")
+    except (ValueError, KeyError, TypeError) as exc:
+        return {"id": None, "ok": False, "error": f"invalid request: {exc}"}
+
+    try:
+        result = session.compile(source)
+    except Exception as exc:                        # never leave a request unanswered
+        return {"id": request.get("id"), "ok": False, "error": f"internal error: {exc!r}"}
+    response = {"id": request.get("id"), "ok": result.ok}
+    if result.ok:
+        response["answer"] = result.answer
+    else:
+        response["phase"] = result.failed_phase
+        response["errors"] = [d.message for d in result.diagnostics]
+    return response
+
+# ----------------------------------------------------------------------
+# Load generator
+# ----------------------------------------------------------------------
+def _percentile(ordered: List[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def _load_connection(address: str, sources: List[str], pipeline: int,
+                           latencies: List[float]) -> int:
+    """Send `sources` with up to `pipeline` requests in flight; returns the failure count."""
+    reader, writer = await _open(address)
+    window = asyncio.Semaphore(pipeline)
+    sent: Dict[int, float] = {}
+
+    async def send():
+        for number, source in enumerate(sources):
+            await window.acquire()
+            sent[number] = time.perf_counter()
+            writer.write(_encode({"id": number, "source": source}))
+            await writer.drain()
+
+    sender = asyncio.create_task(send())
+    failures = 0
+    for _ in sources:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        response = json.loads(line)
+        latencies.append(time.perf_counter() - sent.pop(response["id"]))
+        failures += not response["ok"]
+        window.release()
+    await sender
+    writer.close()
+    return failures
+
+
+async def load(address: str, requests: int = 10_000, connections: int = 8,
+               pipeline: int = 32, sources: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Send `requests` statements over `connections` connections, pipelining up
+    to `pipeline` requests on each. Returns requests/sec, p50 / p99 latency
+    (seconds) and the number of failed responses.
+    """
+    sources = sources or [f"int v{i} = {i % 1000} * ({i % 97} + 1) - {i % 3} / 2;"
+                          for i in range(requests)]
+    per_connection = [sources[i::connections] for i in range(connections)]
+    latencies: List[float] = []
+    start = time.perf_counter()
+    failures = await asyncio.gather(*(_load_connection(address, part, pipeline, latencies)
+                                      for part in per_connection if part))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {"requests": len(latencies), "connections": connections, "pipeline": pipeline,
+            "seconds": elapsed, "requests_per_sec": len(latencies) / elapsed if elapsed else 0.0,
+            "p50": _percentile(latencies, 0.50), "p99": _percentile(latencies, 0.99),
+            "failures": sum(failures)}
+
+
+def print_load(report: Dict[str, Any]) -> None:
+    print(f"{report['requests']} requests over {report['connections']} connections "
+          f"(pipeline {report['pipeline']}) in {report['seconds']:.3f}s")
+    print(f"  {report['requests_per_sec']:.0f} requests/sec, p50 {report['p50'] * 1e3:.2f} ms, "
+          f"p99 {report['p99'] * 1e3:.2f} ms, {report['failures']} failed")
+
+# ----------------------------------------------------------------------
+# Test Suite for the server
+# ----------------------------------------------------------------------
+async def _exchange(address: str, lines: List[bytes]) -> List[Dict[str, Any]]:
+    """Send all lines at once (pipelined) and read one response per line."""
+    reader, writer = await _open(address)
+    writer.write(b"".join(lines))
+    await writer.drain()
+    responses = []
+    for _ in lines:
+        line = await reader.readline()
+        if not line:
+            break
+        responses.append(json.loads(line))
+    writer.close()
+    return responses
+
+
+async def _run_server_tests() -> int:
+    passed = 0
+    server = CompileServer(workers=2, max_pipeline=4, max_line=256)
+    listener = await server.start("127.0.0.1:0")
+    port = listener.sockets[0].getsockname()[1]
+    address = f"127.0.0.1:{port}"
+
+    print("--- Pipelined requests are answered in order ---")
+    lines = [_encode({"id": i, "source": f"int v{i} = {i} * 2;"}) for i in range(20)]
+    lines.append(_encode({"id": "sum", "source": "int s = v3 + v19;"}))
+    responses = await _exchange(address, lines)
+    expected = [{"id": i, "ok": True, "answer": f"v{i}={i * 2};"} for i in range(20)]
+    expected.append({"id": "sum", "ok": True, "answer": "s=44;"})
+    if responses == expected:
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL")
+        print("Got:", responses[-3:], "\n")
+
+    print("--- Errors and invalid requests ---")
+    responses = await _exchange(address, [_encode({"id": 1, "source": "int y = 1 / 0;"}),
+                                          b"not json\n", _encode({"id": 2})])
+    got = [(r["id"], r["ok"], r.get("phase"), "error" in r) for r in responses]
+    if got == [(1, False, "semantic", False), (None, False, None, True), (None, False, None, True)]:
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL")
+        print("Got:", responses, "\n")
+
+    print("--- Over-long request line closes the connection ---")
+    responses = await _exchange(address, [_encode({"id": 1, "source": "int y = 1;"}),
+                                          b"x" * 1024 + b"\n",
+                                          _encode({"id": 3, "source": "int z = 2;"})])
+    got = [(r["id"], r["ok"], r.get("error")) for r in responses]
+    if got == [(1, True, None), (None, False, "request line too long")]:
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL")
+        print("Got:", responses, "\n")
+
+    print("--- A request whose compile raises is answered and the connection released ---")
+    compile_method = CompilerSession.compile
+
+    def failing_compile(session, source, verbose=False):
+        if source == "boom":
+            raise RuntimeError("boom")
+        return compile_method(session, source, verbose)
+
+    CompilerSession.compile = failing_compile
+    try:
+        responses = await asyncio.wait_for(
+            _exchange(address, [_encode({"id": 1, "source": "boom"}),
+                                _encode({"id": 2, "source": "int y = 2;"})]), 5)
+    except asyncio.TimeoutError:
+        responses = []
+    finally:
+        CompilerSession.compile = compile_method
+    for _ in range(100):                            # the handler finishes after the client closes
+        if not server.connections:
+            break
+        await asyncio.sleep(0.01)
+    got = ([(r["id"], r["ok"], "error" in r) for r in responses], server.connections,
+           len(server._handlers))
+    if got == ([(1, False, True), (2, True, False)], 0, 0):
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL")
+        print("Got:", got, "\n")
+
+    print("--- Load generator over TCP ---")
+    report = await load(address, requests=400, connections=4, pipeline=8)
+    if report["requests"] == 400 and report["failures"] == 0 and 0 < report["p50"] <= report["p99"]:
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL")
+        print("Got:", report, "\n")
+
+    await server.stop()
+
+    print("--- Unix socket ---")
+    with tempfile.TemporaryDirectory() as directory:
+        address = f"unix:{os.path.join(directory, 'solver.sock')}"
+        server = CompileServer(workers=1)
+        await server.start(address)
+        responses = await _exchange(address, [_encode({"id": 1, "source": "double d = 1.5 * 2.0;"})])
+        await server.stop()
+    if responses == [{"id": 1, "ok": True, "answer": "d=3;"}]:
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL")
+        print("Got:", responses, "\n")
+    return passed
+
+
+def test_server_suite():
+    print("===== Running Compile Server Test Suite =====\n")
+    passed = asyncio.run(_run_server_tests())
+    print(f"Summary: {passed}/6 tests passed.\n")
+
+
+# ----------------------------------------------------------------------
+# Run suite if executed directly
+# ----------------------------------------------------------------------
+if __name__ == "__main__":
+    test_server_suite()
@@ -0,0 +1,127 @@
+"""
+===== SymbolTable.py =====
+
+Symbol table shared by the statements of one program or session.
+
+Every declared variable gets an integer slot. Names are looked up once, in
+the semantic analyzer; after that the AST carries the slot
+(Var.slot, Statement.slot) and later phases index the parallel lists
+directly instead of going through a dict of names:
+
+    slot      0        1
+    names   ["y",     "z"]
+    types   ["int",   "double"]
+    values  [7,       2.5]
+
+A table may be given a capacity. When a new name would exceed it, the
+eviction policy decides what happens:
+    "lru"     forget the least recently used variable (default)
+    "fifo"    forget the oldest declared variable
+    "reject"  refuse the new declaration (declare() returns None)
+Slots of forgotten variables are reused by later declarations.
+"""
+
+import sys
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+EVICTION_POLICIES = ("lru", "fifo", "reject")
+
+
+class SymbolTable:
+    """Name -> slot map plus per-slot name, type and current value."""
+
+    __slots__ = ("_slots", "_free", "names", "types", "values",
+                 "capacity", "policy", "evictions")
+
+    def __init__(self, capacity: Optional[int] = None, policy: str = "lru"):
+        if capacity is not None and capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"unknown eviction policy {policy!r}; use one of {EVICTION_POLICIES}")
+        self.capacity = capacity
+        self.policy = policy
+        self.evictions = 0
+        self._slots: "OrderedDict[str, int]" = OrderedDict()   # oldest / least recent first
+        self._free: List[int] = []                             # slots of forgotten variables
+        self.names: List[Optional[str]] = []
+        self.types: List[Optional[str]] = []
+        self.values: List[Any] = []
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._slots
+
+    def lookup(self, name: str) -> Optional[int]:
+        """Slot of a declared variable, or None."""
+        slot = self._slots.get(name)
+        if slot is not None and self.policy == "lru" and self.capacity is not None:
+            self._slots.move_to_end(name)
+        return slot
+
+    def declare(self, name: str, var_type: str) -> Optional[int]:
+        """
+        Declare `name` with `var_type` and return its slot. Declaring a name
+        again reuses its slot (the caller checks that the type matches).
+        Returns None if the table is full and the policy is "reject".
+        """
+        slot = self.lookup(name)
+        if slot is not None:
+            self.types[slot] = var_type
+            return slot
+
+        full = self.capacity is not None and len(self._slots) >= self.capacity
+        if full and self.policy == "reject":
+            return None
+
+        if self._free:
+            slot = self._free.pop()
+            self.names[slot] = name
+            self.types[slot] = var_type
+            self.values[slot] = None
+        else:
+            slot = len(self.names)
+            self.names.append(name)
+            self.types.append(var_type)
+            self.values.append(None)
+        self._slots[name] = slot
+
+        # Evict after allocating, so the victim's slot (and value) stays intact
+        # until the next declaration; the statement being compiled may still read it.
+        if full:
+            _, victim = self._slots.popitem(last=False)
+            self.names[victim] = None
+            self.types[victim] = None
+            self._free.append(victim)
+            self.evictions += 1
+        return slot
+
+    def reset(self) -> None:
+        """Forget every variable and release the slot lists."""
+        self._slots.clear()
+        self._free.clear()
+        self.names.clear()
+        self.types.clear()
+        self.values.clear()
+        self.evictions = 0
+
+    def bindings(self) -> Dict[str, Any]:
+        """Current value of every declared variable, by name."""
+        return {name: self.values[slot] for name, slot in self._slots.items()}
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Variable count, slot count and approximate bytes held by the table."""
+        size = (sys.getsizeof(self._slots) + sys.getsizeof(self._free)
+                + sys.getsizeof(self.names) + sys.getsizeof(self.types)
+                + sys.getsizeof(self.values)
+                + sum(sys.getsizeof(name) for name in self._slots)
+                + sum(sys.getsizeof(value) for value in self.values if value is not None))
+        return {
+            "variables": len(self._slots),
+            "slots": len(self.names),
+            "capacity": self.capacity or 0,
+            "evictions": self.evictions,
+            "bytes": size,
+        }
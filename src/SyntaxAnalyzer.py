@@ -20,6 +20,8 @@ Needs to return a dict in the format:
         "right": 3
     }
 }
+Nested expressions nest the same way, e.g. (2 + 3) * 5:
+    {"op": "*", "left": {"op": "+", "left": 2, "right": 3}, "right": 5}
 """
 """
 def test_syntax(token_list):
@@ -29,30 +31,49 @@ def test_syntax(token_list):
 """
 
 # The syntax analyzer checks the grammatical structure of a single statement of the form:
-#   TYPE IDENT = NUMBER OP NUMBER ;
-# and produces an AST dict:
-# {
-#     "type": "int" | "double",
-#     "identifier": "<name>",
-#     "expression": {"op": "+|-|*|/", "left": <num>, "right": <num>}
-# }
+#   TYPE IDENT = expression ;
+#
+#   expression := term   (("+" | "-") term)*
+#   term       := unary  (("*" | "/") unary)*
+#   unary      := "-" unary | NUMBER | IDENT | "(" expression ")"
+#
+# and produces an AST (see SyntaxTree.py):
+#     Statement(type="int" | "double", identifier="<name>", expression=<node>)
+# where <node> is a number, Var(name) for a previously declared variable,
+# BinOp(op, left, right) with op in + - * /, or Neg(operand) for unary minus. Unary minus applied directly to a literal is
+# folded into a negative literal. SyntaxTree.to_dict() gives the dict format:
+# {"type": ..., "identifier": ..., "expression": {"op": "+", "left": 4, "right": 3}}
+#
+# Expressions are parsed with an iterative shunting-yard loop: one pass over the
+# tokens, explicit operand/operator stacks, so arbitrarily deep nesting never
+# touches the Python recursion limit and parsing is linear in the token count.
 #
 # It assumes token_list comes from the lexical analyzer as a list of (KIND, LEXEME).
-# KINDs expected: TYPE, IDENT, ASSIGN, NUMBER (or INT/FLOAT), OP, SEMICOLON
-# On success: prints AST and returns it
-# On failure: prints an error and returns {}
+# KINDs expected: TYPE, IDENT, ASSIGN, NUMBER (or INT/FLOAT), OP, LPAREN, RPAREN, SEMICOLON
+# On success: prints AST (as a dict) and returns the Statement
+# On failure: prints an error and returns None
+# With verbose=False nothing is printed and errors go to the `diagnostics` list only.
+#
+# parse_statements() parses a token list of several statements with panic-mode
+# recovery: after an error it skips to the next SEMICOLON and parses on, so every
+# bad statement is reported in one pass.
+
+import contextlib
+import io
+from typing import List, Tuple, Optional
 
-from typing import List, Tuple, Dict, Any
-import re
+from Diagnostics import Diagnostic, report
+from SyntaxTree import BinOp, Neg, Statement, Var, format_dict, to_dict
 
 _NUM_KINDS = {"NUMBER", "INT", "FLOAT"}   # support either style from the lexer
-_EXPECTED_SEQUENCE = ["TYPE", "IDENT", "ASSIGN", "NUMBER", "OP", "NUMBER", "SEMICOLON"]
-_EXPECTED_KINDS = ["TYPE", "IDENT", "ASSIGN", "NUM", "OP", "NUM", "SEMICOLON"]
 _VALID_TYPES = {"int", "double"}
 _VALID_OPS = {"+", "-", "*", "/"}
 
-def _err(msg: str):
-    print(f"Syntax error: {msg}")
+# Binding power of each operator; "neg" is unary minus, "(" never reduces
+_PRECEDENCE = {"+": 1, "-": 1, "*": 2, "/": 2, "neg": 3}
+
+def _err(msg: str, verbose: bool = True, diagnostics: Optional[List[Diagnostic]] = None):
+    report(diagnostics, verbose, "syntax", "Syntax", msg)
 
 def _to_number(lexeme: str):
     # Convert NUMBER lexeme to int or float
@@ -64,126 +85,161 @@ def _to_number(lexeme: str):
         # Should not happen if lexer was correct, but guard anyway
         return None
 
-# Validate exact token sequence and count
-def validate_token_sequence(tokens):
-      # Validate exact token sequence and count
-    kinds_only = [k for k, _ in tokens]
-    if kinds_only != _EXPECTED_SEQUENCE:
-        _err(
-            "invalid token sequence. Expected: "
-            + " ".join(_EXPECTED_SEQUENCE)
-            + f"  |  Found: {' '.join(kinds_only) if kinds_only else '<none>'}"
-        )
-        return [] 
-    
-def validate_types(tokens):
-    # Make sure there are enough tokens before indexing
-    if len(tokens) < 7:
-        _err("too few tokens to validate types.")
-        return False
-
-    type_lex = tokens[0][1]
-    ident_lex = tokens[1][1]
-    num1_lex  = tokens[3][1]
-    op_lex    = tokens[4][1]
-    num2_lex  = tokens[5][1]
-    semi_lex  = tokens[6][1]
-
-    if type_lex not in _VALID_TYPES:
-        _err(f"unknown type {type_lex!r}")
-        return False
-    if not re.fullmatch(r"[A-Za-z][A-Za-z0-9]*", ident_lex):
-        _err("identifier must be alphanumeric starting with alpha character only")
-        return False
-    if op_lex not in _VALID_OPS:
-        _err(f"invalid operator {op_lex!r}")
-        return False
-    try:
-        float(num1_lex)
-        float(num2_lex)
-    except ValueError:
-        _err("number literal not valid")
-        return False
-    if semi_lex != ";":
-        _err("statement must end with ';'")
-        return False
+def _reduce(operator: str, operands: list):
+    """Pop the operands of `operator` and push the node it builds."""
+    if operator == "neg":
+        operand = operands.pop()
+        if isinstance(operand, (int, float)):
+            operands.append(-operand)
+        else:
+            operands.append(Neg(operand))
+    else:
+        right = operands.pop()
+        left = operands.pop()
+        operands.append(BinOp(operator, left, right))
+
+def parse_expression(tokens: List[Tuple[str, str]], pos: int, verbose: bool = True,
+                     diagnostics: Optional[List[Diagnostic]] = None):
+    """
+    Parse the expression starting at tokens[pos].
+    Returns (node, next_pos); node is None after reporting an error.
+    """
+    operands: list = []
+    operators: List[str] = []
+    expect_operand = True
+    n = len(tokens)
+
+    while pos < n:
+        kind, lexeme = tokens[pos]
+        if expect_operand:
+            if kind in _NUM_KINDS:
+                value = _to_number(lexeme)
+                if value is None:
+                    _err(f"invalid numeric literal {lexeme!r}.", verbose, diagnostics)
+                    return None, pos
+                operands.append(value)
+                expect_operand = False
+            elif kind == "IDENT":
+                operands.append(Var(lexeme))
+                expect_operand = False
+            elif kind == "OP" and lexeme == "-":
+                operators.append("neg")
+            elif kind == "LPAREN":
+                operators.append("(")
+            else:
+                _err(f"expected a number, variable or '(' at token {pos}; found {kind} {lexeme!r}",
+                     verbose, diagnostics)
+                return None, pos
+        elif kind == "OP":
+            if lexeme not in _VALID_OPS:
+                _err(f"invalid operator '{lexeme}'", verbose, diagnostics)
+                return None, pos
+            precedence = _PRECEDENCE[lexeme]
+            # All binary operators are left-associative
+            while operators and operators[-1] != "(" and _PRECEDENCE[operators[-1]] >= precedence:
+                _reduce(operators.pop(), operands)
+            operators.append(lexeme)
+            expect_operand = True
+        elif kind == "RPAREN":
+            while operators and operators[-1] != "(":
+                _reduce(operators.pop(), operands)
+            if not operators:
+                _err(f"unmatched ')' at token {pos}", verbose, diagnostics)
+                return None, pos
+            operators.pop()
+        else:
+            break
+        pos += 1
 
-    return True
+    if expect_operand:
+        found = f"{tokens[pos][0]} {tokens[pos][1]!r}" if pos < n else "end of input"
+        _err(f"expected a number, variable or '(' at token {pos}; found {found}",
+             verbose, diagnostics)
+        return None, pos
 
-def test_syntax(token_list: List[Tuple[str, str]]) -> Dict[str, Any]:
-    print("[SYNTAX ANALYSIS]")
+    while operators:
+        operator = operators.pop()
+        if operator == "(":
+            _err("unmatched '('", verbose, diagnostics)
+            return None, pos
+        _reduce(operator, operands)
+
+    return operands[0], pos
+
+def test_syntax(token_list: List[Tuple[str, str]], verbose: bool = True,
+                diagnostics: Optional[List[Diagnostic]] = None) -> Optional[Statement]:
+    if verbose:
+        print("[SYNTAX ANALYSIS]")
 
     if not token_list:
-        _err("no tokens provided.")
-        return {}
-    
-    # Validate token sequence
-    validate_token_sequence(token_list)
-    validate_types(token_list)
-    
-    if not validate_types:
-        return {}
+        _err("no tokens provided.", verbose, diagnostics)
+        return None
 
-    # Must be exactly seven tokens: TYPE IDENT ASSIGN NUM OP NUM SEMICOLON
-    if len(token_list) != 7:
+    if len(token_list) < 4:
         kinds = " ".join(k for k, _ in token_list)
-        _err(f"expected 7 tokens (TYPE IDENT ASSIGN NUM OP NUM SEMICOLON); found {len(token_list)} -> {kinds}")
-        return {}
+        _err(f"expected TYPE IDENT ASSIGN expression SEMICOLON; found {kinds}", verbose, diagnostics)
+        return None
 
-    (k0, t_lex), (k1, id_lex), (k2, _eq), (k3, left_lex), (k4, op_lex), (k5, right_lex), (k6, semi_lex) = token_list
+    (k0, t_lex), (k1, id_lex), (k2, _eq) = token_list[:3]
 
     # Kind checks in fixed positions
     if k0 != "TYPE":
-        _err(f"expected TYPE at position 0; found {k0}")
-        return {}
+        _err(f"expected TYPE at position 0; found {k0}", verbose, diagnostics)
+        return None
+    if t_lex not in _VALID_TYPES:
+        _err(f"unknown type {t_lex!r}", verbose, diagnostics)
+        return None
     if k1 != "IDENT":
-        _err(f"expected IDENT at position 1; found {k1}")
-        return {}
+        _err(f"expected IDENT at position 1; found {k1}", verbose, diagnostics)
+        return None
     if k2 != "ASSIGN":
-        _err(f"expected ASSIGN '=' at position 2; found {k2}")
-        return {}
-    if k3 not in _NUM_KINDS:
-        _err(f"expected NUMBER at position 3; found {k3}")
-        return {}
-    if k4 != "OP":
-        _err(f"expected OP at position 4; found {k4}")
-        return {}
-    if k5 not in _NUM_KINDS:
-        _err(f"expected NUMBER at position 5; found {k5}")
-        return {}
-    if k6 != "SEMICOLON" or semi_lex != ";":
-        _err("statement must end with ';'")
-        return {}
-
-    # Operator validation
-    if op_lex not in _VALID_OPS:
-        _err(f"invalid operator '{op_lex}'")
-        return {}
-
-    # Convert numeric lexemes
-    left_val = _to_number(left_lex)
-    right_val = _to_number(right_lex)
-    if left_val is None or right_val is None:
-        _err("invalid numeric literal.")
-        return {}
+        _err(f"expected ASSIGN '=' at position 2; found {k2}", verbose, diagnostics)
+        return None
+
+    expression, pos = parse_expression(token_list, 3, verbose, diagnostics)
+    if expression is None:
+        return None
+
+    if pos >= len(token_list) or token_list[pos] != ("SEMICOLON", ";"):
+        _err("statement must end with ';'", verbose, diagnostics)
+        return None
+    if pos != len(token_list) - 1:
+        _err(f"unexpected tokens after ';': {' '.join(k for k, _ in token_list[pos + 1:])}",
+             verbose, diagnostics)
+        return None
 
     # Build AST
-    ast = {
-        "type": t_lex,               # 'int' or 'double'
-        "identifier": id_lex,        # variable name
-        "expression": {
-            "op": op_lex,
-            "left": left_val,
-            "right": right_val
-        }
-    }
+    ast = Statement(t_lex, id_lex, expression)
 
     # Print AST and return
-    print("Syntax valid. AST:")
-    print(ast)
-    print()
+    if verbose:
+        print("Syntax valid. AST:")
+        print(format_dict(ast))
+        print()
     return ast
 
+_SEMICOLON = ("SEMICOLON", ";")
+
+def parse_statements(token_list: List[Tuple[str, str]], verbose: bool = True,
+                     diagnostics: Optional[List[Diagnostic]] = None) -> List[Optional[Statement]]:
+    """
+    Parse a token list holding several ';'-terminated statements with
+    panic-mode recovery: a statement with a syntax error is reported, its
+    entry is None, and parsing resumes after its ';'. Tokens after the last
+    ';' are parsed as one more statement. Returns one entry per statement.
+    """
+    statements: List[Optional[Statement]] = []
+    start = 0
+    n = len(token_list)
+    while start < n:
+        try:
+            end = token_list.index(_SEMICOLON, start) + 1
+        except ValueError:
+            end = n
+        statements.append(test_syntax(token_list[start:end], verbose, diagnostics))
+        start = end
+    return statements
+
 # ----------------------------------------------------------------------
 # Test Suite for Syntax Analyzer
 # ----------------------------------------------------------------------
@@ -254,6 +310,71 @@ def test_syntax_suite():
             ],
             "expected": {}  # should fail
         },
+        {
+            "name": "Precedence: * binds tighter than +",
+            "input": [
+                ("TYPE", "int"), ("IDENT", "p"), ("ASSIGN", "="),
+                ("NUMBER", "1"), ("OP", "+"), ("NUMBER", "2"), ("OP", "*"), ("NUMBER", "3"),
+                ("SEMICOLON", ";")
+            ],
+            "expected": {
+                "type": "int",
+                "identifier": "p",
+                "expression": {"op": "+", "left": 1,
+                               "right": {"op": "*", "left": 2, "right": 3}}
+            }
+        },
+        {
+            "name": "Parentheses, left associativity and unary minus",
+            "input": [
+                ("TYPE", "int"), ("IDENT", "q"), ("ASSIGN", "="),
+                ("OP", "-"), ("LPAREN", "("), ("NUMBER", "8"), ("OP", "-"), ("NUMBER", "2"),
+                ("OP", "-"), ("NUMBER", "1"), ("RPAREN", ")"), ("OP", "/"), ("OP", "-"),
+                ("NUMBER", "2"), ("SEMICOLON", ";")
+            ],
+            "expected": {
+                "type": "int",
+                "identifier": "q",
+                "expression": {
+                    "op": "/",
+                    "left": {"op": "neg", "operand": {
+                        "op": "-", "left": {"op": "-", "left": 8, "right": 2}, "right": 1}},
+                    "right": -2
+                }
+            }
+        },
+        {
+            "name": "Single literal",
+            "input": [
+                ("TYPE", "double"), ("IDENT", "a"), ("ASSIGN", "="),
+                ("NUMBER", "7.5"), ("SEMICOLON", ";")
+            ],
+            "expected": {"type": "double", "identifier": "a", "expression": 7.5}
+        },
+        {
+            "name": "Deeply nested parentheses",
+            "input": ([("TYPE", "int"), ("IDENT", "d"), ("ASSIGN", "=")]
+                      + [("LPAREN", "(")] * 5000 + [("NUMBER", "1")]
+                      + [("RPAREN", ")")] * 5000 + [("SEMICOLON", ";")]),
+            "expected": {"type": "int", "identifier": "d", "expression": 1}
+        },
+        {
+            "name": "Unmatched parenthesis",
+            "input": [
+                ("TYPE", "int"), ("IDENT", "u"), ("ASSIGN", "="),
+                ("LPAREN", "("), ("NUMBER", "1"), ("OP", "+"), ("NUMBER", "2"),
+                ("SEMICOLON", ";")
+            ],
+            "expected": {}  # should fail
+        },
+        {
+            "name": "Dangling operator",
+            "input": [
+                ("TYPE", "int"), ("IDENT", "v"), ("ASSIGN", "="),
+                ("NUMBER", "1"), ("OP", "+"), ("SEMICOLON", ";")
+            ],
+            "expected": {}  # should fail
+        },
         {
             "name": "Unknown type",
             "input": [
@@ -272,7 +393,8 @@ def test_syntax_suite():
     passed = 0
     for case in tests:
         print(f"--- {case['name']} ---")
-        result = test_syntax(case["input"])
+        ast = test_syntax(case["input"])
+        result = to_dict(ast) if ast else {}
         expected = case["expected"]
         if result == expected:
             print("PASS\n")
@@ -282,7 +404,46 @@ def test_syntax_suite():
             print("Expected:", expected)
             print("Got:", result, "\n")
 
-    print(f"Summary: {passed}/{len(tests)} tests passed.\n")
+    # Panic-mode recovery over several statements
+    print("--- Recovery: errors resynchronize on ';' ---")
+    tokens = [("TYPE", "int"), ("IDENT", "a"), ("ASSIGN", "="), ("NUMBER", "1"), ("SEMICOLON", ";"),
+              ("TYPE", "int"), ("IDENT", "b"), ("ASSIGN", "="), ("OP", "+"), ("SEMICOLON", ";"),
+              ("IDENT", "c"), ("ASSIGN", "="), ("NUMBER", "2"), ("SEMICOLON", ";"),
+              ("TYPE", "int"), ("IDENT", "d"), ("ASSIGN", "="), ("IDENT", "a"), ("SEMICOLON", ";"),
+              ("TYPE", "int"), ("IDENT", "e")]
+    diagnostics: List[Diagnostic] = []
+    result = [to_dict(ast) if ast else None for ast in parse_statements(tokens, False, diagnostics)]
+    expected = [{"type": "int", "identifier": "a", "expression": 1}, None, None,
+                {"type": "int", "identifier": "d", "expression": "a"}, None]
+    if result == expected and [d.phase for d in diagnostics] == ["syntax"] * 3:
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL")
+        print("Expected:", expected)
+        print("Got:", result, diagnostics, "\n")
+
+    # Verbose mode prints the AST without recursing
+    print("--- Verbose output of a 40000-level tree ---")
+    depth = 20000
+    tokens = ([("TYPE", "int"), ("IDENT", "x"), ("ASSIGN", "=")]
+              + [("OP", "-"), ("LPAREN", "("), ("NUMBER", "1"), ("OP", "+")] * depth
+              + [("NUMBER", "1")] + [("RPAREN", ")")] * depth + [("SEMICOLON", ";")])
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            ast = test_syntax(tokens)
+        printed = output.getvalue().count("'neg'")
+    except RecursionError:
+        ast, printed = None, 0
+    if ast is not None and printed == depth:
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL")
+        print("Got:", printed, "negations printed\n")
+
+    print(f"Summary: {passed}/{len(tests) + 2} tests passed.\n")
 
 
 # ----------------------------------------------------------------------
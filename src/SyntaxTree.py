@@ -0,0 +1,301 @@
+"""
+===== SyntaxTree.py =====
+
+Compact AST node classes shared by the syntax, semantic, intermediate code
+and assembler phases.
+
+Nodes use __slots__, so they carry no per-instance __dict__, and literal
+operands are stored as plain Python int / float values (no wrapper node).
+Each class has an integer `code` so phases can dispatch on one attribute.
+
+    int z = (2 + 3) * -(4 - 1);
+
+    Statement("int", "z",
+              BinOp("*", BinOp("+", 2, 3), Neg(BinOp("-", 4, 1))))
+
+Variable references are Var(name) leaves; in the dict format they are
+plain strings. The original dict format is still accepted everywhere
+through from_dict() and can be produced for display or old callers with
+to_dict() (format_dict() renders that as text for any depth):
+{
+    "type": "int",
+    "identifier": "z",
+    "expression": {"op": "*", "left": {"op": "+", "left": 2, "right": 3},
+                   "right": {"op": "neg", "operand": {"op": "-", "left": 4, "right": 1}}}
+}
+Both converters use explicit stacks, so tree depth is not limited by
+Python recursion.
+"""
+
+from typing import Any, Dict, Iterable, Iterator, Optional, Union
+
+# Node codes
+BINOP = 1
+NEG = 2
+VAR = 3
+
+
+class BinOp:
+    """Binary operation: left op right, op in + - * /."""
+    __slots__ = ("op", "left", "right")
+    code = BINOP
+
+    def __init__(self, op: str, left: Any, right: Any):
+        self.op = op
+        self.left = left
+        self.right = right
+
+    def __repr__(self) -> str:
+        return f"BinOp({self.op!r}, {self.left!r}, {self.right!r})"
+
+
+class Neg:
+    """Unary minus."""
+    __slots__ = ("operand",)
+    code = NEG
+    op = "neg"
+
+    def __init__(self, operand: Any):
+        self.operand = operand
+
+    def __repr__(self) -> str:
+        return f"Neg({self.operand!r})"
+
+
+class Var:
+    """Reference to a previously declared variable; `slot` is set by the semantic analyzer."""
+    __slots__ = ("name", "slot")
+    code = VAR
+
+    def __init__(self, name: str, slot: Optional[int] = None):
+        self.name = name
+        self.slot = slot
+
+    def __repr__(self) -> str:
+        return f"Var({self.name!r})"
+
+
+class Statement:
+    """TYPE IDENT = expression ;  `slot` is the identifier's symbol-table slot."""
+    __slots__ = ("type", "identifier", "expression", "slot")
+
+    def __init__(self, type: str, identifier: str, expression: Any, slot: Optional[int] = None):
+        self.type = type
+        self.identifier = identifier
+        self.expression = expression
+        self.slot = slot
+
+    def __repr__(self) -> str:
+        return f"Statement({self.type!r}, {self.identifier!r}, {self.expression!r})"
+
+
+NODE_TYPES = (BinOp, Neg)     # interior nodes; everything else is a leaf
+
+# ----------------------------------------------------------------------
+# Dict adapter
+# ----------------------------------------------------------------------
+def expression_from_dict(expr: Any) -> Any:
+    """Convert a dict expression tree to nodes. Raises ValueError on a malformed node."""
+    built = []
+    stack = [(expr, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if isinstance(node, str):
+            built.append(Var(node))
+        elif not isinstance(node, dict):
+            built.append(node)      # literal (validated by the semantic analyzer)
+        elif not children_done:
+            stack.append((node, True))
+            if node.get("op") == "neg":
+                if "operand" not in node:
+                    raise ValueError("invalid expression node in AST.")
+                stack.append((node["operand"], False))
+            else:
+                if not {"op", "left", "right"} <= node.keys():
+                    raise ValueError("invalid expression node in AST.")
+                stack.append((node["right"], False))
+                stack.append((node["left"], False))
+        elif node["op"] == "neg":
+            built.append(Neg(built.pop()))
+        else:
+            right = built.pop()
+            built.append(BinOp(node["op"], built.pop(), right))
+    return built.pop()
+
+
+def from_dict(ast: Union[Statement, Dict[str, Any]]) -> Statement:
+    """
+    Accept a Statement or an AST dict and return a Statement.
+    Raises ValueError if a dict is missing fields or has a malformed node.
+    """
+    if isinstance(ast, Statement):
+        return ast
+    if not isinstance(ast, dict):
+        raise ValueError("AST is not a Statement or dictionary.")
+    if not {"type", "identifier", "expression"} <= ast.keys():
+        raise ValueError("AST missing required fields (type / identifier / expression).")
+    return Statement(ast["type"], ast["identifier"], expression_from_dict(ast["expression"]))
+
+
+def expression_to_dict(expr: Any) -> Any:
+    """Convert a node tree back to nested dicts."""
+    built = []
+    stack = [(expr, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if isinstance(node, Var):
+            built.append(node.name)
+        elif not isinstance(node, NODE_TYPES):
+            built.append(node)
+        elif not children_done:
+            stack.append((node, True))
+            if node.code == NEG:
+                stack.append((node.operand, False))
+            else:
+                stack.append((node.right, False))
+                stack.append((node.left, False))
+        elif node.code == NEG:
+            built.append({"op": "neg", "operand": built.pop()})
+        else:
+            right = built.pop()
+            built.append({"op": node.op, "left": built.pop(), "right": right})
+    return built.pop()
+
+
+def to_dict(ast: Statement) -> Dict[str, Any]:
+    """Dict view of a Statement, in the format the phases originally exchanged."""
+    return {
+        "type": ast.type,
+        "identifier": ast.identifier,
+        "expression": expression_to_dict(ast.expression),
+    }
+
+
+def format_dict(ast: Statement) -> str:
+    """
+    str(to_dict(ast)), built with an explicit stack: printing the nested
+    dicts themselves recurses in repr() and fails on very deep trees.
+    """
+    parts = [f"{{'type': {ast.type!r}, 'identifier': {ast.identifier!r}, 'expression': "]
+    stack: list = ["}", ast.expression]     # text to emit or nodes to render, last first
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            parts.append(item)
+        elif isinstance(item, Var):
+            parts.append(repr(item.name))
+        elif not isinstance(item, NODE_TYPES):
+            parts.append(repr(item))
+        elif item.code == NEG:
+            parts.append("{'op': 'neg', 'operand': ")
+            stack += ["}", item.operand]
+        else:
+            parts.append(f"{{'op': {item.op!r}, 'left': ")
+            stack += ["}", item.right, ", 'right': ", item.left]
+    return "".join(parts)
+
+
+def iter_variables(expr: Any) -> Iterator[Var]:
+    """Yield every Var leaf of an expression tree (explicit stack, any order)."""
+    stack = [expr]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Var):
+            yield node
+        elif isinstance(node, NODE_TYPES):
+            if node.code == NEG:
+                stack.append(node.operand)
+            else:
+                stack.append(node.left)
+                stack.append(node.right)
+
+
+def count_nodes(expr: Any) -> int:
+    """Number of nodes (interior nodes and leaves) in an expression tree."""
+    count = 0
+    stack = [expr]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if isinstance(node, NODE_TYPES):
+            if node.code == NEG:
+                stack.append(node.operand)
+            else:
+                stack.append(node.left)
+                stack.append(node.right)
+    return count
+
+
+class NameAllocator:
+    """
+    Fresh names prefix1, prefix2, ... for one compilation (temporaries,
+    registers). Names in `reserved` (the statement's own variables) are
+    skipped, so a variable called t1 never collides with a temporary.
+    """
+    __slots__ = ("prefix", "count", "reserved")
+
+    def __init__(self, prefix: str, reserved: Iterable[str] = ()):
+        self.prefix = prefix
+        self.count = 0
+        self.reserved = {name for name in reserved if name.startswith(prefix)}
+
+    def new(self) -> str:
+        while True:
+            self.count += 1
+            name = f"{self.prefix}{self.count}"
+            if name not in self.reserved:
+                return name
+
+
+# ----------------------------------------------------------------------
+# Test Suite for the dict adapter
+# ----------------------------------------------------------------------
+def test_syntax_tree_suite():
+    print("===== Running Syntax Tree Test Suite =====\n")
+
+    deep = 1
+    for _ in range(300):
+        deep = {"op": "neg", "operand": {"op": "+", "left": 1, "right": deep}}
+
+    tests = [
+        {
+            "name": "Round trip of a nested expression",
+            "input": {
+                "type": "int",
+                "identifier": "z",
+                "expression": {
+                    "op": "*",
+                    "left": {"op": "+", "left": 2, "right": 3},
+                    "right": {"op": "neg", "operand": {"op": "-", "left": 4, "right": 1}}
+                }
+            },
+        },
+        {
+            "name": "Round trip of a bare literal",
+            "input": {"type": "double", "identifier": "a", "expression": 7.5},
+        },
+        {
+            "name": "Round trip of a 600-node tree",
+            "input": {"type": "int", "identifier": "d", "expression": deep},
+        },
+    ]
+
+    passed = 0
+    for case in tests:
+        print(f"--- {case['name']} ---")
+        ast = from_dict(case["input"])
+        result = to_dict(ast)
+        if result == case["input"] and format_dict(ast) == str(case["input"]):
+            print("PASS\n")
+            passed += 1
+        else:
+            print("FAIL\n")
+
+    print(f"Summary: {passed}/{len(tests)} tests passed.\n")
+
+
+# ----------------------------------------------------------------------
+# Run suite if executed directly
+# ----------------------------------------------------------------------
+if __name__ == "__main__":
+    test_syntax_tree_suite()
@@ -0,0 +1,288 @@
+"""
+===== VM.py =====
+
+Virtual machine that executes the assembly produced by the Assembler
+(LD / ADD / SUB / MUL / DIV / NEG / ST, their F-suffixed double forms, and
+the SHL / SHR shifts introduced by the peephole pass).
+
+assemble() encodes the text once into three parallel arrays:
+
+    opcodes  array('B')   operation specialised by operand kind (register,
+                          immediate or memory), e.g. ADD_REG / ADD_IMM / ADD_MEM
+    a        array('i')   destination register, or memory cell for ST
+    b        array('i')   source register, constant-pool index or memory cell
+
+plus a constant pool and the list of memory cells (variables and spill
+slots). run() is a single dispatch loop over those arrays with a register
+file and a memory list, and returns the final variable bindings:
+
+    vm = assemble(["LD R1, 4", "ADD R1, 3", "ST y, R1"])
+    vm.run()                                  -> {"y": 7}
+    assemble(["LD R1, x", "SHL R1, 1", "ST y, R1"]).run({"x": 5})
+                                              -> {"x": 5, "y": 10}
+
+Arithmetic follows Assembler._compute: int division truncates toward zero
+(exactly, see truncate_div), everything else is exact Python int / float
+arithmetic, and dividing by zero raises ZeroDivisionError. SHR also rounds
+toward zero, so DIV R1, 8 and SHR R1, 3 agree for every int.
+"""
+
+import re
+from array import array
+from typing import Any, Dict, List, Optional
+
+from QuadIR import parse_literal
+
+# ----------------------------------------------------------------------
+# Opcodes: one per (operation, source operand kind)
+# ----------------------------------------------------------------------
+_REG, _IMM, _MEM = 0, 1, 2
+
+(LD_REG, LD_IMM, LD_MEM,
+ ADD_REG, ADD_IMM, ADD_MEM,
+ SUB_REG, SUB_IMM, SUB_MEM,
+ MUL_REG, MUL_IMM, MUL_MEM,
+ DIV_REG, DIV_IMM, DIV_MEM,
+ DIVF_REG, DIVF_IMM, DIVF_MEM,
+ ST, NEG, SHL, SHR) = range(22)
+
+# Int and double forms only differ for division (int truncates)
+_FAMILIES = {
+    "LD": LD_REG, "LDF": LD_REG,
+    "ADD": ADD_REG, "ADDF": ADD_REG,
+    "SUB": SUB_REG, "SUBF": SUB_REG,
+    "MUL": MUL_REG, "MULF": MUL_REG,
+    "DIV": DIV_REG, "DIVF": DIVF_REG,
+}
+
+_REGISTER = re.compile(r"R(\d+)$")
+
+
+def truncate_div(a, b):
+    """
+    a / b rounded toward zero. Exact for ints of any size, where int(a / b)
+    would round through a float above 2**53; other operands fall back to it.
+    """
+    if type(a) is int and type(b) is int:
+        quotient = abs(a) // abs(b)
+        return quotient if (a < 0) == (b < 0) else -quotient
+    return int(a / b)
+
+
+class Program:
+    """Encoded instructions plus constant pool and memory layout."""
+
+    __slots__ = ("opcodes", "a", "b", "constants", "cells", "registers")
+
+    def __init__(self):
+        self.opcodes = array("B")
+        self.a = array("i")
+        self.b = array("i")
+        self.constants: List[Any] = []
+        self.cells: List[str] = []      # memory cell -> variable name or spill slot
+        self.registers = 0
+
+    def __len__(self) -> int:
+        return len(self.opcodes)
+
+    def run(self, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Execute the program. `variables` gives the initial value of variables
+        it reads. Returns the value of every variable it touched (spill slots
+        excluded). Raises ZeroDivisionError if it divides by zero.
+        """
+        cells = self.cells
+        memory = [None] * len(cells)
+        if variables:
+            for index, name in enumerate(cells):
+                if name in variables:
+                    memory[index] = variables[name]
+        registers = [0] * (self.registers + 1)
+        constants = self.constants
+        div = truncate_div
+
+        for op, a, b in zip(self.opcodes, self.a, self.b):
+            if op == LD_MEM:
+                registers[a] = memory[b]
+            elif op == ST:
+                memory[a] = registers[b]
+            elif op == LD_IMM:
+                registers[a] = constants[b]
+            elif op == LD_REG:
+                registers[a] = registers[b]
+            elif op == ADD_REG:
+                registers[a] += registers[b]
+            elif op == ADD_IMM:
+                registers[a] += constants[b]
+            elif op == ADD_MEM:
+                registers[a] += memory[b]
+            elif op == SUB_REG:
+                registers[a] -= registers[b]
+            elif op == SUB_IMM:
+                registers[a] -= constants[b]
+            elif op == SUB_MEM:
+                registers[a] -= memory[b]
+            elif op == MUL_REG:
+                registers[a] *= registers[b]
+            elif op == MUL_IMM:
+                registers[a] *= constants[b]
+            elif op == MUL_MEM:
+                registers[a] *= memory[b]
+            elif op == DIV_REG:
+                registers[a] = div(registers[a], registers[b])
+            elif op == DIV_IMM:
+                registers[a] = div(registers[a], constants[b])
+            elif op == DIV_MEM:
+                registers[a] = div(registers[a], memory[b])
+            elif op == DIVF_REG:
+                registers[a] /= registers[b]
+            elif op == DIVF_IMM:
+                registers[a] /= constants[b]
+            elif op == DIVF_MEM:
+                registers[a] /= memory[b]
+            elif op == NEG:
+                registers[a] = -registers[a]
+            elif op == SHL:
+                registers[a] <<= b
+            else:   # SHR: divide by 2**b rounding toward zero
+                value = registers[a]
+                registers[a] = value >> b if value >= 0 else -((-value) >> b)
+
+        return {name: memory[index] for index, name in enumerate(cells)
+                if name[0] != "$" and memory[index] is not None}
+
+# ----------------------------------------------------------------------
+# Encoding
+# ----------------------------------------------------------------------
+def assemble(code: List[str]) -> Program:
+    """Encode assembly text into a Program. Raises ValueError on unknown input."""
+    program = Program()
+    constant_index: Dict[Any, int] = {}     # (type, repr) so 0.0 and -0.0 stay apart
+    cell_index: Dict[str, int] = {}
+
+    def register(text: str) -> int:
+        match = _REGISTER.match(text)
+        if match is None:
+            raise ValueError(f"expected a register, found {text!r}")
+        number = int(match.group(1))
+        if number > program.registers:
+            program.registers = number
+        return number
+
+    def cell(text: str) -> int:
+        name = text[1:-1] if text[0] == "[" else text
+        index = cell_index.get(name)
+        if index is None:
+            index = cell_index[name] = len(program.cells)
+            program.cells.append(name)
+        return index
+
+    def source(text: str):
+        """(kind, index) of a source operand."""
+        if _REGISTER.match(text):
+            return _REG, register(text)
+        value = parse_literal(text)
+        if value is None:
+            return _MEM, cell(text)
+        key = (type(value), repr(value))
+        index = constant_index.get(key)
+        if index is None:
+            index = constant_index[key] = len(program.constants)
+            program.constants.append(value)
+        return _IMM, index
+
+    for line in code:
+        mnemonic, _, rest = line.partition(" ")
+        args = rest.split(", ")
+        if mnemonic in ("ST", "STF"):
+            opcode, a, b = ST, cell(args[0]), register(args[1])
+        elif mnemonic in ("NEG", "NEGF"):
+            opcode, a, b = NEG, register(args[0]), 0
+        elif mnemonic in ("SHL", "SHR"):
+            opcode, a, b = (SHL if mnemonic == "SHL" else SHR), register(args[0]), int(args[1])
+        elif mnemonic in _FAMILIES and len(args) == 2:
+            a = register(args[0])
+            kind, b = source(args[1])
+            opcode = _FAMILIES[mnemonic] + kind
+        else:
+            raise ValueError(f"cannot encode {line!r}")
+        program.opcodes.append(opcode)
+        program.a.append(a)
+        program.b.append(b)
+    return program
+
+
+def execute(code: List[str], variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Assemble and run `code`; returns the final variable bindings."""
+    return assemble(code).run(variables)
+
+# ----------------------------------------------------------------------
+# Test Suite for the VM
+# ----------------------------------------------------------------------
+def test_vm_suite():
+    print("===== Running VM Test Suite =====\n")
+
+    tests = [
+        {
+            "name": "Integer addition",
+            "input": (["LD R1, 4", "ADD R1, 3", "ST y, R1"], None),
+            "expected": {"y": 7}
+        },
+        {
+            "name": "Int division truncates toward zero",
+            "input": (["LD R1, 0", "SUB R1, 7", "DIV R1, 2", "ST q, R1",
+                       "LD R2, -7", "SHR R2, 1", "ST s, R2"], None),
+            "expected": {"q": -3, "s": -3}
+        },
+        {
+            "name": "Doubles, variables, moves and negation",
+            "input": (["LDF R1, x", "MULF R1, 2.5", "LDF R2, R1", "NEGF R2", "DIVF R2, 0.5",
+                       "STF d, R2"], {"x": 2.0}),
+            "expected": {"x": 2.0, "d": -10.0}
+        },
+        {
+            "name": "Spill slots are not bindings; [R1] is a variable",
+            "input": (["LD R1, 6", "ST $1, R1", "LD R1, [R1]", "MUL R1, $1", "SHL R1, 1",
+                       "ST [R1], R1"], {"R1": 2}),
+            "expected": {"R1": 24}
+        },
+    ]
+
+    passed = 0
+    for case in tests:
+        print(f"--- {case['name']} ---")
+        code, variables = case["input"]
+        result = execute(code, variables)
+        if result == case["expected"]:
+            print("PASS\n")
+            passed += 1
+        else:
+            print("FAIL")
+            print("Expected:", case["expected"])
+            print("Got:", result, "\n")
+
+    print("--- Division by zero ---")
+    try:
+        execute(["LD R1, 1", "DIV R1, x", "ST y, R1"], {"x": 0})
+        print("FAIL\n")
+    except ZeroDivisionError:
+        print("PASS\n")
+        passed += 1
+
+    print("--- Negating 0.0 gives -0.0 ---")
+    result = execute(["LDF R1, x", "NEGF R1", "STF y, R1"], {"x": 0.0})["y"]
+    if repr(result) == "-0.0":
+        print("PASS\n")
+        passed += 1
+    else:
+        print("FAIL")
+        print("Got:", result, "\n")
+
+    print(f"Summary: {passed}/{len(tests) + 2} tests passed.\n")
+
+
+# ----------------------------------------------------------------------
+# Run suite if executed directly
+# ----------------------------------------------------------------------
+if __name__ == "__main__":
+    test_vm_suite()
@@ -1,6 +1,7 @@
 """ ==== math_solver.py ==== 
 This project implements a one-way compiler that solves simple C++-style arithmetic expressions. 
-The program accepts a single math expression containing exactly two operands and one operator. 
+The program accepts a single math expression built from numbers, the operators below,
+parentheses and unary minus, with the usual precedence (* and / before + and -).
 Supported operations include addition, subtraction, multiplication, and division. 
 The operand types must match the declared variable type (e.g., int or double), and the compiler 
 verifies type correctness before evaluating the expression.
@@ -17,29 +18,217 @@ int y = 4 + 3;   →   y = 7
 int z = 3 * 4;   →   z = 12
 double t = 4.0 * 3.1;   →   t = 12.1
 double u = 9.2 / 2;     →   u = 4.6
+int w = (1 + 2) * -3;   →   w = -9
 
 REQUIREMENTS
 [1] The type must be defined
 [2] Expressions must end with a semicolon
 [3] Defined type must match the variables passed
 [4] Allow for parsing with or without spaces
-[5] Variable must be alpha and operands must be a valid number
+[5] Variable must be alpha and operands must be a valid number or a variable declared earlier
+
+BATCH MODE
+    python math_solver.py --batch FILE              one answer (or error) per input line
+    python math_solver.py --batch - --format jsonl  read stdin, write JSON Lines
+    python math_solver.py --batch FILE --cache-dir DIR   reuse results of earlier runs
+    python math_solver.py --batch FILE --metrics prometheus   per-phase timings and counters
+
+Every non-blank line is compiled in one session (later lines may use
+earlier variables) and results are written through a buffered writer. A
+line may hold several statements: each gets its own result, and a bad one
+is reported without stopping the others. A summary with counts and timings
+goes to stderr; the exit status is 1 if any statement failed.
+
+SERVER MODE (see Server.py)
+    python math_solver.py --serve 127.0.0.1:8765 [--workers N]
+    python math_solver.py --load 127.0.0.1:8765 [--requests N --connections N --pipeline N]
 """
 
-from LexicalAnalyzer import test_lexical
-from SyntaxAnalyzer import test_syntax
-from SemanticAnalyzer import test_semantic
-from IntermediateCodeGenerator import test_intermediate
-from Assembler import test_assembler
+import argparse
+import asyncio
+import io
+import json
+import sys
+import time
+from collections import Counter
+from typing import Optional
+
+from Compiler import CompileResult, CompilerSession, compile_program, compile_statement
+from Metrics import FORMATS, Metrics
+from Server import DEFAULT_WORKERS, CompileServer, load, print_load
+
+# Message printed when a phase fails, keyed by Diagnostic phase name
+_FAILURE_MESSAGES = {
+    "lexical": "Lexical analysis failed.",
+    "syntax": "Syntax analysis failed.",
+    "semantic": "Semantic analysis failed.",
+    "intermediate": "Intermediate code generation failed.",
+    "assembler": "Assembly generation failed.",
+}
+
+# Number of distinct statements the REPL remembers
+_CACHE_SIZE = 1024
+
+def _has_several_statements(line: str) -> bool:
+    """True if a stripped line has a ';' before its end."""
+    semi = line.find(";")
+    return 0 <= semi < len(line) - 1
+
+
+def _compile_line(line: str, session: Optional[CompilerSession] = None, verbose: bool = False):
+    """Results of every statement on a line; a failing one does not stop the rest."""
+    several = _has_several_statements(line)
+    if session is not None:
+        return session.compile_program(line, verbose).statements if several \
+            else [session.compile(line, verbose)]
+    return compile_program(line, verbose).statements if several else [compile_statement(line, verbose)]
+
+
+def run_statement(user_input: str, session: CompilerSession = None):
+    """
+    Compile one REPL line, printing every phase as it runs. A line with
+    several statements compiles each of them, reporting the ones that fail;
+    the result of the last statement is returned.
+    """
+    print("\n=== Starting Compilation Steps ===")
+
+    results = _compile_line(user_input, session, verbose=True)
+    failed = [result for result in results if not result.ok]
+    for result in failed:
+        if len(results) > 1:
+            print(f"In {result.source!r}:")
+        print(f"{_FAILURE_MESSAGES[result.failed_phase]}\n")
+    if failed:
+        print("=== Compilation Failed ===")
+        return results[-1]
+
+    print("=== Compilation Successfully Completed ===\n")
+    return results[-1]
+
+# ----------------------------------------------------------------------
+# Batch mode
+# ----------------------------------------------------------------------
+_OUTPUT_BUFFER = 1 << 16
+
+
+def _format_result(result: CompileResult, line: int, output_format: str) -> str:
+    if output_format == "jsonl":
+        record = {"line": line, "source": result.source, "ok": result.ok}
+        if result.ok:
+            record["answer"] = result.answer
+        else:
+            record["phase"] = result.failed_phase
+            record["error"] = [d.message for d in result.diagnostics]
+        return json.dumps(record) + "\n"
+    if result.ok:
+        return result.answer + "\n"
+    return f"{line}: {result.diagnostics[0] if result.diagnostics else _FAILURE_MESSAGES[result.failed_phase]}\n"
+
+
+def run_batch(source, output, output_format: str = "text", summary=sys.stderr,
+              cache_dir: Optional[str] = None, metrics_format: Optional[str] = None) -> int:
+    """
+    Compile every non-blank line of the text stream `source` and write one
+    result per statement to the binary stream `output`. Prints a summary to
+    `summary` and returns the exit status: 0 if every statement compiled, else 1.
+    With `cache_dir`, results persist there across runs (see DiskCache).
+    With `metrics_format` ("json" or "prometheus"), per-phase metrics are
+    printed to `summary` after the summary.
+    """
+    metrics = Metrics() if metrics_format is not None else None
+    session = CompilerSession(cache_size=_CACHE_SIZE, cache_dir=cache_dir, metrics=metrics)
+    writer = io.BufferedWriter(output, buffer_size=_OUTPUT_BUFFER) \
+        if not isinstance(output, io.BufferedIOBase) else output
+    failures: Counter = Counter()
+    compiled = 0
+    compile_seconds = 0.0
+    start = time.perf_counter()
+
+    for number, line in enumerate(source, 1):
+        statement = line.strip()
+        if not statement:
+            continue
+        begin = time.perf_counter()
+        results = _compile_line(statement, session)
+        compile_seconds += time.perf_counter() - begin
+        compiled += len(results)
+        for result in results:
+            if not result.ok:
+                failures[result.failed_phase] += 1
+            writer.write(_format_result(result, number, output_format).encode("utf-8"))
+    writer.flush()
+    session.close()
+
+    elapsed = time.perf_counter() - start
+    failed = sum(failures.values())
+    rate = compiled / elapsed if elapsed > 0 else 0.0
+    print(f"Summary: {compiled} statements, {compiled - failed} ok, {failed} failed", file=summary)
+    for phase, count in failures.items():
+        print(f"  {phase}: {count}", file=summary)
+    print(f"Time: {elapsed:.3f}s total, {compile_seconds:.3f}s compiling, "
+          f"{rate:.0f} statements/sec", file=summary)
+    if session.cache is not None:
+        print(f"Cache: {session.cache.hits} hits, {session.cache.misses} misses", file=summary)
+    if metrics is not None:
+        print(metrics.dump(metrics_format), file=summary)
+    return 1 if failed else 0
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Compile and solve C++-style arithmetic statements.")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="compile every line of FILE ('-' for stdin) instead of prompting")
+    parser.add_argument("--format", choices=("text", "jsonl"), default="text",
+                        help="batch output: one answer per line, or JSON Lines")
+    parser.add_argument("--metrics", choices=FORMATS,
+                        help="print per-phase timings and counters after a batch run")
+    parser.add_argument("--cache-dir", metavar="DIR",
+                        help="keep compiled statements in a persistent cache in DIR across runs "
+                             "(created mode 0700; DIR must not be writable by others)")
+    parser.add_argument("--serve", metavar="ADDRESS",
+                        help="run the JSON Lines compile server on HOST:PORT or unix:PATH")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="compile threads for --serve")
+    parser.add_argument("--load", metavar="ADDRESS",
+                        help="run the load generator against a server at ADDRESS")
+    parser.add_argument("--requests", type=int, default=10_000, help="requests sent by --load")
+    parser.add_argument("--connections", type=int, default=8, help="connections opened by --load")
+    parser.add_argument("--pipeline", type=int, default=32,
+                        help="requests in flight per connection for --load")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    if args.serve is not None:
+        print(f"Serving on {args.serve} with {args.workers} compile threads", file=sys.stderr)
+        try:
+            asyncio.run(CompileServer(workers=args.workers).serve_forever(args.serve))
+        except KeyboardInterrupt:
+            pass
+        return 0
+    if args.load is not None:
+        report = asyncio.run(load(args.load, args.requests, args.connections, args.pipeline))
+        print_load(report)
+        return 1 if report["failures"] else 0
+    if args.batch is not None:
+        if args.batch == "-":
+            return run_batch(sys.stdin, sys.stdout.buffer, args.format,
+                             cache_dir=args.cache_dir, metrics_format=args.metrics)
+        with open(args.batch, encoding="utf-8") as source:
+            return run_batch(source, sys.stdout.buffer, args.format,
+                             cache_dir=args.cache_dir, metrics_format=args.metrics)
 
-def main():
     print("\nWelcome to Math Solver where we will solve your simple math problem.")
     print("Write your math problem in the following format.")
     print("(type)(identifier)=(int/double)(operation +,-,*,/)(int/double);")
     print("Example 1: int x=1+1;")
     print("Example 2: double y=2.0+2.0;")
-    print("The answer will be printed as x=2; y=4.0;\n")
+    print("Example 3: int z=(1+2)*-3;")
+    print("The answer will be printed as x=2; y=4.0;")
+    print("Variables from earlier lines can be used: int z=x*3;\n")
 
+    session = CompilerSession(cache_size=_CACHE_SIZE, cache_dir=args.cache_dir)
     while True:
         user_input = input(
             "Enter a simple math expression (or type 'q' to quit): "
@@ -47,47 +236,14 @@ def main():
 
         if user_input.lower() == 'q':
             print("Exiting program...")
+            session.close()
             break
 
         if not user_input:
             print("Invalid input. Try again.\n")
             continue
 
-        print("\n=== Starting Compilation Steps ===")
-
-        # 1. LEXICAL ANALYSIS
-        token_list = test_lexical(user_input)
-        if not token_list:
-            print("Lexical analysis failed.\n")
-            print("=== Compilation Failed ===")
-            continue
-
-        # 2. SYNTAX ANALYSIS
-        ast = test_syntax(token_list)
-        if not ast:
-            print("Syntax analysis failed.\n")
-            print("=== Compilation Failed ===")
-            continue
-
-        # 3. SEMANTIC ANALYSIS
-        if not test_semantic(ast):
-            print("Semantic analysis failed.\n")
-            print("=== Compilation Failed ===")
-            continue
-
-        # 4. INTERMEDIATE CODE GENERATION
-        if not test_intermediate(ast):
-            print("Intermediate code generation failed.\n")
-            print("=== Compilation Failed ===")
-            continue
-
-        # 5. ASSEMBLER
-        if not test_assembler(ast):
-            print("Assembly generation failed.\n")
-            print("=== Compilation Failed ===")
-            continue
-
-        print("=== Compilation Successfully Completed ===\n")
+        run_statement(user_input, session)
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())